@@ -4,7 +4,20 @@ psypnp -- useful scripts for OpenPnP and support modules to roll your own
 
 Released under the terms of the GPL v3 (see LICENSE file for details).
 
-Have some imports here to smooth transition for older scripts.  You 
+Scripts start with
+
+  import psypnp
+  psypnp.bootstrap(machine, config, scripting, gui)
+
+which sets up psypnp.globals and not much else: submodules (psypnp.nv,
+psypnp.ui, psypnp.csv_file, psypnp.html, psypnp.repl...) are only
+imported the first time something in them is actually used, so a click
+on a script gets to its first dialog without paying for imports it may
+never need.  Since jython keeps imported modules around from one script
+run to the next, whatever has been loaded (and cached, like parsed CSVs
+and the search index) stays loaded for subsequent runs.
+
+Have some functions here to smooth transition for older scripts.  You
 _should_ use the full path instead in new scripts (this may go away)
 
 @see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
@@ -12,8 +25,119 @@ _should_ use the full path instead in new scripts (this may go away)
 @copyright: Copyright (C) 2019-2020 Pat Deegan, https://psychogenic.com/
 @license: GPL version 3, see LICENSE file for details.
 '''
+import sys
+import time
+
+
+class LazyModule(object):
+    '''
+        LazyModule -- stands in for a module until one of its attributes
+        is looked up, at which point the real module is imported.
+
+        For submodules, the import also replaces the stand-in in the
+        parent package, so subsequent lookups go straight to the module.
+    '''
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+
+    def _lazyLoad(self):
+        name = self.__dict__['_lazy_name']
+        if name not in sys.modules:
+            __import__(name)
+        return sys.modules[name]
+
+    def __getattr__(self, attr):
+        return getattr(self._lazyLoad(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._lazyLoad(), attr, value)
+
+    def __repr__(self):
+        return "<lazy module '%s'>" % self.__dict__['_lazy_name']
+
+
+def lazy_import(name):
+    '''
+        lazy_import(NAME)
+        @return: the module, if already imported, or a LazyModule that
+                 will import it on first use
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+def lazy_submodules(package, names):
+    '''
+        lazy_submodules(PACKAGE, NAMES)
+        Set a lazy stand-in as package.name, for each of the names not
+        already imported, so scripts can use package.name without
+        importing it first.
+    '''
+    for name in names:
+        if getattr(package, name, None) is None:
+            setattr(package, name, lazy_import('%s.%s' % (package.__name__, name)))
+
+
+lazy_submodules(sys.modules[__name__], [
+    'globals', 'debug', 'profile', 'user_config',
+    'ui', 'util', 'nv', 'search', 'csv_file', 'html', 'repl',
+    'estimate', 'geom', 'matcher', 'trigram', 'snapshot',
+    'config', 'auto', 'feedmap', 'project', 'nvstore'])
+
+
+BootstrapCount = 0
+FirstDialogLatency = None
+_bootstrapTime = None
+
+
+def bootstrap(machine, config, scripting, gui):
+    '''
+        bootstrap(MACHINE, CONFIG, SCRIPTING, GUI)
+        The one call script boiler plate needs: sets up psypnp.globals
+        for this run, and starts the click-to-first-dialog clock.
+        @return: number of times bootstrap has been called, in this
+                 interpreter (1 on a first run, when nothing is cached)
+    '''
+    global BootstrapCount, FirstDialogLatency, _bootstrapTime
+    _bootstrapTime = time.time()
+    FirstDialogLatency = None
+    BootstrapCount += 1
+
+    import psypnp.globals
+    psypnp.globals.setup(machine, config, scripting, gui)
+    return BootstrapCount
+
+def note_dialog():
+    '''
+        Called by psypnp.ui as each dialog comes up: the first time
+        after bootstrap(), records how long it took to get there (and
+        prints it if user_config report_startup_latency is set).
+    '''
+    global FirstDialogLatency, _bootstrapTime
+    if _bootstrapTime is None:
+        return
+
+    FirstDialogLatency = time.time() - _bootstrapTime
+    _bootstrapTime = None
+    if user_config.report_startup_latency:
+        print("First dialog %.1f ms after bootstrap (run %i)" % (
+            FirstDialogLatency * 1000.0, BootstrapCount))
+
+
+def showError(*args, **kwargs):
+    return ui.showError(*args, **kwargs)
+
+def showMessage(*args, **kwargs):
+    return ui.showMessage(*args, **kwargs)
+
+def getOption(*args, **kwargs):
+    return ui.getOption(*args, **kwargs)
 
-from .ui import (showError, showMessage, getOption, getUserInput)
+def getUserInput(*args, **kwargs):
+    return ui.getUserInput(*args, **kwargs)
 
-from .util import (machine_is_running, should_proceed_with_motion)
+def machine_is_running(*args, **kwargs):
+    return util.machine_is_running(*args, **kwargs)
 
+def should_proceed_with_motion(*args, **kwargs):
+    return util.should_proceed_with_motion(*args, **kwargs)
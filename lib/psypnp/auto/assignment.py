@@ -0,0 +1,519 @@
+'''
+Created on Oct 17, 2026
+
+Feed assignment as an optimization problem, for
+WorkspaceMapper.map(strategy='optimal').
+
+Rather than placing parts one at a time, each part gets a list of
+candidate placements -- runs of neighbouring available feeds, in some
+feed set, that can hold the whole batch (or, failing that, a spread
+over several sets) -- and the solver picks one candidate per part,
+no two sharing a feed, minimizing the total cost:
+
+  - travel: picks per board x mean distance of the feeds from centroid
+    (or from the part's placements, given a psypnp.auto.travel.TravelModel)
+  - waste: unused capacity, in feeds
+  - mixing: extra package types sharing a feed set
+  - split: extra feed sets a part is spread over
+  - unplaced: parts that didn't make it at all
+
+weighed by CostWeights.  The solver builds plans greedily in a few
+different part orders, then improves on the best by moving parts
+around, until nothing improves or its time budget runs out.
+
+Pure python, nothing openpnp-specific in here: it works on anything
+that looks like FeedSet/FeedInfo and ProjectPart (quantity(),
+package_description), so it can be exercised on synthetic feed sets.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import random
+import time
+
+import psypnp.debug
+
+DefaultTimeBudget = 2.0 # seconds
+DefaultMaxRunsPerSet = 8
+
+class CostWeights:
+    '''
+        relative cost of each thing we care about.  Travel is in
+        distance units per pick, so the others are in "how much travel
+        would I accept to avoid this"
+    '''
+    def __init__(self, travel=1.0, waste=100.0, mixing=250.0,
+                 split=500.0, unplaced=1e6):
+        self.travel = travel
+        self.waste = waste
+        self.mixing = mixing
+        self.split = split
+        self.unplaced = unplaced
+
+
+def package_name(aPart):
+    if aPart.package_description is None:
+        return None
+    return aPart.package_description.name
+
+
+class Candidate:
+    '''
+        One way to place a part: a list of feeds (maybe across sets).
+    '''
+    def __init__(self, partIdx, aPart, feeds, totalQty, travelModel=None):
+        self.part_index = partIdx
+        self.part = aPart
+        self.feeds = feeds
+        self.feed_ids = frozenset([id(f) for f in feeds])
+        self.quantity = totalQty
+
+        pkgDesc = aPart.package_description
+        capacity = 0
+        distTotal = 0
+        sets = dict()
+        for f in feeds:
+            capacity += f.holdsUpTo(pkgDesc)
+            if travelModel is not None and f.location is not None:
+                distTotal += travelModel.travelPerPick(f.location, aPart.getId())
+            else:
+                distTotal += f.distance_from_centroid
+            sets[id(f.feed_set)] = f.feed_set
+
+        self.capacity = capacity
+        self.feed_sets = list(sets.values())
+        self.mean_distance = 0
+        self.wasted = 0
+        self.shortfall = 1.0
+        if len(feeds):
+            self.mean_distance = float(distTotal) / len(feeds)
+        if capacity > 0:
+            self.wasted = len(feeds) * max(0.0, 1.0 - float(totalQty) / capacity)
+            self.shortfall = max(0.0, 1.0 - float(capacity) / totalQty) if totalQty else 0.0
+
+    def cost(self, weights):
+        '''
+            @return: cost of this placement, on its own (i.e. excluding mixing)
+        '''
+        return (weights.travel * self.part.quantity() * self.mean_distance
+                + weights.waste * self.wasted
+                + weights.split * max(0, len(self.feed_sets) - 1)
+                + weights.unplaced * self.shortfall)
+
+    def __repr__(self):
+        return '<Candidate %s: %i feeds in %i sets>' % (str(self.part),
+                                                        len(self.feeds),
+                                                        len(self.feed_sets))
+
+
+class Plan:
+    '''
+        A solution: a candidate (or None, if unplaced) for each part.
+    '''
+    def __init__(self, choices, cost):
+        self.choices = choices
+        self.cost = cost
+
+    def numUnplaced(self):
+        return len([c for c in self.choices if c is None])
+
+    def numFeeds(self):
+        return sum([len(c.feeds) for c in self.choices if c is not None])
+
+    def apply(self):
+        '''
+            reserve the feeds for their parts
+            @return: number of feeds reserved
+        '''
+        numAssociated = 0
+        for cand in self.choices:
+            if cand is None:
+                continue
+            for finfo in cand.feeds:
+                finfo.setPart(cand.part, cand.part.package_description)
+                numAssociated += 1
+        return numAssociated
+
+
+def snapshot_feeds(feedSets):
+    '''
+        @return: an opaque snapshot of the part associations for
+                 all feeds in feedSets (a SystemFeeds), see restore_feeds()
+    '''
+    snap = []
+    for fs in feedSets.entries():
+        for finfo in fs.feeds:
+            snap.append((finfo, finfo.associated_part, finfo.package_description,
+                         finfo.associated_part_maxcapacity, finfo.leave_unmodified,
+                         finfo.kept))
+    return snap
+
+def restore_feeds(snap):
+    for finfo, aPart, pkgDesc, maxCap, leaveIt, kept in snap:
+        finfo.associated_part = aPart
+        finfo.package_description = pkgDesc
+        finfo.associated_part_maxcapacity = maxCap
+        finfo.leave_unmodified = leaveIt
+        finfo.kept = kept
+        finfo._stateChanged()
+
+
+class AssignmentSolver:
+    '''
+        AssignmentSolver -- picks the cheapest (as per CostWeights)
+        feed runs for parts, globally.
+
+        solver = AssignmentSolver(systemFeeds, projParts, num_boards)
+        plan = solver.solve()
+        plan.apply()
+
+        Candidates are computed from the feeds available at construction.
+    '''
+    def __init__(self, feedSets, parts, num_boards=4, weights=None,
+                 timeBudget=DefaultTimeBudget,
+                 restrictToEnabledFeeds=False,
+                 allowSplitting=True,
+                 maxRunsPerSet=DefaultMaxRunsPerSet,
+                 seed=0,
+                 travelModel=None,
+                 quantities=None):
+        self.feed_sets = feedSets
+        self.parts = parts
+        self.num_boards = num_boards
+        self.weights = weights if weights is not None else CostWeights()
+        self.time_budget = timeBudget
+        self.restrict_to_enabled = restrictToEnabledFeeds
+        self.allow_splitting = allowSplitting
+        self.max_runs_per_set = maxRunsPerSet
+        self.random = random.Random(seed)
+        self.travel_model = travelModel
+        # part id -> total quantity to place, overriding qty x num_boards
+        self.quantities = quantities
+        self.num_plans_evaluated = 0
+
+        # packages already sitting in feed sets, from prior associations
+        self.base_packages = dict()
+        for fs in feedSets.entries():
+            pkgs = dict()
+            for finfo in fs.feeds:
+                if not finfo.available() and finfo.package_description is not None:
+                    pkgs[finfo.package_description.name] = True
+            self.base_packages[id(fs)] = pkgs
+
+        self.candidates = []
+        for i in range(len(parts)):
+            self.candidates.append(self._candidatesFor(i))
+
+    def totalQuantity(self, aPart):
+        if self.quantities is not None and aPart.getId() in self.quantities:
+            return self.quantities[aPart.getId()]
+        return aPart.quantity() * self.num_boards
+
+    def _usableFeeds(self, fs, pkgDesc):
+        usable = []
+        for finfo in fs.entries():
+            if not finfo.available():
+                continue
+            if self.restrict_to_enabled and not finfo.isEnabled():
+                continue
+            if finfo.feed_description is None or not finfo.canCarry(pkgDesc):
+                continue
+            if finfo.holdsUpTo(pkgDesc) <= 0:
+                continue
+            usable.append(finfo)
+        return usable
+
+    def _runsIn(self, usable, pkgDesc, totalQty):
+        '''
+            @return: all the shortest runs of consecutive usable feeds
+            that hold totalQty (two-pointer sweep).
+        '''
+        caps = [f.holdsUpTo(pkgDesc) for f in usable]
+        need = totalQty if totalQty > 0 else 1
+        runs = []
+        end = 0
+        held = 0
+        for start in range(len(usable)):
+            while end < len(usable) and held < need:
+                held += caps[end]
+                end += 1
+            if held < need:
+                break
+            runs.append(usable[start:end])
+            held -= caps[start]
+        return runs
+
+    def _candidatesFor(self, partIdx):
+        aPart = self.parts[partIdx]
+        pkgDesc = aPart.package_description
+        if pkgDesc is None:
+            return []
+        totalQty = self.totalQuantity(aPart)
+
+        cands = []
+        usableBySet = []
+        for fs in self.feed_sets.entries():
+            usable = self._usableFeeds(fs, pkgDesc)
+            if not len(usable):
+                continue
+            usableBySet.append(usable)
+            runs = [Candidate(partIdx, aPart, r, totalQty, self.travel_model)
+                        for r in self._runsIn(usable, pkgDesc, totalQty)]
+            runs.sort(key=lambda c: c.cost(self.weights))
+            cands.extend(runs[:self.max_runs_per_set])
+
+        if self.allow_splitting and not len(cands) and len(usableBySet) > 1:
+            cands.extend(self._splitCandidates(partIdx, usableBySet, totalQty))
+
+        cands.sort(key=lambda c: c.cost(self.weights))
+        return cands
+
+    def _splitCandidates(self, partIdx, usableBySet, totalQty):
+        '''
+            Nothing holds it all: spread it over sets, biggest first,
+            each contributing its nearest feeds.
+        '''
+        aPart = self.parts[partIdx]
+        pkgDesc = aPart.package_description
+        bySize = sorted(usableBySet,
+                        key=lambda u: -sum([f.holdsUpTo(pkgDesc) for f in u]))
+        feeds = []
+        held = 0
+        for usable in bySize:
+            for finfo in sorted(usable, key=lambda f: f.distance_from_centroid):
+                if held >= totalQty:
+                    break
+                feeds.append(finfo)
+                held += finfo.holdsUpTo(pkgDesc)
+
+        if held < totalQty:
+            return []
+        return [Candidate(partIdx, aPart, feeds, totalQty, self.travel_model)]
+
+    def _mixingCost(self, setPackages):
+        total = 0
+        for setId in setPackages:
+            numPkgs = len(setPackages[setId])
+            if numPkgs > 1:
+                total += numPkgs - 1
+        return total * self.weights.mixing
+
+    def planCost(self, choices):
+        '''
+            planCost(CHOICES)
+            @param choices: list, one entry per part, of a Candidate or None
+            @return: total cost
+        '''
+        cost = 0
+        setPackages = dict()
+        for setId in self.base_packages:
+            setPackages[setId] = dict(self.base_packages[setId])
+        for i in range(len(self.parts)):
+            cand = choices[i]
+            if cand is None:
+                cost += self.weights.unplaced
+                continue
+            cost += cand.cost(self.weights)
+            pkgName = package_name(cand.part)
+            for fs in cand.feed_sets:
+                if id(fs) not in setPackages:
+                    setPackages[id(fs)] = dict()
+                setPackages[id(fs)][pkgName] = True
+
+        return cost + self._mixingCost(setPackages)
+
+    def planFromFeeds(self):
+        '''
+            @return: Plan describing the current associations of self.parts,
+            e.g. after a greedy WorkspaceMapper run, to compare costs.
+            Feeds kept as they were on the machine (incremental mapping) 
+            aren't part of any plan.
+        '''
+        feedsByPart = dict()
+        for fs in self.feed_sets.entries():
+            for finfo in fs.entries():
+                if finfo.associated_part is not None and not finfo.kept:
+                    pid = id(finfo.associated_part)
+                    if pid not in feedsByPart:
+                        feedsByPart[pid] = []
+                    feedsByPart[pid].append(finfo)
+
+        choices = []
+        for i in range(len(self.parts)):
+            aPart = self.parts[i]
+            if id(aPart) not in feedsByPart or aPart.package_description is None:
+                choices.append(None)
+                continue
+            choices.append(Candidate(i, aPart, feedsByPart[id(aPart)],
+                                     self.totalQuantity(aPart), self.travel_model))
+        return Plan(choices, self.planCost(choices))
+
+    def _construct(self, order):
+        '''
+            place parts in order, each in its cheapest free candidate
+            (accounting for package mixing)
+        '''
+        choices = [None] * len(self.parts)
+        used = dict()
+        setPackages = dict()
+        for setId in self.base_packages:
+            setPackages[setId] = dict(self.base_packages[setId])
+        for i in order:
+            pkgName = package_name(self.parts[i])
+            best = None
+            bestCost = None
+            for cand in self.candidates[i]:
+                if self._conflicts(cand, used, i):
+                    continue
+                c = cand.cost(self.weights)
+                for fs in cand.feed_sets:
+                    pkgs = setPackages.get(id(fs), None)
+                    if pkgs and pkgName not in pkgs:
+                        c += self.weights.mixing
+                if bestCost is None or c < bestCost:
+                    best = cand
+                    bestCost = c
+            if best is not None:
+                self._take(best, choices, used, setPackages)
+        return choices
+
+    def _conflicts(self, cand, used, partIdx):
+        for fid in cand.feed_ids:
+            if fid in used and used[fid] != partIdx:
+                return True
+        return False
+
+    def _take(self, cand, choices, used, setPackages=None):
+        choices[cand.part_index] = cand
+        for fid in cand.feed_ids:
+            used[fid] = cand.part_index
+        if setPackages is not None:
+            pkgName = package_name(cand.part)
+            for fs in cand.feed_sets:
+                if id(fs) not in setPackages:
+                    setPackages[id(fs)] = dict()
+                setPackages[id(fs)][pkgName] = True
+
+    def _release(self, partIdx, choices, used):
+        cand = choices[partIdx]
+        if cand is None:
+            return
+        for fid in cand.feed_ids:
+            if used.get(fid) == partIdx:
+                del used[fid]
+        choices[partIdx] = None
+
+    def _usedBy(self, choices):
+        used = dict()
+        for cand in choices:
+            if cand is not None:
+                for fid in cand.feed_ids:
+                    used[fid] = cand.part_index
+        return used
+
+    def _improve(self, choices, deadline):
+        '''
+            local search: move single parts to better candidates, and
+            try to fit unplaced parts by bumping one placed part elsewhere.
+            @return: (choices, cost)
+        '''
+        bestCost = self.planCost(choices)
+        used = self._usedBy(choices)
+        improved = True
+        while improved and time.time() < deadline:
+            improved = False
+            for i in range(len(self.parts)):
+                if time.time() >= deadline:
+                    break
+                current = choices[i]
+                for cand in self.candidates[i]:
+                    if cand is current:
+                        continue
+                    blockers = set([used[fid] for fid in cand.feed_ids
+                                        if fid in used and used[fid] != i])
+                    if len(blockers) > 1:
+                        continue
+
+                    trial = list(choices)
+                    trialUsed = dict(used)
+                    self._release(i, trial, trialUsed)
+                    if len(blockers):
+                        # bump the blocker, see if it lands somewhere else
+                        j = blockers.pop()
+                        self._release(j, trial, trialUsed)
+                        self._take(cand, trial, trialUsed)
+                        for alt in self.candidates[j]:
+                            if not self._conflicts(alt, trialUsed, j):
+                                self._take(alt, trial, trialUsed)
+                                break
+                    else:
+                        self._take(cand, trial, trialUsed)
+
+                    self.num_plans_evaluated += 1
+                    trialCost = self.planCost(trial)
+                    if trialCost < bestCost - 1e-9:
+                        choices = trial
+                        used = trialUsed
+                        bestCost = trialCost
+                        current = choices[i]
+                        improved = True
+
+        return (choices, bestCost)
+
+    def solve(self, startFrom=None):
+        '''
+            solve([STARTPLAN])
+            @param startFrom: optional Plan (e.g. from planFromFeeds()) to 
+            also improve upon, so the result is never worse than it.
+            @return: the best Plan found within the time budget
+        '''
+        deadline = time.time() + self.time_budget
+        
+        best = None
+        bestCost = None
+        if startFrom is not None:
+            for cand in startFrom.choices:
+                if cand is not None and cand not in self.candidates[cand.part_index]:
+                    self.candidates[cand.part_index].append(cand)
+            best, bestCost = self._improve(list(startFrom.choices), deadline)
+
+        indices = list(range(len(self.parts)))
+        orders = [
+            # biggest first, bin-packing style
+            sorted(indices, key=lambda i: -self.totalQuantity(self.parts[i])),
+            # most constrained first
+            sorted(indices, key=lambda i: (len(self.candidates[i]),
+                                           -self.totalQuantity(self.parts[i]))),
+            # as given
+            indices
+        ]
+
+        attempt = 0
+        while time.time() < deadline or best is None:
+            if attempt < len(orders):
+                order = orders[attempt]
+            else:
+                order = list(indices)
+                self.random.shuffle(order)
+            attempt += 1
+
+            choices, cost = self._improve(self._construct(order), deadline)
+            if bestCost is None or cost < bestCost:
+                best = choices
+                bestCost = cost
+
+            if attempt >= len(orders) and len(indices) < 2:
+                break
+            if attempt >= len(orders) + 4 * len(indices):
+                # plenty of restarts, stop here
+                break
+
+        psypnp.debug.out.buffer("Assignment solver: %i orders tried, %i moves evaluated, cost %0.1f" %
+                                (attempt, self.num_plans_evaluated, bestCost))
+        return Plan(best, bestCost)
+
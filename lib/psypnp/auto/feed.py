@@ -8,20 +8,18 @@ Part of the psypnp OpenPnP scripting modules project
 
 '''
 
+import re
 import psypnp.globals
 import psypnp.csv_file
 import psypnp.debug
+import psypnp.config.distances
+import psypnp.geom
 
 from org.openpnp.model import Location
 from org.openpnp.machine.reference.feeder import ReferenceStripFeeder, ReferencePushPullFeeder
 from psypnp.auto.feedsets import FeedSet, SystemFeeds
 
 
-# TODO: FIXME hard-coded stuff here
-# name distance to consider feeds part of a set
-FeedSetNameMaxDistance = 3
-
-
 
 def feed_type_supported(aFeed):
     '''
@@ -57,34 +55,34 @@ def get_feed_location(aFeed):
     
     return None
 
-def workspace_centroid():
+def supported_feed_points():
     '''
-        workspace_centroid find a spot that is in the "middle" of all 
-        feed locations.
+        @return: (list of supported feeds that have a location, 
+                  psypnp.geom.Points of those locations, in the same order)
     '''
-    x_tot = 0
-    y_tot = 0
-    feed_count = 0
-    unit_used = None
+    feeds = []
+    locations = []
     for aFeed in psypnp.globals.machine().getFeeders():
-        
         if aFeed and feed_type_supported(aFeed):
             loc = get_feed_location(aFeed) 
             if loc is None:
                 continue
-            
-            #print(str(loc))
-            feed_count += 1
-            x_tot += loc.getX()
-            y_tot += loc.getY()
-            if unit_used is None:
-                unit_used = loc.getUnits()
-                #print(str(unit_used))
-                
-    if feed_count < 2:
+            feeds.append(aFeed)
+            locations.append(loc)
+    
+    return (feeds, psypnp.geom.from_locations(locations))
+
+def workspace_centroid():
+    '''
+        workspace_centroid find a spot that is in the "middle" of all 
+        feed locations.
+    '''
+    feeds, points = supported_feed_points()
+    if len(points) < 2:
         return None
     
-    return Location(unit_used, x_tot/feed_count, y_tot/feed_count, 0, 0)
+    cx, cy = psypnp.geom.centroid(points)
+    return Location(points.units, cx, cy, 0, 0)
             
 def feeds_by_distance():
     '''
@@ -92,46 +90,87 @@ def feeds_by_distance():
         where DISTANCE is distance from the workspace feed centroid,
         that is sorted by distance.
     '''
-    centroid = workspace_centroid()
-    retList = []
-    if centroid is None:
-        return retList
+    feeds, points = supported_feed_points()
+    if len(points) < 2:
+        return []
+    
+    dists = psypnp.geom.distances_to(points, psypnp.geom.centroid(points))
+    distList = list(zip(feeds, dists))
     
-    distList = []
-    for aFeed in psypnp.globals.machine().getFeeders():
-        #print(str(aFeed))
-        if aFeed and feed_type_supported(aFeed):
-            loc = get_feed_location(aFeed)
-            if loc is not None:
-                distList.append(  (aFeed, centroid.getLinearDistanceTo(loc) ) )
-            
     sList = sorted(distList, key=lambda tup: tup[1])
     return sList
 
+def common_prefix_length(n1, n2):
+    maxIdx = len(n1) if len(n1) < len(n2) else len(n2)
+    for i in range(maxIdx):
+        if n1[i] != n2[i]:
+            return i
+    return maxIdx
+
+def name_distance(n1, n2):
+    '''
+        Calculates the "distance" between two names, i.e. the number 
+        of characters, past their common prefix, in the longest.
+    '''
+    max_len = len(n1) if len(n1) > len(n2) else len(n2)
+    return max_len - common_prefix_length(n1, n2)
+
 def feed_name_distance(feed1, feed2):
     '''
         Calculates the "distance" between two feed names, where 
         returning 1 would mean a single letter difference, etc.
     '''
-    n1 = feed1.getName()
-    n2 = feed2.getName()
-    
-    len_1 = len(n1)
-    len_2 = len(n2)
-    max_len = len_1 if len_1 > len_2 else len_2
-    
-    for i in range(max_len):
-        if i >= len_1 or i >= len_2:
-            return max_len - i 
-        
-        if n1[i] != n2[i]:
-            return max_len - i 
+    return name_distance(feed1.getName(), feed2.getName())
+
+def group_names(names, maxDistance, prefixRegex=None):
+    '''
+        group_names(NAMES, MAXDIST, [PREFIXREGEX])
+        Clusters names: those matching prefixRegex (a compiled regex) go 
+        together by matched prefix, the rest join the group of the nearest 
+        name, in sorted order, within maxDistance of them.
         
-    return 0
+        Working from the sorted list, the only candidates for a name are 
+        the ones just before it that share at least len(name) - maxDistance
+        characters, so this is O(n log n) for any sane naming scheme.
         
+        @return: list of group ids, one per entry in names
+    '''
+    groupIds = [None] * len(names)
+    byPrefix = dict()
+    toCluster = []
+    for idx in range(len(names)):
+        m = None
+        if prefixRegex is not None:
+            m = prefixRegex.match(names[idx])
+        if m is None:
+            toCluster.append(idx)
+            continue
+        prefix = m.group(1) if m.groups() else m.group(0)
+        if prefix not in byPrefix:
+            byPrefix[prefix] = idx
+        groupIds[idx] = byPrefix[prefix]
     
-
-def feed_sets():
+    ordered = sorted(toCluster, key=lambda idx: names[idx])
+    for pos in range(len(ordered)):
+        idx = ordered[pos]
+        curName = names[idx]
+        minShared = len(curName) - maxDistance
+        groupIds[idx] = idx
+        j = pos - 1
+        while j >= 0:
+            prevName = names[ordered[j]]
+            shared = common_prefix_length(prevName, curName)
+            if shared < minShared:
+                # sorted, so won't share any more with earlier names
+                break
+            if len(prevName) - shared <= maxDistance:
+                groupIds[idx] = groupIds[ordered[j]]
+                break
+            j -= 1
+    
+    return groupIds
+    
+def feed_sets(maxDistance=None, prefixRegex=None):
     '''
         feed_sets
         Returns a SystemFeeds instance, which holds some number of 
@@ -152,30 +191,38 @@ def feed_sets():
         
         which, I would hope, is pretty self-explanatory and allows this system
         to work.
+        
+        Grouping is by name distance (see group_names()), with
+        maxDistance and prefixRegex defaulting to the FeedSetName* 
+        settings in psypnp.config.distances.
     '''
-    sysfeeds = SystemFeeds()
-    
+    if maxDistance is None:
+        maxDistance = psypnp.config.distances.FeedSetNameMaxDistance
+    if prefixRegex is None:
+        prefixRegex = psypnp.config.distances.FeedSetNamePrefixRegex
+    if prefixRegex is not None and not hasattr(prefixRegex, 'match'):
+        prefixRegex = re.compile(prefixRegex)
+        
+    feeds = []
     for aFeed in psypnp.globals.machine().getFeeders():
-        if not feed_type_supported(aFeed):
-            continue
-        psypnp.debug.out.buffer("Doing %s" % str(aFeed))
-        foundHome = False
-        for feedSet in sysfeeds.entries():
-            #print("Doing feedset %s" % setName)
-            for feed in feedSet.entries():
-                if feed_name_distance(feed, aFeed) <= FeedSetNameMaxDistance and not foundHome:
-                    psypnp.debug.out.flush("is close to %s" % str(aFeed))
-                    feedSet.append(aFeed)
-                    foundHome = True
-                    continue
+        if feed_type_supported(aFeed):
+            feeds.append(aFeed)
     
-        if not foundHome:
-            psypnp.debug.out.flush("Creating new feed set for %s" % aFeed.getName())
-            newFSet = FeedSet(aFeed.getName())
-            newFSet.append(aFeed)
-            sysfeeds.append(newFSet)
+    groupIds = group_names([f.getName() for f in feeds], maxDistance, prefixRegex)
     
+    # sets named after their first feed, in machine order, as always
+    sysfeeds = SystemFeeds()
+    setsByGroup = dict()
+    for i in range(len(feeds)):
+        aFeed = feeds[i]
+        gid = groupIds[i]
+        if gid not in setsByGroup:
+            psypnp.debug.out.debug("Creating new feed set for %s", aFeed.getName())
+            setsByGroup[gid] = FeedSet(aFeed.getName())
+            sysfeeds.append(setsByGroup[gid])
+        setsByGroup[gid].append(aFeed)
     
+    psypnp.debug.out.flush("%i feeds in %i sets" % (len(feeds), sysfeeds.numEntries()))
     return sysfeeds
                     
         
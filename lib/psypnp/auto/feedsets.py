@@ -7,10 +7,19 @@ Part of the psypnp OpenPnP scripting modules project
 @license: GPL version 3, see LICENSE file for details.
 
 '''
-import psypnp.repl
+import bisect
+import heapq
+import math
 import psypnp.debug
+from psypnp.auto.travel import distance
 
 class FeedInfo:
+    '''
+        FeedInfo -- what we know/plan for a given feed.
+        @note: the FeedSet holding this keeps track of what's available, 
+        so change state through setPart()/moveTo()/set*() rather than 
+        assigning attributes directly.
+    '''
     def __init__(self, aFeed):
         self.feed = aFeed
         self.name = aFeed.getName()
@@ -20,13 +29,41 @@ class FeedInfo:
         self.feed_description = None
         self.associated_part_maxcapacity = 0
         self.leave_unmodified = False # do not overwrite part association
+        self.kept = False # part was already in this feed, nothing to write
+        # (x, y) in mm, when using a travel model
+        self.location = None
+        # set by the owning FeedSet
+        self.feed_set = None
+        self.slot = -1
         
+    def _stateChanged(self):
+        if self.feed_set is not None:
+            self.feed_set.feedStateChanged(self)
         
     def moveTo(self, otherFeedInfo):
         otherFeedInfo.associated_part = self.associated_part
         otherFeedInfo.package_description = self.package_description
+        otherFeedInfo.kept = False
         self.associated_part = None
         self.package_description = None
+        self.kept = False
+        otherFeedInfo._stateChanged()
+        self._stateChanged()
+        
+    def setLeaveUnmodified(self, leaveIt=True):
+        self.leave_unmodified = leaveIt
+        self._stateChanged()
+        
+    def setDistanceFromCentroid(self, dist):
+        self.distance_from_centroid = dist 
+        self._stateChanged()
+        
+    def setLocation(self, xy):
+        self.location = xy
+        
+    def setFeedDescription(self, feedDesc):
+        self.feed_description = feedDesc
+        self._stateChanged()
         
     def getName(self):
         return self.name 
@@ -61,14 +98,14 @@ class FeedInfo:
         
     def holdsUpTo(self, aPackageDesc):
         if self.feed_description is None:
-            psypnp.debug.out.buffer('holdsUpTo() [%s] -- no feed desc??' % str(self))
+            psypnp.debug.out.warning('holdsUpTo() [%s] -- no feed desc??', self)
             return 0
         
         return self.feed_description.holdsUpTo(aPackageDesc)
     
     def canCarry(self, aPackageDesc):
         if self.feed_description is None:
-            psypnp.debug.out.buffer('canCarry()[%s]-- no feed desc??' % str(self))
+            psypnp.debug.out.warning('canCarry()[%s]-- no feed desc??', self)
             return False
         return self.feed_description.canCarry(aPackageDesc)
     
@@ -78,6 +115,17 @@ class FeedInfo:
         self.associated_part = aPartInfo
         self.package_description = packageDesc
         self.associated_part_maxcapacity = self.holdsUpTo(packageDesc)
+        self.kept = False
+        self._stateChanged()
+        
+    def keepPart(self, aPartInfo, packageDesc):
+        '''
+            keepPart(PARTINFO, PKGDESC)
+            like setPart(), for a part that's already in this feed on the 
+            machine: the feed is reserved, but apply() leaves it be.
+        '''
+        self.setPart(aPartInfo, packageDesc)
+        self.kept = True
         
     def getCurrentMachineFeedAssociatedPart(self):
         return self.feed.getPart()
@@ -90,11 +138,95 @@ class FeedInfo:
     
 
 class FeedSet:
-    
+    '''
+        FeedSet -- a group of feeds, by name.
+        
+        Keeps the feeds in the order they were added (self.feeds) and, 
+        maintained as they're added/removed, sorted by name 
+        (sorted_names/sorted_feeds), so entries() and lookups by 
+        position don't need to sort anything.
+        
+        Availability is tracked as feeds change (see feedStateChanged()):
+          - counts of available feeds, overall and per feed description, 
+            so capacity checks needn't look at every feed;
+          - a bitmap of free slots (bit i <=> self.feeds[i]);
+          - a min-heap of available feeds by distance from centroid, for
+            findNearestAvailableFeed().
+    '''
     def __init__(self, name):
         self.name = name
         self.feeds = []
         self.feed_by_name = dict()
+        # parallel lists, ordered by name
+        self.sorted_names = []
+        self.sorted_feeds = []
+        self._resetAvailability()
+        
+    def _resetAvailability(self):
+        self.num_available = 0
+        self.free_slots = 0
+        # feed desc name -> [feed desc, num available feeds using it]
+        self.available_by_desc = dict()
+        # (distance, slot, seq, feedinfo), stale entries dropped lazily
+        self.nearest_heap = []
+        self._heap_seq = 0
+        # slot -> (available, feed desc) as last counted
+        self._slot_state = []
+        
+    def _reindex(self):
+        self._resetAvailability()
+        for i in range(len(self.feeds)):
+            self.feeds[i].slot = i
+            self._slot_state.append((False, None))
+            self.feedStateChanged(self.feeds[i])
+        
+    def feedStateChanged(self, finfo):
+        '''
+            feedStateChanged(FEEDINFO)
+            Called by the FeedInfo when its part, description, distance
+            etc change, to keep counts/bitmap/heap up to date.
+        '''
+        slot = finfo.slot
+        wasAvailable, oldDesc = self._slot_state[slot]
+        isAvailable = finfo.available()
+        newDesc = finfo.feed_description
+        
+        if wasAvailable:
+            self.num_available -= 1
+            self.free_slots &= ~(1 << slot)
+            if oldDesc is not None:
+                self.available_by_desc[oldDesc.name][1] -= 1
+                if self.available_by_desc[oldDesc.name][1] <= 0:
+                    del self.available_by_desc[oldDesc.name]
+        
+        if isAvailable:
+            self.num_available += 1
+            self.free_slots |= (1 << slot)
+            if newDesc is not None:
+                if newDesc.name not in self.available_by_desc:
+                    self.available_by_desc[newDesc.name] = [newDesc, 0]
+                self.available_by_desc[newDesc.name][1] += 1
+            self._heap_seq += 1
+            heapq.heappush(self.nearest_heap, (finfo.distance_from_centroid, slot, 
+                                               self._heap_seq, finfo))
+            
+        self._slot_state[slot] = (isAvailable, newDesc)
+        
+    def _heapEntryValid(self, entry):
+        finfo = entry[3]
+        return finfo.slot == entry[1] and finfo.available() \
+                and finfo.distance_from_centroid == entry[0] \
+                and self.feeds[entry[1]] is finfo
+        
+    def _singleAvailableDesc(self):
+        '''
+            @return: the feed description of all available (described) 
+            feeds, if they all share one, else None
+        '''
+        if len(self.available_by_desc) != 1:
+            return None 
+        for descName in self.available_by_desc:
+            return self.available_by_desc[descName]
         
         
     def findByName(self, feedname):
@@ -103,17 +235,35 @@ class FeedSet:
         
         return None
     
+    def indexOf(self, feedname):
+        '''
+            @return: position of feedname in entries(), -1 if not here.
+        '''
+        idx = bisect.bisect_left(self.sorted_names, feedname)
+        if idx < len(self.sorted_names) and self.sorted_names[idx] == feedname:
+            return idx 
+        return -1
+    
     def remove(self, feedObj):
         if feedObj.name in self.feed_by_name:
             del self.feed_by_name[feedObj.name] 
             newFeeds = []
             for f in self.feeds:
                 if f.name == feedObj.name:
-                    psypnp.debug.out.buffer("Removing feed %s" % feedObj.name)
+                    psypnp.debug.out.debug("Removing feed %s", feedObj.name)
                 else:
                     newFeeds.append(f)
             
             self.feeds = newFeeds
+            
+            startIdx = bisect.bisect_left(self.sorted_names, feedObj.name)
+            endIdx = bisect.bisect_right(self.sorted_names, feedObj.name)
+            # new lists, rather than del, in case someone's iterating over entries()
+            self.sorted_names = self.sorted_names[:startIdx] + self.sorted_names[endIdx:]
+            self.sorted_feeds = self.sorted_feeds[:startIdx] + self.sorted_feeds[endIdx:]
+            
+            feedObj.feed_set = None
+            self._reindex()
     
     def packagesInsertedStats(self):
         pkgs = dict()
@@ -193,12 +343,12 @@ class FeedSet:
         if numNeeded <= 1:
             return [feedinfo]
         
-        feedNames = sorted(list(self.feed_by_name.keys()))
-        seedFeedIndex = feedNames.index(feedinfo.name)
+        feedNames = self.sorted_names
+        seedFeedIndex = self.indexOf(feedinfo.name)
 
-        psypnp.debug.out.buffer("Getting neighbours for feed")
+        psypnp.debug.out.debug("Getting neighbours for feed")
         while seedFeedIndex > 0 and (seedFeedIndex + numNeeded) > len(feedNames):
-            psypnp.debug.out.buffer("backup!")
+            psypnp.debug.out.debug("backup!")
             seedFeedIndex -= 1
         
         if seedFeedIndex < 0:
@@ -213,12 +363,9 @@ class FeedSet:
         numAdded = 0
         last_index_added = 0
         while i < endIdx and i < len(feedNames):
-            fname = feedNames[i]
-            
-                
-            if fname in self.feed_by_name and self.feed_by_name[fname].available():
-                # psypnp.debug.out.flush("Found neighbour %s" % fname)
-                retList.append(self.feed_by_name[fname])
+            if self.sorted_feeds[i].available():
+                # psypnp.debug.out.flush("Found neighbour %s" % feedNames[i])
+                retList.append(self.sorted_feeds[i])
                 numAdded += 1
                 last_index_added = i
                 
@@ -226,14 +373,14 @@ class FeedSet:
             i += 1
         
         if numAdded >= numNeeded:
-            psypnp.debug.out.buffer("Have all needed")
+            psypnp.debug.out.debug("Have all needed")
         else:
-            psypnp.debug.out.buffer("need to add a few more")
+            psypnp.debug.out.debug("need to add a few more")
             i = last_index_added
             while i >= 0 and  i<len(feedNames) and numAdded < numNeeded:
-                if self.feed_by_name[feedNames[i]].available():
-                    psypnp.debug.out.buffer("Adding %s" % feedNames[i])
-                    retList.append(self.feed_by_name[feedNames[i]])
+                if self.sorted_feeds[i].available():
+                    psypnp.debug.out.debug("Adding %s", feedNames[i])
+                    retList.append(self.sorted_feeds[i])
                     numAdded += 1
                 i -= 1
             
@@ -244,6 +391,10 @@ class FeedSet:
     
     def spacePerFeedFor(self, ofPackage):
         # note: assumes all feeds in set are same size
+        descCount = self._singleAvailableDesc()
+        if descCount is not None:
+            return descCount[0].holdsUpTo(ofPackage)
+        
         for finfo in self.feeds:
             if not finfo.available():
                 continue 
@@ -258,17 +409,11 @@ class FeedSet:
     
     def holdsUpTo(self, ofPackage):
         total = 0
-        for finfo in self.feeds:
-            if not finfo.available():
-                continue 
-            if not finfo.canCarry(ofPackage):
-                continue
-            can_hold = finfo.holdsUpTo(ofPackage)
-            
+        for descName in self.available_by_desc:
+            fdesc, numAvail = self.available_by_desc[descName]
+            can_hold = fdesc.holdsUpTo(ofPackage)
             if can_hold > 0:
-                #psypnp.debug.out.buffer('feed %s says can hold %i' 
-                #                        % (str(finfo), can_hold))
-                total += can_hold 
+                total += can_hold * numAvail
         
         return total
         
@@ -280,6 +425,19 @@ class FeedSet:
                 CAN carry ALL numunits; or
               * 0/false
         '''
+        descCount = self._singleAvailableDesc()
+        if descCount is not None:
+            can_hold = descCount[0].holdsUpTo(ofPackage)
+            if can_hold <= 0:
+                return 0
+            num_feeds_required = 1
+            if numunits > 0:
+                num_feeds_required = int(math.ceil(float(numunits) / can_hold))
+            if num_feeds_required <= descCount[1]:
+                return num_feeds_required
+            return 0
+        
+        # a mix of feed types, go through them in order
         space_needed = numunits
         num_feeds_required = 0
         for finfo in self.feeds:
@@ -296,33 +454,84 @@ class FeedSet:
         
         return 0 
             
-    def findNearestAvailableFeed(self, restrictToEnabledFeeds=False):
+    def findNearestAvailableFeed(self, restrictToEnabledFeeds=False, nearTo=None):
+        '''
+            findNearestAvailableFeed([RESTRICTTOENABLED], [NEARTO])
+            @param nearTo: (x, y) to measure from (e.g. a part's placement 
+                           centroid), rather than distance_from_centroid
+            @return: closest available FeedInfo, None if none available
+        '''
+        if nearTo is not None:
+            found = self._findNearestAvailableTo(nearTo, restrictToEnabledFeeds)
+            if found is not None:
+                return found
+            # no locations known, fall back to centroid distance
+            
         # psypnp.debug.out.buffer("findNearestAvailableFeed for %s..." % str(self))
-        min_dist_feed = None
-        for finfo in self.feeds:
-            if finfo.available() and ((not restrictToEnabledFeeds) or finfo.isEnabled()):
-                #psypnp.debug.out.buffer("%s avail!" % finfo.name)
-                if min_dist_feed is None or finfo.distance_from_centroid < min_dist_feed.distance_from_centroid:
-                    min_dist_feed = finfo
-                
+        heap = self.nearest_heap
+        while len(heap) and not self._heapEntryValid(heap[0]):
+            heapq.heappop(heap)
+            
+        if not len(heap):
+            return None
+        
+        if not restrictToEnabledFeeds or heap[0][3].isEnabled():
+            return heap[0][3]
+        
+        # walk the heap, best first, without disturbing it
+        toVisit = [(heap[0], 0)]
+        while len(toVisit):
+            entry, idx = heapq.heappop(toVisit)
+            if self._heapEntryValid(entry) and entry[3].isEnabled():
+                return entry[3]
+            for child in (2*idx + 1, 2*idx + 2):
+                if child < len(heap):
+                    heapq.heappush(toVisit, (heap[child], child))
         
+        return None
         
-        return min_dist_feed
+    def _findNearestAvailableTo(self, nearTo, restrictToEnabledFeeds):
+        best = None
+        bestDist = None
+        free = self.free_slots
+        slot = 0
+        while free:
+            lowBit = free & -free
+            skip = lowBit.bit_length() - 1
+            slot += skip
+            free >>= skip
+            finfo = self.feeds[slot]
+            if finfo.location is not None and \
+              ((not restrictToEnabledFeeds) or finfo.isEnabled()):
+                dist = distance(finfo.location, nearTo)
+                if bestDist is None or dist < bestDist:
+                    best = finfo
+                    bestDist = dist
+            slot += 1
+            free >>= 1
+        return best
         
     def _nextFeedInUse(self, startingAt):
         
+        allSlots = (1 << self.numEntries()) - 1
+        inUse = (allSlots & ~self.free_slots) >> (startingAt + 1)
         i = startingAt + 1
-        while i < self.numEntries():
-            if not self.feeds[i].available():
-                # this may be it
-                if not self.feeds[i].leave_unmodified:
-                    return self.feeds[i]
+        while inUse:
+            # skip straight to the next slot in use
+            lowBit = inUse & -inUse
+            skip = lowBit.bit_length() - 1
+            i += skip
+            inUse >>= skip
+            # this may be it, unless it's staying put
+            if not (self.feeds[i].leave_unmodified or self.feeds[i].kept):
+                return self.feeds[i]
             i += 1
+            inUse >>= 1
         
         return None 
     
     def compress(self):
-        psypnp.debug.out.buffer("Compressing feedset %s" % self.name)
+        psypnp.debug.out.debug("Compressing feedset %s", self.name)
         if not self.numEntriesReserved():
             psypnp.debug.out.flush("but nothing here.")
             return 
@@ -340,7 +549,7 @@ class FeedSet:
             # feed i is available... find next in use
             nextFeedInUse = self._nextFeedInUse(i)
             if nextFeedInUse is not None:
-                psypnp.debug.out.buffer("Moving feed into slot %i" % i)
+                psypnp.debug.out.debug("Moving feed into slot %i", i)
                 nextFeedInUse.moveTo(self.feeds[i])
             
             i += 1
@@ -350,30 +559,32 @@ class FeedSet:
     def append(self, aFeed):
         finfo = FeedInfo(aFeed)
         self.feed_by_name[finfo.name] = finfo
+        finfo.feed_set = self
+        finfo.slot = len(self.feeds)
         self.feeds.append(finfo)
+        self._slot_state.append((False, None))
+        self.feedStateChanged(finfo)
+        
+        idx = bisect.bisect_right(self.sorted_names, finfo.name)
+        self.sorted_names.insert(idx, finfo.name)
+        self.sorted_feeds = self.sorted_feeds[:idx] + [finfo] + self.sorted_feeds[idx:]
         
     def entries(self):
-        return sorted(self.feeds, key=lambda finfo: finfo.name)
+        '''
+            @return: the FeedInfos, sorted by name. 
+            @note: this is the set's own list, don't modify it.
+        '''
+        return self.sorted_feeds
     
     def numEntries(self):
         return len(self.feeds)
     
     def numEntriesAvailable(self):
-        num_avail = 0
-        for finfo in self.feeds:
-            if finfo.available():
-                num_avail += 1
-                
-        return num_avail
+        return self.num_available
         
     
     def numEntriesReserved(self):
-        num_res = 0
-        for finfo in self.feeds:
-            if not finfo.available():
-                num_res += 1
-                
-        return num_res
+        return self.numEntries() - self.num_available
 
     def __string__(self):
         return '%s (%i)' % (self.name, self.numEntries())
@@ -442,6 +653,7 @@ class SystemFeeds:
     
 if __name__ == "__main__":
     # debugging assist... just run this module on command line
+    import psypnp.repl
     
     v = psypnp.repl.getStandardEnvVars()
     v['SystemFeeds'] = SystemFeeds
@@ -0,0 +1,268 @@
+'''
+Created on Oct 17, 2026
+
+Feeder planning for several projects (BOMs) run back-to-back.
+
+Mapping each BOM on its own reshuffles the feeders at every changeover.
+The MultiProjectPlanner instead:
+  1) finds the parts used by more than one project and maps those
+     first, into fixed feeds, with room for the largest batch any of
+     the projects needs;
+  2) then, for each project in turn, maps its remaining parts into
+     the feeds left over (every project gets the same leftovers, as
+     its own parts are swapped in at changeover).
+
+and reports, per project, the changeover cost: the number of strips
+to load to go from the previous project's layout (or, for the first,
+from what's on the machine now) to this one.
+
+  planner = MultiProjectPlanner(wspace, [(projA, 4), (projB, 10)])
+  planner.plan()
+  print(planner.report())
+  planner.apply(1) # set up the feeders for projB
+
+Mapping itself is done by the WorkspaceMapper, so the usual
+user_config autofeedsetup_* settings (strategy, incremental...) apply.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import psypnp.debug
+import psypnp.auto.assignment
+from psypnp.auto.workspace import WorkspaceMapper
+
+
+class SharedPart:
+    '''
+        SharedPart -- a part used by several projects.  Looks like a
+        ProjectPart whose quantity() is the largest batch (qty per board
+        x boards) any of those projects needs.
+    '''
+    def __init__(self, projPart, totalQty, numProjects):
+        self.project_part = projPart
+        self.bom_entry = projPart.bom_entry
+        self.part = projPart.part
+        self.package_description = projPart.package_description
+        self.total_quantity = totalQty
+        self.num_projects = numProjects
+
+    def quantity(self):
+        return self.total_quantity
+
+    def getValue(self):
+        return self.project_part.getValue()
+
+    def getId(self):
+        return self.project_part.getId()
+
+    def __repr__(self):
+        return '<SharedPart %s (%i in %i projects)>' % (self.getId(),
+                                                        self.total_quantity,
+                                                        self.num_projects)
+
+
+class PartList:
+    def __init__(self, parts):
+        self.parts = parts
+
+
+class PlanningProject:
+    '''
+        PlanningProject -- stand-in for a Project, with a given list of
+        parts, to hand to the WorkspaceMapper for one planning step.
+    '''
+    def __init__(self, name, parts):
+        self.name = name
+        self.part_map = PartList(parts)
+
+    def isOK(self):
+        return True
+
+    def __repr__(self):
+        return '<PlanningProject %s (%i parts)>' % (self.name, len(self.part_map.parts))
+
+
+class ProjectLayout:
+    '''
+        ProjectLayout -- the feeder layout planned for one project.
+    '''
+    def __init__(self, project, numBoards, assignments, feedState, numUnplaced):
+        self.project = project
+        self.num_boards = numBoards
+        # feed name -> part id
+        self.assignments = assignments
+        # psypnp.auto.assignment.snapshot_feeds() of the layout, for apply()
+        self.feed_state = feedState
+        self.num_unplaced = numUnplaced
+        # strips to load, coming from the previous layout
+        self.changeover = 0
+
+    def numFeeds(self):
+        return len(self.assignments)
+
+    def summary(self):
+        msg = '%s (%i boards): %i feeds, %i strips to swap' % (self.project.name,
+                                                              self.num_boards,
+                                                              self.numFeeds(),
+                                                              self.changeover)
+        if self.num_unplaced:
+            msg += ', %i parts unplaced' % self.num_unplaced
+        return msg
+
+    def __repr__(self):
+        return '<ProjectLayout %s>' % self.summary()
+
+
+class MultiProjectPlanner:
+    '''
+        MultiProjectPlanner -- one feeder layout for several projects,
+        common parts in fixed feeds.
+    '''
+    def __init__(self, wspace, projectBatches):
+        '''
+            @param wspace: a psypnp.project.workspace.Workspace, with
+            setProject() already called (e.g. on the first project) so
+            feeds have their descriptions
+            @param projectBatches: list of (Project, number of boards),
+            in the order they'll be run
+        '''
+        self.workspace = wspace
+        self.batches = projectBatches
+        self.mapper = WorkspaceMapper(wspace)
+        self.shared_parts = []
+        self.num_shared_placed = 0
+        self.layouts = []
+
+    def isReady(self):
+        return len(self.batches) > 0 and self.mapper.isReady()
+
+    def findSharedParts(self):
+        '''
+            @return: list of SharedPart, for parts used by more than one project,
+                     most shared and biggest batches first.
+        '''
+        # part id -> [(project part, total qty)], in project order
+        usage = dict()
+        for proj, numBoards in self.batches:
+            for projPart in proj.part_map.parts:
+                pid = projPart.getId()
+                if pid not in usage:
+                    usage[pid] = []
+                usage[pid].append((projPart, projPart.quantity() * numBoards))
+
+        shared = []
+        for pid in usage:
+            if len(usage[pid]) < 2:
+                continue
+            shared.append(SharedPart(usage[pid][0][0],
+                                     max([u[1] for u in usage[pid]]),
+                                     len(usage[pid])))
+
+        shared.sort(key=lambda sp: (-sp.num_projects, -sp.quantity(), sp.getId()))
+        return shared
+
+    def _feedInfos(self):
+        for fs in self.mapper.feed_sets.entries():
+            for finfo in fs.entries():
+                yield finfo
+
+    def _machineAssignments(self):
+        assignments = dict()
+        for finfo in self._feedInfos():
+            curPart = finfo.getCurrentMachineFeedAssociatedPart()
+            if curPart is not None:
+                assignments[finfo.name] = curPart.getId()
+        return assignments
+
+    def _plannedAssignments(self):
+        assignments = dict()
+        for finfo in self._feedInfos():
+            if finfo.associated_part is not None:
+                assignments[finfo.name] = finfo.associated_part.getId()
+        return assignments
+
+    def _mapParts(self, name, parts, numBoards):
+        if not len(parts):
+            return
+        self.workspace.project = PlanningProject(name, parts)
+        self.mapper.map(numBoards)
+
+    def plan(self):
+        '''
+            Work out the shared feeds and each project's layout.  Feeds
+            are left as they were, see apply().
+            @return: list of ProjectLayout, in project order
+        '''
+        assign = psypnp.auto.assignment
+        wspace = self.workspace
+        origProject = wspace.project
+        startState = assign.snapshot_feeds(self.mapper.feed_sets)
+
+        for proj, numBoards in self.batches:
+            wspace.describeParts(proj)
+
+        # fixed feeds, for parts used by more than one project
+        self.shared_parts = self.findSharedParts()
+        psypnp.debug.out.flush("Multi-project: %i parts shared between %i projects" %
+                               (len(self.shared_parts), len(self.batches)))
+        self._mapParts('shared', self.shared_parts, 1)
+        sharedState = assign.snapshot_feeds(self.mapper.feed_sets)
+        placedParts = dict()
+        for pid in self._plannedAssignments().values():
+            placedParts[pid] = True
+        self.num_shared_placed = len(placedParts)
+
+        # then each project's own parts (and any shared that didn't fit)
+        # in whatever's left
+        self.layouts = []
+        feedContents = self._machineAssignments()
+        for proj, numBoards in self.batches:
+            assign.restore_feeds(sharedState)
+            rest = [pp for pp in proj.part_map.parts if pp.getId() not in placedParts]
+            self._mapParts(proj.name, rest, numBoards)
+
+            layout = ProjectLayout(proj, numBoards, self._plannedAssignments(),
+                                   assign.snapshot_feeds(self.mapper.feed_sets),
+                                   self.mapper.numUnassociated() if len(rest) else 0)
+            for fname in layout.assignments:
+                if feedContents.get(fname) != layout.assignments[fname]:
+                    layout.changeover += 1
+                    # strips not needed stay where they are
+                    feedContents[fname] = layout.assignments[fname]
+
+            psypnp.debug.out.flush("Multi-project: %s" % layout.summary())
+            self.layouts.append(layout)
+
+        assign.restore_feeds(startState)
+        wspace.project = origProject
+        return self.layouts
+
+    def totalChangeover(self):
+        return sum([l.changeover for l in self.layouts])
+
+    def report(self):
+        lines = ['%i of %i shared parts in fixed feeds' % (self.num_shared_placed,
+                                                          len(self.shared_parts))]
+        for layout in self.layouts:
+            lines.append(layout.summary())
+        lines.append('Total strips to swap: %i' % self.totalChangeover())
+        return '\n'.join(lines)
+
+    def apply(self, layoutIdx, dryRun=False):
+        '''
+            apply(LAYOUTINDEX, [DRYRUN])
+            set up the feeders for the project at layoutIdx (in the
+            order given to the planner).
+            @return: the ChangePlan (see FeedManager.apply())
+        '''
+        psypnp.auto.assignment.restore_feeds(self.layouts[layoutIdx].feed_state)
+        return self.workspace.feeds.apply(dryRun)
+
+    def __repr__(self):
+        return '<MultiProjectPlanner %i projects>' % len(self.batches)
+
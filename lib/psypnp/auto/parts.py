@@ -60,7 +60,7 @@ class PartMap:
     def __init__(self, bom_filename, BOMParserType):
 
         psypnp.debug.out.buffer("PartMap c'tor, creating BOM CSV")
-        self.bom_csv = psypnp.csv_file.BOMCSV(bom_filename, BOMParserType)
+        self.bom_csv = psypnp.csv_file.cached_bom(bom_filename, BOMParserType)
         psypnp.debug.out.flush("CSV parsed")
     
     
@@ -84,7 +84,7 @@ class PartMap:
         psypnp.debug.out.buffer("Parts map() called:")
         for apart in psypnp.globals.config().getParts():
             try:
-                psypnp.debug.out.buffer("%s, " % str(apart.getId()))
+                psypnp.debug.out.debug("%s, ", apart.getId())
             except Exception as e:
                 psypnp.debug.out.flush("Woah, weird part ID %s" % str(e))
 
@@ -99,7 +99,7 @@ class PartMap:
             if openpnpName in self._parts_map:
                 success_count += 1
                 
-                psypnp.debug.out.buffer("Found %s, " % openpnpName)
+                psypnp.debug.out.debug("Found %s, ", openpnpName)
                 self.parts.append(ProjectPart(bomEntry, self._parts_map[openpnpName]))
             else:
                 psypnp.debug.out.flush()
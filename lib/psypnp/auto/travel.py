@@ -0,0 +1,177 @@
+'''
+Created on Oct 17, 2026
+
+Pick travel cost model, based on where parts actually get placed.
+
+The feeder centroid (auto.feed.workspace_centroid()) says nothing
+about the boards: a high-volume part is best fed from the slot that's
+closest to where its placements are.  The TravelModel holds the
+placement locations for each part in the job and gives
+
+  - the placement centroid, per part and overall;
+  - the expected head travel for a pick from a given feed location:
+    distance feed -> part placement centroid, x picks per board
+    x number of boards.
+
+  model = psypnp.auto.travel.from_job()
+  wspace.setTravelModel(model)
+
+after which feed distances are relative to the placement centroid,
+and the WorkspaceMapper looks for the slots nearest each part's own
+placements.
+
+Locations are (x, y) tuples, in mm.  Apart from from_job() and
+location_xy(), nothing openpnp-specific in here.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import math
+
+import psypnp.debug
+
+def distance(xy1, xy2):
+    return math.hypot(xy1[0] - xy2[0], xy1[1] - xy2[1])
+
+def location_xy(loc):
+    '''
+        @return: (x, y) tuple, in mm, for an openpnp Location (or None)
+    '''
+    if loc is None:
+        return None
+    try:
+        from org.openpnp.model import LengthUnit
+        loc = loc.convertToUnits(LengthUnit.Millimeters)
+    except Exception:
+        # stand-ins and such, take it as is
+        pass
+    return (loc.getX(), loc.getY())
+
+def board_placement_xy(bloc, aplacement):
+    '''
+        @return: (x, y) machine coordinates, in mm, of aplacement on the
+                 board at BoardLocation bloc
+    '''
+    try:
+        from org.openpnp.util import Utils2D
+        loc = Utils2D.calculateBoardPlacementLocation(bloc, aplacement.getLocation())
+    except ImportError:
+        loc = bloc.getLocation().add(aplacement.getLocation())
+    return location_xy(loc)
+
+class TravelModel:
+    '''
+        TravelModel -- placement locations, by part id.
+    '''
+    def __init__(self):
+        self.placements = dict()
+        self._centroids = dict()
+        self._centroid = None
+        self.num_boards_in_job = 1
+
+    def addPlacement(self, partId, xy):
+        if partId not in self.placements:
+            self.placements[partId] = []
+        self.placements[partId].append(xy)
+        # placement changed, centroids stale
+        self._centroids = dict()
+        self._centroid = None
+
+    def numPlacements(self, partId=None):
+        if partId is None:
+            return sum([len(p) for p in self.placements.values()])
+        if partId not in self.placements:
+            return 0
+        return len(self.placements[partId])
+
+    def isEmpty(self):
+        return not len(self.placements)
+
+    def centroid(self):
+        '''
+            @return: (x, y) centroid of all placements (so weighted by
+                     quantity), None if we have none.
+        '''
+        if self._centroid is None and not self.isEmpty():
+            xTot = 0.0
+            yTot = 0.0
+            count = 0
+            for partId in self.placements:
+                for xy in self.placements[partId]:
+                    xTot += xy[0]
+                    yTot += xy[1]
+                    count += 1
+            self._centroid = (xTot / count, yTot / count)
+        return self._centroid
+
+    def partCentroid(self, partId):
+        '''
+            @return: (x, y) centroid of partId's placements, or the
+                     overall centroid if we don't know about it.
+        '''
+        if partId not in self.placements:
+            return self.centroid()
+
+        if partId not in self._centroids:
+            pl = self.placements[partId]
+            self._centroids[partId] = (sum([xy[0] for xy in pl]) / len(pl),
+                                       sum([xy[1] for xy in pl]) / len(pl))
+        return self._centroids[partId]
+
+    def travelPerPick(self, feedXY, partId):
+        '''
+            @return: distance from feed to partId's placement centroid
+                     (0 if we know nothing)
+        '''
+        target = self.partCentroid(partId)
+        if target is None or feedXY is None:
+            return 0
+        return distance(feedXY, target)
+
+    def expectedTravel(self, feedXY, partId, quantityPerBoard, numBoards=1):
+        '''
+            @return: expected (one-way) head travel to place quantityPerBoard
+                     partId on each of numBoards boards, picking from feedXY
+        '''
+        return self.travelPerPick(feedXY, partId) * quantityPerBoard * numBoards
+
+    def __repr__(self):
+        return '<TravelModel %i parts, %i placements>' % (len(self.placements),
+                                                          self.numPlacements())
+
+
+def from_job(job=None):
+    '''
+        from_job([JOB])
+        @return: TravelModel for the placements in job (the one
+                 currently loaded, by default).  Fiducials are skipped.
+    '''
+    import psypnp.globals
+    from org.openpnp.model.Placement import Type as PlacementType
+
+    if job is None:
+        job = psypnp.globals.gui().jobTab.getJob()
+
+    model = TravelModel()
+    numBoards = 0
+    for bloc in job.getBoardLocations():
+        if hasattr(bloc, 'isEnabled') and not bloc.isEnabled():
+            continue
+        numBoards += 1
+        for aplacement in bloc.getBoard().getPlacements():
+            if aplacement.getType() == PlacementType.Fiducial:
+                continue
+            prt = aplacement.getPart()
+            if prt is None:
+                continue
+            model.addPlacement(prt.getId(), board_placement_xy(bloc, aplacement))
+
+    model.num_boards_in_job = numBoards if numBoards else 1
+    psypnp.debug.out.buffer("Travel model from job: %s" % str(model))
+    return model
+
@@ -8,7 +8,9 @@ Part of the psypnp OpenPnP scripting modules project
 
 '''
 import psypnp.debug 
+import psypnp.profile
 import psypnp.user_config as user_prefs
+import psypnp.auto.assignment
 import math
 
 class FeedSelectionDetails:
@@ -60,11 +62,37 @@ class WorkspaceMapper:
         self.map_parts_to_preset_feeders = user_prefs.autofeedsetup_map_parts_to_preset_feeders # if a part is used in proj, and already mapped to feeder, leave it be 
         self.leave_already_assoc_feeds_untouched = user_prefs.autofeedsetup_leave_already_assoc_feeds_untouched # leave all non "fiducial" or "home" feeders untouched
         self.restrict_to_enabled_feeders = user_prefs.autofeedsetup_restrict_to_enabled_feeders # only use feeders manually enabled
+        self.mapping_strategy = user_prefs.autofeedsetup_mapping_strategy # 'greedy' or 'optimal'
+        self.optimal_time_budget = user_prefs.autofeedsetup_optimal_time_budget
+        self.incremental = user_prefs.autofeedsetup_incremental # keep parts where they are on the machine, map only the rest
+        self.cost_weights = psypnp.auto.assignment.CostWeights()
+        # set by map(strategy='optimal'): greedy and optimal plan costs, and which was used
+        self.last_costs = None
+        # set by map(incremental=True): what was kept/added/resized, see keepCurrentAssignments()
+        self.last_diff = None
     
     
     def numUnassociated(self):
         return self.num_unplaced
                     
+    def travelModel(self):
+        '''
+            @return: the workspace's TravelModel, if it has one with placements
+        '''
+        model = getattr(self.workspace, 'travel_model', None)
+        if model is None or model.isEmpty():
+            return None
+        return model
+    
+    def placementTarget(self, projPart):
+        '''
+            @return: (x, y) centroid of projPart's placements, or None
+        '''
+        model = self.travelModel()
+        if model is None:
+            return None
+        return model.partCentroid(projPart.getId())
+    
     def isReady(self):
         # to be ready, we need the workspace to be so and for it to 
         # have a project associated
@@ -88,14 +116,22 @@ class WorkspaceMapper:
         feedSel.dump()
         
     def find_feedset_for(self, projPart, inqty):
-        psypnp.debug.out.buffer("Searching for feedset for %s" % str(projPart))
+        psypnp.debug.out.debug("Searching for feedset for %s", projPart)
         
         numPrefSets = 0 # keep track of if _any_ sets already prefer this type
         feedsetSelDetails = []
+        travelModel = self.travelModel()
+        target = self.placementTarget(projPart)
         for feedSet in self.feed_sets.entries():
-            closestFeedInThisSet = feedSet.findNearestAvailableFeed(self.restrict_to_enabled_feeders)
+            closestFeedInThisSet = feedSet.findNearestAvailableFeed(self.restrict_to_enabled_feeders, 
+                                                                    target)
             if closestFeedInThisSet is None:
                 continue
+            distance = closestFeedInThisSet.distance_from_centroid
+            if travelModel is not None and closestFeedInThisSet.location is not None:
+                # expected travel for the batch, from the closest slot
+                distance = travelModel.expectedTravel(closestFeedInThisSet.location, 
+                                                      projPart.getId(), inqty)
             # only count sets that actually have space for us
             numSlotsTaken = feedSet.numFeedsFor(inqty, 
                                                 projPart.package_description)
@@ -106,7 +142,7 @@ class WorkspaceMapper:
                 # ok, can accept this part by eating up numSlotsTaken
                 feedsetSelDetails.append(FeedSelectionDetails(feedSet, 
                                     statedPref,
-                                    closestFeedInThisSet.distance_from_centroid, 
+                                    distance, 
                                     inqty,
                                     numSlotsTaken, 
                                     feedSet.spacePerFeedFor(
@@ -186,8 +222,8 @@ class WorkspaceMapper:
                 
         # prefer empties
         if len(feedSetsEmpty):
-            psypnp.debug.out.buffer("have empty feedset for our %i slots, using that" 
-                                    % feedSetsEmpty[0].numSlots)
+            psypnp.debug.out.debug("have empty feedset for our %i slots, using that",
+                                   feedSetsEmpty[0].numSlots)
             return feedSetsEmpty[0].feedSet 
         
         self.outputFSSearchDebug('No empties', projPart, feedSetsWithSameNumberSlots[0])
@@ -266,7 +302,7 @@ class WorkspaceMapper:
         # psypnp.debug.out.flush(str(feedSetsByPriority))
         numPartsMapped = 0
         totalFeedsReserved = 0
-        psypnp.debug.out.buffer("\nSplit over multi-feedsets: %s\n" % str(projPart))
+        psypnp.debug.out.debug("\nSplit over multi-feedsets: %s\n", projPart)
         
         for aFeedSetInfo in feedSetsByPriority:
             numComponentsSetCanCarry = aFeedSetInfo[2] # give feedset everything it can handle
@@ -276,8 +312,8 @@ class WorkspaceMapper:
             if toReserve > numComponentsSetCanCarry:
                 toReserve = numComponentsSetCanCarry
             
-            psypnp.debug.out.buffer("Split: trying to reserve %i in %s" % 
-                                    (toReserve, targetFeedset))
+            psypnp.debug.out.debug("Split: trying to reserve %i in %s",
+                                   toReserve, targetFeedset)
             numFeedsReserved = self.mapPartToFeedset(targetFeedset, projPart, 
                                                      toReserve)
             if not numFeedsReserved:
@@ -308,7 +344,7 @@ class WorkspaceMapper:
         '''
         # have space! get the nearest available feed from this set
         num_associated = 0
-        closestFeed = feedset.findNearestAvailableFeed()
+        closestFeed = feedset.findNearestAvailableFeed(False, self.placementTarget(partToAssoc))
         if closestFeed is None:
             psypnp.debug.out.flush("Have space but NO closest feed???")
             self.num_unplaced += 1
@@ -335,12 +371,84 @@ class WorkspaceMapper:
             # reserve them all by calling setPart on them
             for feedToReserve in neighbourFeeds:
                 num_associated += 1
-                psypnp.debug.out.buffer("Reserving feed %s for part %s" % (str(feedToReserve), 
-                                                                           str(partToAssoc)))
+                psypnp.debug.out.debug("Reserving feed %s for part %s", feedToReserve,
+                                       partToAssoc)
                 feedToReserve.setPart(partToAssoc, partToAssoc.package_description)
         
         return num_associated
-    def map(self, num_boards=4):
+    @psypnp.profile.timed('WorkspaceMapper.keepCurrentAssignments')
+    def keepCurrentAssignments(self, parts, num_boards):
+        '''
+            keepCurrentAssignments
+            Incremental mapping: compare the project parts to what's in the
+            feeders on the machine.  Feeders already holding a part they can 
+            carry keep it (FeedInfo.keepPart(), so apply() leaves them be), 
+            feeders holding parts no longer in the project are freed up.
+            
+            @return: (list of parts left to map, dict of part id -> quantity 
+                     to place) for parts that are new, or that need more 
+                     room than their current feeders have.
+        '''
+        # machine part id -> feeds that have it
+        machineFeeds = dict()
+        for feedset in self.feed_sets.entries():
+            for feeder in feedset.entries():
+                if not feeder.available():
+                    continue
+                if self.restrict_to_enabled_feeders and not feeder.isEnabled():
+                    continue
+                curPart = feeder.getCurrentMachineFeedAssociatedPart()
+                if curPart is None:
+                    continue
+                pid = curPart.getId()
+                if pid not in machineFeeds:
+                    machineFeeds[pid] = []
+                machineFeeds[pid].append(feeder)
+        
+        diff = dict(kept=0, added=0, resized=0, feeds_kept=0, feeds_freed=0)
+        partsLeftToMap = []
+        quantities = dict()
+        for projPart in parts:
+            pid = projPart.getId()
+            pkgDesc = projPart.package_description
+            totalQty = projPart.quantity() * num_boards
+            
+            capacity = 0
+            if pkgDesc is not None and pid in machineFeeds:
+                for feeder in machineFeeds[pid]:
+                    if not feeder.holdsUpTo(pkgDesc):
+                        # e.g. package changed, no longer fits
+                        continue
+                    feeder.keepPart(projPart, pkgDesc)
+                    capacity += feeder.associated_part_maxcapacity
+                    diff['feeds_kept'] += 1
+            
+            if not capacity:
+                psypnp.debug.out.buffer('Incremental: new part %s' % str(projPart))
+                diff['added'] += 1
+                partsLeftToMap.append(projPart)
+            elif capacity < totalQty:
+                psypnp.debug.out.buffer('Incremental: %s needs room for %i more' % 
+                                        (str(projPart), totalQty - capacity))
+                diff['resized'] += 1
+                quantities[pid] = totalQty - capacity
+                partsLeftToMap.append(projPart)
+            else:
+                diff['kept'] += 1
+        
+        for pid in machineFeeds:
+            for feeder in machineFeeds[pid]:
+                if feeder.available():
+                    diff['feeds_freed'] += 1
+        
+        self.last_diff = diff
+        psypnp.debug.out.flush("Incremental: %i parts kept in place (%i feeds), %i new, %i resized, %i feeds freed" % 
+                               (diff['kept'] + diff['resized'], diff['feeds_kept'], 
+                                diff['added'], diff['resized'], diff['feeds_freed']))
+        return (partsLeftToMap, quantities)
+    
+    @psypnp.profile.timed('WorkspaceMapper.map')
+    def map(self, num_boards=4, strategy=None, incremental=None):
         '''
             For each part that we've mapped, 
             try to locate a feedset that will have enough feeds that accept to hold
@@ -349,7 +457,22 @@ class WorkspaceMapper:
             to the workspace centroid) and as many neighbours as needed to hold 
             num_boards worth of parts.
             
+            @param strategy: 'greedy' does the above, part by part; 'optimal' 
+            also runs the global solver (psypnp.auto.assignment) and keeps 
+            whichever plan is cheaper, see last_costs.  Defaults to 
+            the user_config autofeedsetup_mapping_strategy.
+            @param incremental: keep parts that are already in suitable 
+            feeders on the machine where they are, and only map new parts 
+            (or the extra quantity of those that grew), see 
+            keepCurrentAssignments().  Defaults to the user_config 
+            autofeedsetup_incremental.
+            
         '''
+        if strategy is None:
+            strategy = self.mapping_strategy
+        if incremental is None:
+            incremental = self.incremental
+        
         if not self.isReady():
             psypnp.debug.out.flush("Not READY to map()")
             return 
@@ -370,7 +493,12 @@ class WorkspaceMapper:
         #    existing feeder, and move on
         
         partsLeftToMap = []
-        if not self.map_parts_to_preset_feeders:
+        quantities = None
+        self.last_diff = None
+        if incremental:
+            partsLeftToMap, quantities = self.keepCurrentAssignments(part_map.parts, num_boards)
+            num_associated += self.last_diff['feeds_kept']
+        elif not self.map_parts_to_preset_feeders:
             partsLeftToMap = part_map.parts # all parts un-mapped to feeders so far
         else:
             psypnp.debug.out.buffer('Want to leave current part assocs untouched... searching')
@@ -380,12 +508,12 @@ class WorkspaceMapper:
                     if partWasSetup:
                         continue 
                     for feeder in feedset.entries():
-                        if partWasSetup:
+                        if partWasSetup or not feeder.available():
                             continue
                         curPart = feeder.getCurrentMachineFeedAssociatedPart()
                         if curPart is not None:
                             if curPart == projPart.part:
-                                psypnp.debug.out.buffer("Found part %s already in feeder" % str(projPart))
+                                psypnp.debug.out.debug("Found part %s already in feeder", projPart)
                                 partWasSetup = True 
                                 
                                 # apart.quantity() * num_boards
@@ -428,13 +556,79 @@ class WorkspaceMapper:
                     if pName.find('fiduc') >= 0 or pName.find('home') >=0:
                         continue 
                     psypnp.debug.out.buffer("Forcing leave-unmodified on feeder %s" % str((feeder)))
-                    feeder.leave_unmodified = True 
+                    feeder.setLeaveUnmodified(True)
                 
             
-        
-        for apart in partsLeftToMap:
+        if strategy == 'optimal':
+            num_associated += self.mapOptimal(partsLeftToMap, num_boards, quantities)
+        else:
+            num_associated += self.mapGreedy(partsLeftToMap, num_boards, quantities)
+            
+        psypnp.debug.out.flush("Mapping is done.")
+        return num_associated
+    
+    @psypnp.profile.timed('WorkspaceMapper.mapOptimal')
+    def mapOptimal(self, partsToMap, num_boards, quantities=None):
+        '''
+            mapOptimal
+            Map partsToMap both greedily and using the global assignment 
+            solver, keep the cheaper plan (as per self.cost_weights).
+            @param quantities: optional dict of part id -> total quantity, 
+            for parts that need other than quantity() x num_boards
+            @return: number of feeds associated
+        '''
+        assign = psypnp.auto.assignment
+        solver = assign.AssignmentSolver(self.feed_sets, partsToMap, num_boards,
+                                         self.cost_weights, 
+                                         self.optimal_time_budget,
+                                         self.restrict_to_enabled_feeders,
+                                         self.allow_part_spreading,
+                                         travelModel=self.travelModel(),
+                                         quantities=quantities)
+        
+        startState = assign.snapshot_feeds(self.feed_sets)
+        startUnplaced = self.num_unplaced
+        
+        greedyAssociated = self.mapGreedy(partsToMap, num_boards, quantities)
+        greedyPlan = solver.planFromFeeds()
+        greedyUnplaced = self.num_unplaced
+        greedyState = assign.snapshot_feeds(self.feed_sets)
+        
+        assign.restore_feeds(startState)
+        plan = solver.solve(greedyPlan)
+        
+        self.last_costs = dict(greedy=greedyPlan.cost, 
+                               optimal=plan.cost,
+                               delta=plan.cost - greedyPlan.cost,
+                               strategy='optimal')
+        psypnp.debug.out.flush("Optimal plan cost %0.1f vs greedy %0.1f (delta %0.1f), %i vs %i unplaced" % 
+                               (plan.cost, greedyPlan.cost, self.last_costs['delta'],
+                                plan.numUnplaced(), greedyPlan.numUnplaced()))
+        
+        if plan.cost >= greedyPlan.cost:
+            # no better, stick with what we had
+            psypnp.debug.out.flush("Keeping greedy plan")
+            assign.restore_feeds(greedyState)
+            self.num_unplaced = greedyUnplaced
+            self.last_costs['strategy'] = 'greedy'
+            return greedyAssociated
+        
+        self.num_unplaced = startUnplaced + plan.numUnplaced()
+        return plan.apply()
+        
+    @psypnp.profile.timed('WorkspaceMapper.mapGreedy')
+    def mapGreedy(self, partsToMap, num_boards, quantities=None):
+        '''
+            mapGreedy
+            Map each part in turn to the best feedset for it, at that point.
+            @param quantities: optional dict of part id -> total quantity, 
+            for parts that need other than quantity() x num_boards
+            @return: number of feeds associated
+        '''
+        num_associated = 0
+        for apart in partsToMap:
             #psypnp.debug.out.crumb('map')
-            psypnp.debug.out.buffer("Attempting to map part %s" % str(apart))
+            psypnp.debug.out.debug("Attempting to map part %s", apart)
             if apart.package_description is None:
                 psypnp.debug.out.flush("Can't place part (%s) -- no package associated" % str(apart))
                 continue
@@ -443,6 +637,8 @@ class WorkspaceMapper:
             # find a feedset that can carry the load of whatever 
             # the total quantity is for a batch
             total_qty = apart.quantity() * num_boards
+            if quantities is not None and apart.getId() in quantities:
+                total_qty = quantities[apart.getId()]
             
             # magic happens in find_feedset_for (above)
             feedset = self.find_feedset_for(apart, total_qty)
@@ -453,8 +649,8 @@ class WorkspaceMapper:
                 # don't have space in single feed...
                 if self.allow_part_spreading:
                     # but we can try split feeders
-                    psypnp.debug.out.buffer("Split: No single feedset can hold %i of %s, trying spread\n" 
-                                            % (total_qty, str(apart)))
+                    psypnp.debug.out.debug("Split: No single feedset can hold %i of %s, trying spread\n",
+                                           total_qty, apart)
                     
                     num_spread_slots = self.mapPartToSplitFeedsets(apart, total_qty)
                     
@@ -463,24 +659,24 @@ class WorkspaceMapper:
                         num_associated += num_spread_slots
                     else:
                         psypnp.debug.out.flush("\n")
-                        psypnp.debug.out.buffer("NO SPACE for %s\n" % str(apart))
+                        psypnp.debug.out.warning("NO SPACE for %s\n", apart)
                         self.num_unplaced += 1
                 else: # no space and no part spreading... too bad.
                     psypnp.debug.out.flush("\n")
-                    psypnp.debug.out.buffer("NO SPACE for %s\n" % str(apart))
+                    psypnp.debug.out.warning("NO SPACE for %s\n", apart)
                     self.num_unplaced += 1
             
-            
-
-        psypnp.debug.out.flush("Mapping is done.")
         return num_associated
     
     def compress(self):
         # get rid of empty spaces between occupied feeds
         self.feed_sets.compress()
         
-    def apply(self):
-        self.workspace.feeds.apply()
+    def apply(self, dryRun=False):
+        '''
+            @return: the ChangePlan (see FeedManager.apply())
+        '''
+        return self.workspace.feeds.apply(dryRun)
         
     
     def dump(self):
@@ -9,3 +9,7 @@ Part of the psypnp OpenPnP scripting modules project
 @license: GPL version 3, see LICENSE file for details.
 
 '''
+import sys
+import psypnp
+
+psypnp.lazy_submodules(sys.modules[__name__], ['distances', 'files', 'storagekeys'])
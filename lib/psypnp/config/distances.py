@@ -13,3 +13,12 @@ Part of the psypnp OpenPnP scripting modules project
 '''
 
 SmallFeedDefault = 85
+
+# feed set grouping (see psypnp.auto.feed.feed_sets()):
+# feeds whose names differ by at most FeedSetNameMaxDistance trailing 
+# characters (e.g. 8mmRight_01 and 8mmRight_02) go in the same set
+FeedSetNameMaxDistance = 3
+# optionally, a regex: feeds whose names match are grouped by the 
+# match (group 1, if the regex has a group), e.g. r'^(.+?)_?\d+$' 
+# puts 8mmRight_01...8mmRight_120 in one set.  None to disable.
+FeedSetNamePrefixRegex = None
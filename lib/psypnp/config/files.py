@@ -1,7 +1,7 @@
 '''
 Created on Oct 17, 2020
 
-Holds file name of interest.
+Holds file name of interest, and related settings.
 
 @see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
 
@@ -13,3 +13,25 @@ Part of the psypnp OpenPnP scripting modules project
 
 '''
 NVStoreDb = 'data/psystore.db'
+# sharded NV storage, one file per parent key (psystore.db gets 
+# migrated in here on first use)
+NVStoreDir = 'data/psystore.d'
+# sqlite NV storage db, used when NVStoreBackend is 'sqlite'
+NVStoreSQLiteDb = 'data/psystore.sqlite'
+
+# NV storage backend to use, one of:
+#  'sharded': one pickle file per parent key, in NVStoreDir (default)
+#  'pickle':  everything in one pickle file, NVStoreDb
+#  'sqlite':  sqlite db NVStoreSQLiteDb (needs sqlite3 module, so 
+#             not available under jython--falls back to 'sharded')
+NVStoreBackend = 'sharded'
+
+# NV storage changes are written behind, this many seconds after the
+# first unsaved change (0 to write immediately, as in the old days)
+NVStoreWriteDelay = 1.0
+
+# parsed CSVs (package/feed descriptions, BOMs) are cached, keyed on 
+# file path, size and mtime.  Up to CSVCacheMaxEntries are kept in 
+# memory and, if CSVCacheDir is set (None to disable), on disk too.
+CSVCacheDir = 'data/csvcache.d'
+CSVCacheMaxEntries = 16
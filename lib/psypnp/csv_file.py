@@ -14,11 +14,44 @@ Part of the psypnp OpenPnP scripting modules project
 
 '''
 
+import os
 import csv as csv_module
-import psypnp.repl
+from collections import OrderedDict
 import psypnp.debug
+import psypnp.config.files
+from psypnp.nvstore.base import atomic_write, pickle_load_file, pickle_dumps
+from psypnp.matcher import SubstringMatcher
 
 
+def compile_row_converter(convertersList):
+    '''
+        compile_row_converter(CONVERTERS)
+        Turns a list of per-column converters (None entries ignored) 
+        into a single function that converts a whole row, so the 
+        per-column lookups happen once rather than for every cell.
+        @return: function(row) -> converted row (a new list)
+    '''
+    if convertersList is None:
+        convertersList = []
+        
+    columnConverters = []
+    for i in range(len(convertersList)):
+        if convertersList[i]:
+            columnConverters.append((i, convertersList[i]))
+    
+    if not len(columnConverters):
+        return list
+    
+    def convertRow(aRow):
+        retRow = list(aRow)
+        numCols = len(retRow)
+        for colConv in columnConverters:
+            if colConv[0] < numCols:
+                retRow[colConv[0]] = colConv[1](retRow[colConv[0]])
+        return retRow
+    
+    return convertRow
+
 
 class CSVFile:
     ''' 
@@ -27,12 +60,20 @@ class CSVFile:
     
     This class is used by the more specific csv file readers, below, by composition so we
     can avoid dealing with the various python2/3 issues related to super()/inheritance.
+    
+    By default, all rows are read in on construction.  With streaming=True, nothing
+    is held in memory: rows are read from the file on each pass through rows(), 
+    convertedRows() or processEachRow().
     '''
     def __init__(self, filepath, delimiter=',', 
-                 ignoreCommentedFirstLine=True):
+                 ignoreCommentedFirstLine=True,
+                 streaming=False):
         self.success = False 
         self.delimiter = delimiter
         self.filename = filepath
+        self.ignore_commented_first_line = ignoreCommentedFirstLine
+        self.streaming = streaming
+        self.num_rows_seen = 0
         
         self._contents = []
         try:
@@ -44,30 +85,74 @@ class CSVFile:
         if f is None or not f:
             return
         
+        if streaming:
+            # we'll know if there's anything in there on the first pass
+            f.close()
+            self.success = True 
+            return 
         
         try:
-            rdr = csv_module.reader(f, delimiter=delimiter)
+            for aline in self._rowsFrom(f):
+                self._contents.append(aline)
         except:
             print("Issue reading csv %s " % filepath)
-            return 
-        
-        for aline in rdr:
-            if aline and len(aline):
-                if len(self._contents) == 0 \
-                  and ignoreCommentedFirstLine:
-                    hashsearch = aline[0].find('#')
-                    if hashsearch >= 0 and hashsearch < 2:
-                        ignoreCommentedFirstLine = False
-                    else:
-                        self._contents.append(aline)
-                else:
-                    self._contents.append(aline)
+            
         if len(self._contents):
             self.success = True
             
         f.close()
         
+    def _rowsFrom(self, f):
+        checkFirstLine = self.ignore_commented_first_line
+        for aline in csv_module.reader(f, delimiter=self.delimiter):
+            if not aline or not len(aline):
+                continue
+            if checkFirstLine:
+                checkFirstLine = False
+                hashsearch = aline[0].find('#')
+                if hashsearch >= 0 and hashsearch < 2:
+                    continue 
+            yield aline
+        
+    def rows(self):
+        '''
+            generator for the (raw) rows of the CSV.
+        '''
+        if not self.streaming:
+            for aline in self._contents:
+                yield aline
+            return 
+        
+        try:
+            f = open(self.filename, 'r')
+        except:
+            print("Can't open %s " % self.filename)
+            self.success = False
+            return 
+        
+        numSeen = 0
+        try:
+            for aline in self._rowsFrom(f):
+                numSeen += 1
+                yield aline
+        finally:
+            f.close()
+        
+        self.num_rows_seen = numSeen
+        self.success = numSeen > 0
+        
+    def convertedRows(self, converters=None):
+        '''
+            generator for the rows of the CSV, each processed 
+            through the converters (see processThroughConverters())
+        '''
+        convertRow = compile_row_converter(converters)
+        for aline in self.rows():
+            yield convertRow(aline)
+        
     def numRows(self):
+        if self.streaming:
+            return self.num_rows_seen
         return len(self._contents)
             
             
@@ -119,9 +204,12 @@ class CSVFile:
             callback, after processing through any converter 
             functions provided.
         '''
-        for anEntry in self._contents:
-            if converters is not None and len(converters):
-                anEntry = self.processThroughConverters(anEntry, converters)
+        if converters is None or not len(converters):
+            for anEntry in self.rows():
+                throughCallback(anEntry)
+            return 
+        
+        for anEntry in self.convertedRows(converters):
             throughCallback(anEntry)
 
 
@@ -148,10 +236,11 @@ class PackageDescCSV:
         # package,    width,     pitch,    tape type (black|white|clear)
     '''
     def __init__(self, filepath, delimiter=',', 
-                 ignoreCommentedFirstLine=True):
-        self.csv = CSVFile(filepath, delimiter, ignoreCommentedFirstLine)
+                 ignoreCommentedFirstLine=True, streaming=True):
+        self.csv = CSVFile(filepath, delimiter, ignoreCommentedFirstLine, streaming)
         
         self.packages = dict()
+        self._matcher = None
         converters = [
             None, 
             self.csv.convertToInt,
@@ -179,14 +268,31 @@ class PackageDescCSV:
     
     
     
-    def findFor(self, bomEntry):
-        full_package = bomEntry.package
+    def matcher(self):
+        '''
+            @return: SubstringMatcher over package names, built on first use.
+        '''
+        if self._matcher is None:
+            self._matcher = SubstringMatcher()
+            for pkgName in self.packages:
+                self._matcher.add(pkgName, self.packages[pkgName])
+        return self._matcher
+    
+    def findForPackageId(self, full_package):
+        '''
+            findForPackageId(FOOTPRINT/PACKAGE ID)
+            @return: the description with the longest name found 
+                     in full_package (so C_0402_HD beats 0402), or None
+        '''
         if full_package is None or not len(full_package):
             return None
-        for pkg in self.entries():
-            if full_package.find(pkg.name) >= 0:
-                return pkg
-        return None
+        found = self.matcher().best(full_package)
+        if found is None:
+            return None
+        return found[1]
+    
+    def findFor(self, bomEntry):
+        return self.findForPackageId(bomEntry.package)
             
     def __string__(self):
         return 'description from "%s" with %i packages' % (
@@ -250,11 +356,12 @@ class FeedDescCSV:
        width is width of tape supported, length is physical length for strip.
     '''
     def __init__(self, filepath, delimiter=',', 
-                 ignoreCommentedFirstLine=True):
+                 ignoreCommentedFirstLine=True, streaming=True):
         psypnp.debug.out.buffer('Opening feed desc file %s' % filepath)
-        self.csv = CSVFile(filepath, delimiter, ignoreCommentedFirstLine)
+        self.csv = CSVFile(filepath, delimiter, ignoreCommentedFirstLine, streaming)
         
         self.feeds = dict()
+        self._matcher = None
         converters = [
             None, 
             self.csv.convertToInt,
@@ -306,6 +413,29 @@ class FeedDescCSV:
         
         return availableFeeds
     
+    def matcher(self):
+        '''
+            @return: SubstringMatcher over (enabled) feed description 
+                     names, built on first use.
+        '''
+        if self._matcher is None:
+            self._matcher = SubstringMatcher()
+            for feedName in self.feeds:
+                self._matcher.add(feedName, self.feeds[feedName])
+        return self._matcher
+    
+    def findForFeederName(self, feederName):
+        '''
+            findForFeederName(NAME)
+            @return: (description, [other matching descriptions]), where
+                     description is the one with the longest name found 
+                     in feederName (None if none match).
+        '''
+        found = self.matcher().matches(feederName)
+        if not len(found):
+            return (None, [])
+        return (found[0].object, [m.object for m in found[1:]])
+    
     def entries(self):
         return [self.feeds[i] for i in self.feeds]
     
@@ -378,16 +508,17 @@ class BOMParserBase(object):
                  convertersList,
                  columnMap,
                  delimiter=',', 
-                 ignoreCommentedFirstLine=True):
+                 ignoreCommentedFirstLine=True,
+                 streaming=True):
         
         self.columnMap = columnMap
-        self.csv = CSVFile(filepath, delimiter, ignoreCommentedFirstLine)
+        self.csv = CSVFile(filepath, delimiter, ignoreCommentedFirstLine, streaming)
         
-        self.success = self.csv.success
         self.entries = []
         if self.csv.success:
             self.csv.processEachRow(self.parseBOMEntries, convertersList)   
             self.postProcessEntries()
+        self.success = self.csv.success
             
     def postProcessEntries(self):
         pass 
@@ -455,7 +586,160 @@ class BOMCSV:
         return '<BOMCSV %s>' % self.__string__()
     
 
+
+# bump when parsed objects change shape, so stale disk caches are ignored
+ParsedCacheVersion = 3
+
+class ParsedCSVCache:
+    '''
+        ParsedCSVCache
+        Memoizes parsed CSV objects (PackageDescCSV, FeedDescCSV, BOMCSV...)
+        keyed on (type, path, size, mtime, args), so re-running auto setup
+        on unchanged files skips parsing entirely.
+        
+        Keeps the maxEntries most recently used in memory and, if a 
+        cacheDir is given, a pickled copy of each on disk.
+        
+        Cached objects are shared: treat them as read-only.
+    '''
+    def __init__(self, maxEntries=16, cacheDir=None):
+        self.max_entries = maxEntries
+        self.cache_dir = cacheDir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+    def stats(self):
+        '''
+            @return: dict of hits (memory or disk), disk_hits, misses and 
+            number of entries in memory
+        '''
+        return dict(hits=self.hits, disk_hits=self.disk_hits, 
+                    misses=self.misses, entries=len(self.entries))
+        
+    def clear(self, includingDisk=False):
+        self.entries = OrderedDict()
+        if not includingDisk or not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return 
+        for fname in os.listdir(self.cache_dir):
+            if fname.endswith('.pkl'):
+                os.remove(os.path.join(self.cache_dir, fname))
+        
+    def keyFor(self, csvType, filepath, args=()):
+        '''
+            @return: cache key for filepath parsed by csvType, or None 
+            if the file can't be stat'ed
+        '''
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return (ParsedCacheVersion, csvType.__module__, csvType.__name__,
+                os.path.abspath(filepath), st.st_size, st.st_mtime, 
+                tuple(args))
+        
+    def diskFilename(self, key):
+        if not self.cache_dir:
+            return None
+        # one file per (type, path, args): the size and mtime (key[4:6]),
+        # like the version, are left out of the name and checked against
+        # the key saved inside, so a changed file replaces its old entry.
+        # only needed with a disk cache, so only imported then
+        import hashlib
+        digest = hashlib.md5(repr((key[1:4], key[6])).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, '%s.pkl' % digest)
+        
+    def get(self, csvType, filepath, *args):
+        '''
+            get(CSVTYPE, FILEPATH, [ARGS...])
+            @return: CSVTYPE(FILEPATH, ARGS...), from the cache if the
+            file hasn't changed since it was last parsed.
+        '''
+        key = self.keyFor(csvType, filepath, args)
+        if key is None:
+            # no such file... let the parser complain about it
+            self.misses += 1
+            return csvType(filepath, *args)
+        
+        if key in self.entries:
+            self.hits += 1
+            parsed = self.entries.pop(key)
+            self.entries[key] = parsed # now most recent
+            return parsed
+        
+        parsed = self._loadFromDisk(key)
+        if parsed is not None:
+            self.hits += 1
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            parsed = csvType(filepath, *args)
+            if not parsed.isOK():
+                # don't hang on to failures
+                return parsed
+            self._saveToDisk(key, parsed)
+            
+        self.entries[key] = parsed 
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            
+        return parsed
+    
+    def _loadFromDisk(self, key):
+        fpath = self.diskFilename(key)
+        if fpath is None or not os.path.exists(fpath):
+            return None
+        
+        loaded = pickle_load_file(fpath)
+        if loaded is None or not isinstance(loaded, dict) or loaded.get('key') != key:
+            return None
+        return loaded['parsed']
+    
+    def _saveToDisk(self, key, parsed):
+        fpath = self.diskFilename(key)
+        if fpath is None:
+            return 
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            atomic_write(fpath, pickle_dumps(dict(key=key, parsed=parsed)))
+        except Exception as ex:
+            # just a cache, carry on without it
+            psypnp.debug.out.flush("CSV cache: could not save %s: %s" % (fpath, str(ex)))
+
+
+_ParsedCache = None
+def parsed_cache():
+    '''
+        @return: the shared ParsedCSVCache, set up from config.files
+    '''
+    global _ParsedCache
+    if _ParsedCache is None:
+        cacheDir = None
+        if psypnp.config.files.CSVCacheDir:
+            # globals needs openpnp, only pull it in when we need it
+            from psypnp.globals import fullpathFromRelative
+            cacheDir = fullpathFromRelative(psypnp.config.files.CSVCacheDir)
+        _ParsedCache = ParsedCSVCache(psypnp.config.files.CSVCacheMaxEntries, 
+                                      cacheDir)
+    return _ParsedCache
+
+def cache_stats():
+    return parsed_cache().stats()
+
+def cached_package_desc(filepath):
+    return parsed_cache().get(PackageDescCSV, filepath)
+
+def cached_feed_desc(filepath):
+    return parsed_cache().get(FeedDescCSV, filepath)
+
+def cached_bom(filepath, bomParserType):
+    return parsed_cache().get(BOMCSV, filepath, bomParserType)
+
+
 if __name__ == "__main__":
+    import psypnp.repl
     # debugging assist... just run this module on command line
     from psypnp.project.bom_parsers import BOMParserKicad
     bom_csv = BOMCSV("/tmp/bom.csv", BOMParserKicad)
@@ -13,6 +13,17 @@ and then
   psypnp.debug.out.flush("D") 
 or
   psypnp.debug.out.flush() 
+
+Output is level-gated: buffer()/flush() messages are at INFO, and 
+  psypnp.debug.out.debug("Reserving %s for %s", feed, part)
+  psypnp.debug.out.warning("No space for %s", part)
+take %-style arguments that are only formatted if that level is on, 
+so calls in hot loops cost next to nothing when quiet:
+  psypnp.debug.out.setLevel(psypnp.debug.WARNING)
+(default from user_config debug_output_level).
+
+Buffered text is kept as a list of pieces (a ring of at most 
+MaxBufferedEntries, oldest dropped first) and only joined on flush.
   
 @see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
 
@@ -22,6 +33,26 @@ Part of the psypnp OpenPnP scripting modules project
 @license: GPL version 3, see LICENSE file for details.
 '''
 
+from collections import deque
+
+import psypnp.user_config as user_prefs
+
+ERROR = 40
+WARNING = 30
+INFO = 20
+DEBUG = 10
+VERBOSE = 5
+
+LevelsByName = dict(error=ERROR, warning=WARNING, info=INFO, 
+                    debug=DEBUG, verbose=VERBOSE)
+
+# pieces kept between flushes, past that the oldest are dropped
+MaxBufferedEntries = 4096
+
+def level_from_name(name, defaultLevel=DEBUG):
+    if name is None:
+        return defaultLevel
+    return LevelsByName.get(str(name).lower(), defaultLevel)
 
 class DebugOptPane:
     def __init__(self):
@@ -65,13 +96,28 @@ class DebugOut:
     '''
     
     def __init__(self):
-        self.outbuf = ''
-        self.enabled = True # disable actual print() calls with this
+        self.outbuf = deque(maxlen=MaxBufferedEntries)
+        self.outbuf_len = 0 # chars in outbuf
+        self.num_dropped = 0 # pieces that fell off the ring since last flush
+        self.enabled = True # disable output (and formatting) with this
+        self.level = level_from_name(getattr(user_prefs, 'debug_output_level', None))
         self.forceAutoFlush = False # useful when crashing, to output all buffer() immediately
         self.is_verbose = False
         self.crumbs = dict()
         self.maxlinelen = 80
         
+    def setLevel(self, level):
+        '''
+            setLevel(LEVEL)
+            level is one of the module levels (ERROR, WARNING...) or its name
+        '''
+        if not isinstance(level, int):
+            level = level_from_name(level, self.level)
+        self.level = level
+        
+    def isEnabledFor(self, level):
+        return self.enabled and level >= self.level
+        
     def crumb(self, name):
         if name in self.crumbs:
             self.crumbs[name] += 1
@@ -88,26 +134,64 @@ class DebugOut:
         self.crumbs = dict()
             
     
+    def _append(self, text):
+        if len(self.outbuf) == self.outbuf.maxlen:
+            self.outbuf_len -= len(self.outbuf[0])
+            self.num_dropped += 1
+        self.outbuf.append(text)
+        self.outbuf_len += len(text)
+        
+        if self.forceAutoFlush or self.outbuf_len >= self.maxlinelen:
+            self.flush()
+    
+    def log(self, level, msg, *args):
+        '''
+            log(LEVEL, MSG, [ARGS...])
+            buffer msg % args, if level is enabled (otherwise, nothing 
+            is formatted at all).
+        '''
+        if not self.isEnabledFor(level):
+            return
+        if len(args):
+            msg = msg % args
+        self._append(str(msg) + "\n")
+        
+    def error(self, msg, *args):
+        self.log(ERROR, msg, *args)
+        
+    def warning(self, msg, *args):
+        self.log(WARNING, msg, *args)
+        
+    def info(self, msg, *args):
+        self.log(INFO, msg, *args)
+        
+    def debug(self, msg, *args):
+        self.log(DEBUG, msg, *args)
+    
     def buffer(self, msg, autoEnter=True):
+        if not self.isEnabledFor(INFO):
+            return
         
         if autoEnter:
-            self.outbuf += str(msg) + "\n"
+            self._append(str(msg) + "\n")
         else:
-            self.outbuf += str(msg)
-            
-        if self.forceAutoFlush or len(self.outbuf) >= self.maxlinelen:
-            self.flush()
+            self._append(str(msg))
             
     def verbose(self, msg, autoEnter=True):
-        if self.is_verbose:
+        if self.is_verbose or self.level <= VERBOSE:
             self.buffer(msg, autoEnter)
             
     def flush(self, extrastr=None):
         if extrastr is not None:
             self.buffer(extrastr)
-        if self.enabled:
-            print(self.outbuf)
-        self.outbuf = ''
+        # when quiet, don't spew blank lines for every flush()
+        if self.enabled and (len(self.outbuf) or self.isEnabledFor(INFO)):
+            if self.num_dropped:
+                print("(... %i debug entries dropped)" % self.num_dropped)
+            print(''.join(self.outbuf))
+        self.outbuf.clear()
+        self.outbuf_len = 0
+        self.num_dropped = 0
         
         
             
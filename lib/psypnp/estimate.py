@@ -0,0 +1,400 @@
+'''
+Created on Oct 17, 2026
+
+Job cycle time estimates, from the feeder layout and the placements on
+the selected boards.
+
+Before running a job, this gives an idea of what a feeder layout will
+cost: total XY travel, Z moves, nozzle tip changes and bottom vision
+passes and, using the axis speed/acceleration profiles, an estimate of
+the seconds per board.  Handy to compare auto_feed_setup outcomes:
+
+  est = psypnp.estimate.estimate_selected_boards()
+  print(est.summary())
+
+The model is simple, one pick-and-place at a time, in job order, with
+placements grouped by nozzle tip (as the job planner does, to avoid
+swapping tips back and forth):
+  - XY move to the feed (the nearest one, for parts in many feeds);
+  - Z down and up, pick dwell;
+  - XY move over the bottom camera and a vision pass, if the part
+    has bottom vision enabled;
+  - XY move to the placement;
+  - Z down and up, place dwell.
+X and Y move simultaneously so an XY move takes as long as the slower
+axis.  Each axis accelerates to its max speed (if it gets there) and
+decelerates on arrival (trapezoidal profile).
+
+Apart from estimate_selected_boards() and its helpers, which gather
+things from openpnp, nothing openpnp-specific in here.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import math
+
+import psypnp.debug
+import psypnp.user_config as user_prefs
+from psypnp.auto.travel import distance, location_xy, board_placement_xy
+
+
+class AxisProfile:
+    '''
+        AxisProfile -- max speed (mm/s) and acceleration (mm/s^2)
+        for an axis.
+    '''
+    def __init__(self, maxSpeed, accel):
+        self.max_speed = float(maxSpeed)
+        self.accel = float(accel)
+
+    def moveTime(self, dist):
+        '''
+            @return: seconds to move dist mm, from standstill to standstill
+        '''
+        dist = abs(dist)
+        if dist <= 0:
+            return 0.0
+        if self.accel <= 0:
+            return dist / self.max_speed
+
+        # distance used up getting to max speed and back down to 0
+        rampDist = self.max_speed * self.max_speed / self.accel
+        if dist >= rampDist:
+            return (2.0 * self.max_speed / self.accel) + \
+                   ((dist - rampDist) / self.max_speed)
+
+        # never reaches max speed: accelerate half way, decelerate the rest
+        return 2.0 * math.sqrt(dist / self.accel)
+
+    def __repr__(self):
+        return '<AxisProfile %.0fmm/s %.0fmm/s2>' % (self.max_speed, self.accel)
+
+
+class MotionProfile:
+    '''
+        MotionProfile -- axis profiles and the fixed costs of picking,
+        placing, changing tips and bottom vision.
+    '''
+    def __init__(self, xAxis, yAxis, zAxis, zTravel=15.0,
+                 pickDwell=0.0, placeDwell=0.0,
+                 tipChangeTime=0.0, visionTime=0.0):
+        self.x = xAxis
+        self.y = yAxis
+        self.z = zAxis
+        self.z_travel = zTravel
+        self.pick_dwell = pickDwell
+        self.place_dwell = placeDwell
+        self.tip_change_time = tipChangeTime
+        self.vision_time = visionTime
+
+    def xyMoveTime(self, fromXY, toXY):
+        return max(self.x.moveTime(toXY[0] - fromXY[0]),
+                   self.y.moveTime(toXY[1] - fromXY[1]))
+
+    def zMoveTime(self):
+        '''
+            @return: seconds for one Z move (down, or up)
+        '''
+        return self.z.moveTime(self.z_travel)
+
+
+def default_profile():
+    '''
+        @return: MotionProfile from the estimate_* settings in user_config
+    '''
+    return MotionProfile(AxisProfile(*user_prefs.estimate_axis_x),
+                         AxisProfile(*user_prefs.estimate_axis_y),
+                         AxisProfile(*user_prefs.estimate_axis_z),
+                         zTravel=user_prefs.estimate_z_travel,
+                         pickDwell=user_prefs.estimate_pick_dwell,
+                         placeDwell=user_prefs.estimate_place_dwell,
+                         tipChangeTime=user_prefs.estimate_nozzletip_change_time,
+                         visionTime=user_prefs.estimate_bottomvision_time)
+
+
+class PickPlace:
+    '''
+        PickPlace -- one placement: where it's picked from and placed,
+        with which nozzle tip, and whether it goes through bottom vision.
+    '''
+    def __init__(self, partId, feedXYList, placeXY, nozzleTip=None, bottomVision=False):
+        self.part_id = partId
+        self.feeds = feedXYList
+        self.place = placeXY
+        self.nozzle_tip = nozzleTip
+        self.bottom_vision = bottomVision
+
+    def feedFor(self):
+        '''
+            @return: (x, y) of the feed nearest to the placement
+        '''
+        if len(self.feeds) == 1:
+            return self.feeds[0]
+        return min(self.feeds, key=lambda fxy: distance(fxy, self.place))
+
+    def __repr__(self):
+        return '<PickPlace %s>' % str(self.part_id)
+
+
+class CycleEstimate:
+    '''
+        CycleEstimate -- totals for a job run.  Times are in seconds,
+        distances in mm.
+    '''
+    def __init__(self, numBoards=1):
+        self.num_boards = numBoards
+        self.num_placements = 0
+        self.xy_distance = 0.0
+        self.xy_time = 0.0
+        self.z_moves = 0
+        self.z_time = 0.0
+        self.tip_changes = 0
+        self.tip_change_time = 0.0
+        self.vision_passes = 0
+        self.vision_time = 0.0
+        self.dwell_time = 0.0
+        # part ids placed on the boards, but in no feed
+        self.unfed_parts = dict()
+
+    def totalTime(self):
+        return self.xy_time + self.z_time + self.tip_change_time + \
+               self.vision_time + self.dwell_time
+
+    def secondsPerBoard(self):
+        if not self.num_boards:
+            return 0.0
+        return self.totalTime() / self.num_boards
+
+    def numUnfedPlacements(self):
+        return sum(self.unfed_parts.values())
+
+    def summary(self):
+        lines = [
+            'Estimate for %i placements on %i boards:' % (self.num_placements,
+                                                        self.num_boards),
+            '  %.1f s per board (%.1f s total)' % (self.secondsPerBoard(),
+                                                 self.totalTime()),
+            '  XY travel: %.2f m, %.1f s' % (self.xy_distance / 1000.0, self.xy_time),
+            '  Z moves: %i, %.1f s' % (self.z_moves, self.z_time),
+            '  Nozzle tip changes: %i, %.1f s' % (self.tip_changes, self.tip_change_time),
+            '  Bottom vision passes: %i, %.1f s' % (self.vision_passes, self.vision_time),
+            '  Pick/place dwell: %.1f s' % self.dwell_time
+        ]
+        if len(self.unfed_parts):
+            lines.append('  Skipped %i placements of %i parts not in any feed' %
+                         (self.numUnfedPlacements(), len(self.unfed_parts)))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return '<CycleEstimate %i placements, %.1f s/board>' % (self.num_placements,
+                                                                self.secondsPerBoard())
+
+
+class Estimator:
+    '''
+        Estimator -- walks through a list of PickPlace, accumulating
+        a CycleEstimate.
+    '''
+    def __init__(self, profile=None, startXY=None, bottomCamXY=None, loadedTip=None):
+        if profile is None:
+            profile = default_profile()
+        self.profile = profile
+        self.start_xy = startXY
+        self.bottom_cam_xy = bottomCamXY
+        self.loaded_tip = loadedTip
+
+    def ordered(self, pickPlaces):
+        '''
+            @return: pickPlaces grouped by nozzle tip, groups in order of
+                     first appearance (the loaded tip's group first), job
+                     order within a group.  Placements that don't care
+                     about the tip go with the first group.
+        '''
+        groups = dict()
+        groupOrder = []
+        anyTip = []
+        for pp in pickPlaces:
+            if pp.nozzle_tip is None:
+                anyTip.append(pp)
+                continue
+            if pp.nozzle_tip not in groups:
+                groups[pp.nozzle_tip] = []
+                groupOrder.append(pp.nozzle_tip)
+            groups[pp.nozzle_tip].append(pp)
+
+        if self.loaded_tip in groups:
+            groupOrder.remove(self.loaded_tip)
+            groupOrder.insert(0, self.loaded_tip)
+
+        results = []
+        for tip in groupOrder:
+            results.extend(groups[tip])
+            if len(anyTip):
+                results.extend(anyTip)
+                anyTip = []
+        results.extend(anyTip)
+        return results
+
+    def estimate(self, pickPlaces, numBoards=1):
+        '''
+            estimate(PICKPLACELIST, [NUMBOARDS])
+            @return: CycleEstimate for placing everything in pickPlaces
+                     (which covers numBoards boards)
+        '''
+        profile = self.profile
+        est = CycleEstimate(numBoards)
+        zTime = profile.zMoveTime()
+
+        curXY = self.start_xy
+        curTip = self.loaded_tip
+        for pp in self.ordered(pickPlaces):
+            if pp.nozzle_tip is not None and pp.nozzle_tip != curTip:
+                if curTip is not None:
+                    est.tip_changes += 1
+                    est.tip_change_time += profile.tip_change_time
+                curTip = pp.nozzle_tip
+
+            stops = [pp.feedFor()]
+            if pp.bottom_vision and self.bottom_cam_xy is not None:
+                stops.append(self.bottom_cam_xy)
+            stops.append(pp.place)
+
+            for xy in stops:
+                if curXY is not None:
+                    est.xy_distance += distance(curXY, xy)
+                    est.xy_time += profile.xyMoveTime(curXY, xy)
+                curXY = xy
+
+            # down and up, at both the feed and the placement
+            est.z_moves += 4
+            est.z_time += 4 * zTime
+            est.dwell_time += profile.pick_dwell + profile.place_dwell
+            if pp.bottom_vision:
+                est.vision_passes += 1
+                est.vision_time += profile.vision_time
+            est.num_placements += 1
+
+        return est
+
+
+def feed_locations_by_part(onlyEnabled=True):
+    '''
+        @return: dict of part id -> [(x, y) of each feed holding it]
+    '''
+    from psypnp.feedmap.feedmapper import FeedMapper
+    feeds = FeedMapper(onlyEnabled).map()
+    byPart = dict()
+    if not feeds:
+        return byPart
+
+    for finfo in feeds:
+        if finfo.part is None or finfo.location is None:
+            continue
+        pid = finfo.part.getId()
+        if pid not in byPart:
+            byPart[pid] = []
+        byPart[pid].append(location_xy(finfo.location))
+    return byPart
+
+def bottom_camera_xy():
+    '''
+        @return: (x, y) of the first camera not on the default head, None
+                 if we have none
+    '''
+    import psypnp.globals
+    mach = psypnp.globals.machine()
+    headCamIds = dict()
+    for hcam in mach.getDefaultHead().getCameras():
+        headCamIds[hcam.getId()] = True
+    for acam in mach.getCameras():
+        if acam.getId() not in headCamIds:
+            return location_xy(acam.getLocation())
+    return None
+
+def loaded_nozzle_tip():
+    import psypnp.globals
+    try:
+        ntip = psypnp.globals.machine().getDefaultHead().getDefaultNozzle().getNozzleTip()
+    except Exception:
+        return None
+    if ntip is None:
+        return None
+    return ntip.getName()
+
+def nozzle_tip_for(aPart, loadedTip=None):
+    '''
+        @return: name of the nozzle tip aPart would be placed with:
+                 loadedTip if it's compatible, otherwise the first
+                 compatible tip, by name.  None if we can't tell.
+    '''
+    pkg = aPart.getPackage()
+    if pkg is None:
+        return None
+    tips = pkg.getCompatibleNozzleTips()
+    if tips is None or not len(tips):
+        return None
+    names = sorted([t.getName() for t in tips])
+    if loadedTip in names:
+        return loadedTip
+    return names[0]
+
+def needs_bottom_vision(botVis, aPart):
+    if botVis is None:
+        return False
+    if hasattr(botVis, 'isEnabled') and not botVis.isEnabled():
+        return False
+    settings = botVis.getPartSettings(aPart)
+    return settings is not None and settings.isEnabled()
+
+def estimate_selected_boards(profile=None, onlyEnabledFeeds=True):
+    '''
+        estimate_selected_boards([PROFILE], [ONLYENABLEDFEEDS])
+        @return: CycleEstimate for the enabled placements on the boards
+                 selected in the job tab, using the current feeders.
+                 None if no boards are selected.
+    '''
+    import psypnp.ui
+    import psypnp.util
+    from org.openpnp.model.Placement import Type as PlacementType
+
+    boardLocs = psypnp.ui.getSelectedBoardLocations()
+    if boardLocs is None:
+        return None
+
+    feedsByPart = feed_locations_by_part(onlyEnabledFeeds)
+    botVis = psypnp.util.get_bottom_vision()
+    loadedTip = loaded_nozzle_tip()
+
+    # per part id: (nozzle tip, needs vision)
+    partSettings = dict()
+    unfed = dict()
+    pickPlaces = []
+    for bloc in boardLocs:
+        for aplacement in bloc.getBoard().getPlacements():
+            if aplacement.getType() == PlacementType.Fiducial or not aplacement.isEnabled():
+                continue
+            prt = aplacement.getPart()
+            if prt is None:
+                continue
+            pid = prt.getId()
+            if pid not in feedsByPart:
+                unfed[pid] = unfed.get(pid, 0) + 1
+                continue
+            if pid not in partSettings:
+                partSettings[pid] = (nozzle_tip_for(prt, loadedTip),
+                                     needs_bottom_vision(botVis, prt))
+            pickPlaces.append(PickPlace(pid, feedsByPart[pid],
+                                        board_placement_xy(bloc, aplacement),
+                                        partSettings[pid][0], partSettings[pid][1]))
+
+    estimator = Estimator(profile, bottomCamXY=bottom_camera_xy(), loadedTip=loadedTip)
+    est = estimator.estimate(pickPlaces, len(boardLocs))
+    est.unfed_parts = unfed
+    psypnp.debug.out.buffer("Cycle estimate: %s" % str(est))
+    return est
+
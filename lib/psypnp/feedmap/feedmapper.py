@@ -14,6 +14,9 @@ Part of the psypnp OpenPnP scripting modules project
 
 '''
 import psypnp.globals
+import psypnp.geom
+import psypnp.profile
+import psypnp.snapshot
 
 class FeedInfo:
     FeedIdCounter = 0
@@ -62,35 +65,43 @@ class PushPullFeedInfo(FeedInfo):
         FeedInfo.__init__(self, feedObj, 'pushpull', name, loc, travelX, travelY, part, disabled)
     
 
+def feeds_span(feedInfoList):
+    '''
+        @return: ([minX, maxX], [minY, maxY]) of the feed locations, as ints
+    '''
+    bbox = psypnp.geom.bounding_box(psypnp.geom.from_locations(
+                                        [f.location for f in feedInfoList]))
+    if bbox is None:
+        # arbitrary large 'invalid' values
+        return ([10000, -10000], [10000, -10000])
+    
+    return ([int(bbox[0]), int(bbox[2])], [int(bbox[1]), int(bbox[3])])
+
 class FeedMapper:
         
-    def __init__(self, onlyEnabled=True):
+    def __init__(self, onlyEnabled=True, snapshot=None):
         self.include_only_enabled = onlyEnabled
         self.include_disabled_of_samepart = False
         self.feedInfoList = []
+        # a psypnp.snapshot.FeederSnapshot, if not the shared one
+        self.snapshot = snapshot
         
     
+    @psypnp.profile.timed('FeedMapper.map')
     def map(self):
-        feederList = psypnp.globals.machine().getFeeders()
+        snap = self.snapshot
+        if snap is None:
+            snap = psypnp.snapshot.get_snapshot()
         self.feedInfoList = []
         feeds_processed = 0
-        if feederList is None or not len(feederList):
+        if not len(snap):
             return feeds_processed
     
-        next_feeder_index = 0
-        while next_feeder_index < len(feederList):
-            nxtFeed = None
-            while next_feeder_index < len(feederList) and nxtFeed is None:
-                if feederList[next_feeder_index].isEnabled() or not self.include_only_enabled:
-                    if feederList[next_feeder_index].getPart() is not None:
-                        nxtFeed = feederList[next_feeder_index]
-                next_feeder_index += 1
-                
-            if nxtFeed is not None:
-                feedDetails = self.process_feed(nxtFeed)
-                if feedDetails is not None:
-                    self.feedInfoList.append(feedDetails)
-                    feeds_processed += 1
+        for rec in snap.withParts(self.include_only_enabled):
+            feedDetails = self.process_feed(rec)
+            if feedDetails is not None:
+                self.feedInfoList.append(feedDetails)
+                feeds_processed += 1
                     
         if not self.include_disabled_of_samepart:
             return self.feedInfoList
@@ -101,81 +112,67 @@ class FeedMapper:
         for aFeedInfo in self.feedInfoList:
             validParts[aFeedInfo.part.getId()] = True
             
-        
-    
-        next_feeder_index = 0
-        while next_feeder_index < len(feederList):
-            nxtFeed = None
-            while next_feeder_index < len(feederList) and nxtFeed is None:
-                if not feederList[next_feeder_index].isEnabled():
-                    part = feederList[next_feeder_index].getPart()
-                    if part is not None and part.getId() in validParts:
-                        nxtFeed = feederList[next_feeder_index]
-                next_feeder_index += 1
-                
-            if nxtFeed is not None:
-                feedDetails = self.process_feed(nxtFeed)
-                if feedDetails is not None:
-                    feedDetails.disabled = True
-                    self.feedInfoList.append(feedDetails)
-                    feeds_processed += 1
+        for rec in snap.withParts(False):
+            if rec.enabled or rec.part_id not in validParts:
+                continue
+            feedDetails = self.process_feed(rec)
+            if feedDetails is not None:
+                feedDetails.disabled = True
+                self.feedInfoList.append(feedDetails)
+                feeds_processed += 1
     
         return self.feedInfoList
     
     
-    def process_feed_tray(self, aFeed):
+    def process_feed_tray(self, rec):
         print("TODO: trays not really supported yet\n")
+        aFeed = rec.feeder
+        psypnp.profile.count('java: feeder reads', 5)
         offsets = aFeed.getOffsets()
         deltaX = offsets.getX()
         deltaY = offsets.getY()
-        tFeed =  TrayFeedInfo(aFeed, aFeed.getName(), 
+        tFeed =  TrayFeedInfo(aFeed, rec.name, 
                               aFeed.getPickLocation(), 
-                              deltaX, deltaY, aFeed.getPart())
+                              deltaX, deltaY, rec.part)
         tFeed.x_count = aFeed.getTrayCountX()
         tFeed.y_count = aFeed.getTrayCountY()
         
         return tFeed
         
         
-    def process_feed_pushpull(self, aFeed):
-        return PushPullFeedInfo(aFeed, aFeed.getName(),
-                                aFeed.getLocation(), -1, 0, aFeed.getPart())
+    def process_feed_pushpull(self, rec):
+        return PushPullFeedInfo(rec.feeder, rec.name,
+                                rec.location, -1, 0, rec.part)
         
-    def process_feed_strip(self, aFeed):
-        idealLines = aFeed.idealLineLocations
-        if idealLines is None or len(idealLines) < 2:
-            return False
+    def process_feed_strip(self, rec):
+        idealDelta = rec.ideal_delta
+        if idealDelta is None:
+            return None
         
-        deltaX = idealLines[1].getX() - idealLines[0].getX()
-        deltaY = idealLines[1].getY() - idealLines[0].getY()
+        deltaX, deltaY = idealDelta
         if abs(deltaX) > abs(deltaY):
             # is X dir, assume pure X
-            return StripFeedInfo(aFeed, aFeed.getName(), 
-                                 aFeed.getReferenceHoleLocation(), 
-                                 deltaX, 0, aFeed.getPart())
+            return StripFeedInfo(rec.feeder, rec.name, 
+                                 rec.reference_hole, 
+                                 deltaX, 0, rec.part)
         
         # assume pure Y
-        return StripFeedInfo(aFeed, aFeed.getName(), 
-                             aFeed.getReferenceHoleLocation(), 
-                             0, deltaY, aFeed.getPart())
+        return StripFeedInfo(rec.feeder, rec.name, 
+                             rec.reference_hole, 
+                             0, deltaY, rec.part)
     
-    def process_feed(self, aFeed):
-        #if hasattr(aFeed, 'trayCountX'):
-        #    return self.process_feed_tray(aFeed)
-        
-        
-        if hasattr(aFeed, 'toString'):
-            asStr = aFeed.toString() 
-            if asStr.find('Strip') >= 0:
-                return self.process_feed_strip(aFeed)
-            if asStr.find('PushPull') >= 0:
-                return self.process_feed_pushpull(aFeed)
-            
-            
-        if hasattr(aFeed, 'idealLineLocations'):
-            return self.process_feed_strip(aFeed)
-            
-        else:
-            print("Unsupported feed type\n")
+    def process_feed(self, rec):
+        '''
+            @param rec: the feeder's psypnp.snapshot.FeederRecord
+            @return: a FeedInfo, or None if unsupported
+        '''
+        #if rec.kind == 'tray':
+        #    return self.process_feed_tray(rec)
+        
+        if rec.kind == 'strip':
+            return self.process_feed_strip(rec)
+        if rec.kind == 'pushpull':
+            return self.process_feed_pushpull(rec)
             
-        return None
\ No newline at end of file
+        print("Unsupported feed type\n")
+        return None
@@ -0,0 +1,324 @@
+'''
+Created on Oct 17, 2026
+
+Batched 2D geometry for feeder and placement coordinates.
+
+Every getX()/getY() on an openpnp Location is a trip across the
+jython/java bridge, and most scripts used to make those trips over
+and over (once to find the extents, again for the centroid, again for
+distances...).  Here, coordinates are pulled out once into compact
+array('d') buffers (a Points), and the operations work on those:
+
+  pts = psypnp.geom.from_locations([f.getReferenceHoleLocation()
+                                   for f in feeders])
+  cx, cy = psypnp.geom.centroid(pts)
+  dists = psypnp.geom.distances_to(pts, (cx, cy))
+  minX, minY, maxX, maxY = psypnp.geom.bounding_box(pts)
+
+  fit = psypnp.geom.fit_line(pts)  # LineFit: centroid, direction
+  moved = psypnp.geom.rigid_transform(pts, 10, 0, rotation=90)
+
+When NumPy is around (CPython, not jython), the buffers are viewed
+as numpy arrays without copying and the maths is done by numpy.
+Otherwise it's plain python over the arrays, which is still a lot
+cheaper than going through java for each coordinate.
+
+Apart from from_locations() and Points.to_location(), which deal
+with openpnp Locations, nothing openpnp-specific in here.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import math
+from array import array
+
+HaveNumPy = True
+try:
+    import numpy
+except ImportError:
+    HaveNumPy = False
+
+
+class Points:
+    '''
+        Points -- x and y coordinates, in parallel array('d') buffers.
+
+        Locations have units, Points don't: from_locations() keeps the
+        units of the first location around (self.units) for
+        to_location(), but converts nothing.
+    '''
+    def __init__(self, xs=None, ys=None, units=None):
+        self.xs = xs if xs is not None else array('d')
+        self.ys = ys if ys is not None else array('d')
+        self.units = units
+
+    def append(self, x, y):
+        self.xs.append(x)
+        self.ys.append(y)
+
+    def xy(self, idx):
+        return (self.xs[idx], self.ys[idx])
+
+    def to_location(self, idx, z=0.0, rotation=0.0):
+        '''
+            @return: an openpnp Location for point idx
+        '''
+        from org.openpnp.model import Location
+        return Location(self.units, self.xs[idx], self.ys[idx], z, rotation)
+
+    def numpy(self):
+        '''
+            @return: (xs, ys) as numpy arrays sharing our buffers
+        '''
+        return (numpy.frombuffer(self.xs, dtype=numpy.float64),
+                numpy.frombuffer(self.ys, dtype=numpy.float64))
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __repr__(self):
+        return '<Points %i>' % len(self)
+
+
+class LineFit:
+    '''
+        LineFit -- best fit line through some points: passes through
+        (cx, cy), along unit vector (dx, dy).  rms is the root mean
+        square distance of the points from the line.
+    '''
+    def __init__(self, cx, cy, dx, dy, rms):
+        self.cx = cx
+        self.cy = cy
+        self.dx = dx
+        self.dy = dy
+        self.rms = rms
+
+    def isHorizontal(self):
+        return abs(self.dx) >= abs(self.dy)
+
+    def angle(self):
+        '''
+            @return: angle of the line, in degrees
+        '''
+        return math.degrees(math.atan2(self.dy, self.dx))
+
+    def __repr__(self):
+        return '<LineFit (%.3f, %.3f) dir (%.3f, %.3f) rms %.3f>' % (self.cx, self.cy,
+                                                                   self.dx, self.dy, self.rms)
+
+
+def from_xy(xyList, units=None):
+    '''
+        @return: Points from a list of (x, y) tuples
+    '''
+    pts = Points(units=units)
+    for xy in xyList:
+        pts.append(xy[0], xy[1])
+    return pts
+
+def from_locations(locations):
+    '''
+        @return: Points from a list of openpnp Locations (None entries
+                 are skipped, so check len() if that matters).
+    '''
+    pts = Points()
+    for loc in locations:
+        if loc is None:
+            continue
+        if pts.units is None:
+            pts.units = loc.getUnits()
+        pts.append(loc.getX(), loc.getY())
+    return pts
+
+def centroid(pts):
+    '''
+        @return: (x, y) mean of pts, None if empty
+    '''
+    n = len(pts)
+    if not n:
+        return None
+    if HaveNumPy:
+        xs, ys = pts.numpy()
+        return (float(xs.mean()), float(ys.mean()))
+    return (sum(pts.xs) / n, sum(pts.ys) / n)
+
+def distances_to(pts, xy):
+    '''
+        @return: array('d') of the distance from each point to xy
+    '''
+    if HaveNumPy and len(pts):
+        xs, ys = pts.numpy()
+        return array('d', numpy.hypot(xs - xy[0], ys - xy[1]).tobytes())
+
+    x0, y0 = xy
+    hypot = math.hypot
+    return array('d', [hypot(x - x0, y - y0) for x, y in zip(pts.xs, pts.ys)])
+
+def pairwise_distances(pts, others=None):
+    '''
+        pairwise_distances(PTS, [OTHERS])
+        @return: list of array('d') rows: row i holds the distances from
+                 point i of pts to every point of others (pts itself, if
+                 not specified)
+    '''
+    if others is None:
+        others = pts
+    if HaveNumPy and len(pts) and len(others):
+        xs, ys = pts.numpy()
+        oxs, oys = others.numpy()
+        dists = numpy.hypot(xs[:, None] - oxs[None, :], ys[:, None] - oys[None, :])
+        return [array('d', row.tobytes()) for row in dists]
+
+    return [distances_to(others, pts.xy(i)) for i in range(len(pts))]
+
+def bounding_box(pts):
+    '''
+        @return: (minX, minY, maxX, maxY), None if empty
+    '''
+    if not len(pts):
+        return None
+    if HaveNumPy:
+        xs, ys = pts.numpy()
+        return (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
+    return (min(pts.xs), min(pts.ys), max(pts.xs), max(pts.ys))
+
+def axis_stats(pts):
+    '''
+        @return: ((mean, variance, sample variance) for X, same for Y),
+                 None if there are fewer than 2 points
+    '''
+    n = len(pts)
+    if n < 2:
+        return None
+
+    results = []
+    if HaveNumPy:
+        for vals in pts.numpy():
+            var = float(vals.var())
+            results.append((float(vals.mean()), var, var * n / (n - 1)))
+        return tuple(results)
+
+    for vals in (pts.xs, pts.ys):
+        mean = sum(vals) / n
+        M2 = sum([(v - mean) * (v - mean) for v in vals])
+        results.append((mean, M2 / n, M2 / (n - 1)))
+    return tuple(results)
+
+def _covariance(pts):
+    '''
+        @return: (cx, cy, sxx, syy, sxy), sums of centered products
+    '''
+    cx, cy = centroid(pts)
+    if HaveNumPy:
+        xs, ys = pts.numpy()
+        dx = xs - cx
+        dy = ys - cy
+        return (cx, cy, float((dx * dx).sum()), float((dy * dy).sum()),
+                float((dx * dy).sum()))
+
+    sxx = 0.0
+    syy = 0.0
+    sxy = 0.0
+    for x, y in zip(pts.xs, pts.ys):
+        dx = x - cx
+        dy = y - cy
+        sxx += dx * dx
+        syy += dy * dy
+        sxy += dx * dy
+    return (cx, cy, sxx, syy, sxy)
+
+def fit_line(pts):
+    '''
+        @return: LineFit, the total least squares line through pts
+                 (so works for vertical lines too), None if fewer than
+                 2 points
+    '''
+    n = len(pts)
+    if n < 2:
+        return None
+    cx, cy, sxx, syy, sxy = _covariance(pts)
+    theta = 0.5 * math.atan2(2.0 * sxy, sxx - syy)
+    dx = math.cos(theta)
+    dy = math.sin(theta)
+    # squared distances off the line, summed: variance across it
+    across = sxx * dy * dy - 2.0 * sxy * dx * dy + syy * dx * dx
+    return LineFit(cx, cy, dx, dy, math.sqrt(max(across, 0.0) / n))
+
+def snap_to_axis(dx, dy):
+    '''
+        @return: (dx, 0) or (0, dy), whichever component dominates
+    '''
+    if abs(dx) > abs(dy):
+        return (dx, 0.0)
+    return (0.0, dy)
+
+def rigid_transform(pts, tx, ty, rotation=0.0, about=(0.0, 0.0)):
+    '''
+        rigid_transform(PTS, TX, TY, [ROTATION], [ABOUT])
+        @return: new Points, pts rotated by rotation degrees (CCW)
+                 about the (x, y) about, then translated by (tx, ty)
+    '''
+    cosA = math.cos(math.radians(rotation))
+    sinA = math.sin(math.radians(rotation))
+    ax, ay = about
+    if HaveNumPy and len(pts):
+        xs, ys = pts.numpy()
+        rx = xs - ax
+        ry = ys - ay
+        return Points(array('d', (ax + tx + cosA * rx - sinA * ry).tobytes()),
+                      array('d', (ay + ty + sinA * rx + cosA * ry).tobytes()),
+                      pts.units)
+
+    moved = Points(units=pts.units)
+    for x, y in zip(pts.xs, pts.ys):
+        rx = x - ax
+        ry = y - ay
+        moved.append(ax + tx + cosA * rx - sinA * ry,
+                     ay + ty + sinA * rx + cosA * ry)
+    return moved
+
+def estimate_rigid_transform(src, dst):
+    '''
+        estimate_rigid_transform(SRC, DST)
+        @return: (tx, ty, rotation) such that
+                 rigid_transform(src, tx, ty, rotation) best matches dst
+                 (least squares, points matched by index), None unless
+                 both have the same number (at least 2) of points.
+    '''
+    n = len(src)
+    if n < 2 or len(dst) != n:
+        return None
+    scx, scy = centroid(src)
+    dcx, dcy = centroid(dst)
+    if HaveNumPy:
+        sxs, sys_ = src.numpy()
+        dxs, dys = dst.numpy()
+        sx = sxs - scx
+        sy = sys_ - scy
+        dx = dxs - dcx
+        dy = dys - dcy
+        dots = float((sx * dx + sy * dy).sum())
+        crosses = float((sx * dy - sy * dx).sum())
+    else:
+        dots = 0.0
+        crosses = 0.0
+        for i in range(n):
+            sx = src.xs[i] - scx
+            sy = src.ys[i] - scy
+            dx = dst.xs[i] - dcx
+            dy = dst.ys[i] - dcy
+            dots += sx * dx + sy * dy
+            crosses += sx * dy - sy * dx
+
+    angle = math.atan2(crosses, dots)
+    cosA = math.cos(angle)
+    sinA = math.sin(angle)
+    tx = dcx - (cosA * scx - sinA * scy)
+    ty = dcy - (sinA * scx + cosA * scy)
+    return (tx, ty, math.degrees(angle))
+
@@ -39,11 +39,8 @@ Part of the psypnp OpenPnP scripting modules project
 import os.path
 import traceback
 import re
-from org.openpnp.spi.MotionPlanner import CompletionType
-try:
-    import javax.swing.JOptionPane as optPane
-except:
-    from psypnp.debug import stubOptPane as optPane 
+# openpnp/swing imports are done where they're needed, this module 
+# is loaded on every script run (see psypnp.bootstrap())
 
 
 _gConfig = None
@@ -52,12 +49,14 @@ _gScripting = None
 _gGUI = None 
 _parentDir = None
 _callingFile = None
+_setupCount = 0
 def setup(machine, config, scripting, gui):
-    global _gConfig, _gMachine, _gScripting, _gGUI
+    global _gConfig, _gMachine, _gScripting, _gGUI, _setupCount
     _gMachine = machine 
     _gConfig = config 
     _gScripting = scripting
     _gGUI = gui 
+    _setupCount += 1
     # _setupCallingFile()
     
 def _setupCallingFile():
@@ -82,6 +81,13 @@ def _setupCallingFile():
     
 
         
+def setupGeneration():
+    '''
+        incremented on each setup(), i.e. each script run, so 
+        modules caching machine state know when to let it go.
+    '''
+    return _setupCount
+        
 def current_script():
     return _callingFile 
 
@@ -92,6 +98,10 @@ def current_stack():
 
 
 def doSetupError():
+    try:
+        import javax.swing.JOptionPane as optPane
+    except:
+        from psypnp.debug import stubOptPane as optPane 
     optPane.showMessageDialog(None,"psypnp.globals.setup() never called")
     return None 
 
@@ -154,6 +164,7 @@ def machineExecuteMotions(headMountable=None):
         if defNozz is None:
             return
         headMountable = defNozz
+    from org.openpnp.spi.MotionPlanner import CompletionType
     mp.waitForCompletion(headMountable, CompletionType.WaitForStillstand)
 
 def scripting(): 
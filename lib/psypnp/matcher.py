@@ -0,0 +1,158 @@
+'''
+Created on Oct 17, 2026
+
+Aho-Corasick substring matcher: given a bunch of names (package
+description names, feed description names...), finds which of them
+appear in some text in a single pass over that text, rather than
+str.find()ing every name in turn.
+
+  m = psypnp.matcher.SubstringMatcher()
+  m.add('0402', pkgA)
+  m.add('C_0402_HD', pkgB)
+
+  m.best('C_0402_HD_Capacitor')    # ('C_0402_HD', pkgB)
+  m.matches('C_0402_HD_Capacitor') # both, best first
+
+When more than one name matches, the best is deterministic: longest
+name, then earliest position in the text, then alphabetical.
+
+Pure python, nothing openpnp-specific in here.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+'''
+
+from collections import deque
+
+class SubstringMatch:
+    def __init__(self, name, obj, start):
+        self.name = name
+        self.object = obj
+        self.start = start
+
+    def rank(self):
+        return (-len(self.name), self.start, self.name)
+
+    def __repr__(self):
+        return '<SubstringMatch %s @%i>' % (self.name, self.start)
+
+class SubstringMatcher:
+    '''
+        SubstringMatcher -- trie of names, with failure links,
+        built lazily on the first search after names are added.
+    '''
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # per state: transitions, name index ending here (or None)
+        self.goto = [dict()]
+        self.terminal = [None]
+        self.names = []
+        self.objects = []
+        self.fail = None
+        self.out_link = None
+
+    def numEntries(self):
+        return len(self.names)
+
+    def add(self, name, obj=None):
+        '''
+            add(NAME, [OBJ])
+            add a name to match.  Adding the same name again replaces its obj.
+        '''
+        if name is None or not len(name):
+            return
+
+        state = 0
+        for c in name:
+            nxt = self.goto[state].get(c)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append(dict())
+                self.terminal.append(None)
+                self.goto[state][c] = nxt
+            state = nxt
+
+        if self.terminal[state] is not None:
+            self.objects[self.terminal[state]] = obj
+            return
+
+        self.terminal[state] = len(self.names)
+        self.names.append(name)
+        self.objects.append(obj)
+        self.fail = None
+
+    def _build(self):
+        numStates = len(self.goto)
+        fail = [0] * numStates
+        # closest state down the failure chain that ends a name
+        outLink = [0] * numStates
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            r = queue.popleft()
+            for c in self.goto[r]:
+                s = self.goto[r][c]
+                queue.append(s)
+                f = fail[r]
+                while f and c not in self.goto[f]:
+                    f = fail[f]
+                fail[s] = self.goto[f].get(c, 0)
+                if self.terminal[fail[s]] is not None:
+                    outLink[s] = fail[s]
+                else:
+                    outLink[s] = outLink[fail[s]]
+
+        self.fail = fail
+        self.out_link = outLink
+
+    def matches(self, text):
+        '''
+            matches(TEXT)
+            @return: list of SubstringMatch for every name found
+                     in text (once each), best first.
+        '''
+        if text is None or not len(self.names):
+            return []
+        if self.fail is None:
+            self._build()
+
+        goto = self.goto
+        fail = self.fail
+        terminal = self.terminal
+        outLink = self.out_link
+
+        found = dict()
+        state = 0
+        for i in range(len(text)):
+            c = text[i]
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+
+            s = state if terminal[state] is not None else outLink[state]
+            while s:
+                nameIdx = terminal[s]
+                if nameIdx not in found:
+                    found[nameIdx] = i - len(self.names[nameIdx]) + 1
+                s = outLink[s]
+
+        results = [SubstringMatch(self.names[n], self.objects[n], found[n]) for n in found]
+        results.sort(key=lambda m: m.rank())
+        return results
+
+    def best(self, text):
+        '''
+            best(TEXT)
+            @return: (name, obj) for the best match in text, or None
+        '''
+        found = self.matches(text)
+        if not len(found):
+            return None
+        return (found[0].name, found[0].object)
+
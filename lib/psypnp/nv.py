@@ -28,7 +28,7 @@ Simplest method: NVStorage objects.
 Other more functiony functions provide for retrieval with 
 defaults and such.
 
-A global pickle file holds everything, scripts usually give 
+A global store holds everything, scripts usually give 
 themselves some relevant "parent key" (which maps to their 
 own dict())
 
@@ -46,19 +46,43 @@ Python type... or anything that can be pickled):
   psypnp.nv.set_subvalue(MyKey, 'somename', some_value)
 
 
+Saves are written behind: changes are tracked and written out 
+together a moment later (see config.files.NVStoreWriteDelay), on 
+saveAll()/save_storage() or at exit, and the file is replaced 
+atomically so a crash mid-write can't corrupt it.
+
+The backend is selected by config.files.NVStoreBackend.  By default,
+each parent key is stored in its own file (under config.files.NVStoreDir)
+and only loaded when first accessed.  An old monolithic psystore.db is 
+migrated into there automatically.  Calling set_storage_filename() 
+switches back to a single-file store.
+
+With the (optional) 'sqlite' backend, each set is a row update, and 
+lots of them can be grouped in a single transaction:
+
+  with psypnp.nv.batch():
+      psypnp.nv.set_subvalue(MyKey, 'a', 1)
+      psypnp.nv.set_subvalue(MyKey, 'b', 2)
+
+batch() works with every backend: file stores just write once at the end.
 
 '''
 
 import os
-import pickle 
+import atexit
+import contextlib
 
 from psypnp.ui import showError
 import psypnp.globals
 import psypnp.config.files
+from psypnp.nvstore.pickle_store import PickleStore
+from psypnp.nvstore.shard_store import ShardStore
 
 
 PsyPersistentStorage = None
 PsyNVStoreFileName = None 
+PsyNVStoreDirName = None
+PsyNVStoreBackend = None # override for config.files.NVStoreBackend
 
 class NVStorage:
     '''
@@ -95,6 +119,9 @@ class NVStorage:
         set_subvalue(self._key, name, val)
         
     def saveAll(self):
+        # our values may have been changed in place (e.g. 
+        # del mydata.somedict['x']), so make sure they go out
+        storage().markDirty(self._key)
         save_storage()
         
     def __getattr__(self, name):
@@ -128,115 +155,173 @@ def getStorageFileName():
         return PsyNVStoreFileName
     
     fpath = psypnp.globals.fullpathFromRelative(psypnp.config.files.NVStoreDb)
-    if fpath and os.path.exists(fpath):
+    if fpath:
+        # doesn't need to exist yet, will be created on first save
         PsyNVStoreFileName = fpath 
     
     return PsyNVStoreFileName    
 
 
+def getStorageDirName():
+    global PsyNVStoreDirName
+    if PsyNVStoreDirName is None:
+        PsyNVStoreDirName = psypnp.globals.fullpathFromRelative(
+                                psypnp.config.files.NVStoreDir)
+    return PsyNVStoreDirName
+
+def getStorageBackendName():
+    if PsyNVStoreBackend is not None:
+        return PsyNVStoreBackend
+    return psypnp.config.files.NVStoreBackend
+
+def _create_sqlite_storage():
+    # sqlite3 is only pulled in for this backend (jython doesn't have it anyway)
+    from psypnp.nvstore.sqlite_store import SQLiteStore
+    sto = SQLiteStore(psypnp.globals.fullpathFromRelative(
+                                    psypnp.config.files.NVStoreSQLiteDb))
+    if sto.isNew():
+        # bring in whatever the file stores were holding
+        if os.path.isdir(getStorageDirName()):
+            sto.migrateFrom(ShardStore(getStorageDirName(), None, 0))
+        elif os.path.exists(getStorageFileName()):
+            sto.migrateFrom(PickleStore(getStorageFileName(), 0))
+    return sto
+
+def storage():
+    '''
+        @return: the storage backend (see psypnp.nvstore) 
+        everything here goes through.
+    '''
+    global PsyPersistentStorage
+    if PsyPersistentStorage is not None:
+        return PsyPersistentStorage
+    
+    backendName = getStorageBackendName()
+    writeDelay = psypnp.config.files.NVStoreWriteDelay
+    if backendName == 'sqlite':
+        from psypnp.nvstore.sqlite_store import HaveSQLite
+        if not HaveSQLite:
+            print("NV storage: no sqlite3 module here, using sharded storage")
+            backendName = 'sharded'
+        
+    if backendName == 'pickle':
+        PsyPersistentStorage = PickleStore(getStorageFileName(), writeDelay)
+    elif backendName == 'sqlite':
+        PsyPersistentStorage = _create_sqlite_storage()
+    else:
+        PsyPersistentStorage = ShardStore(getStorageDirName(), 
+                                          getStorageFileName(), 
+                                          writeDelay)
+    return PsyPersistentStorage
+
+@contextlib.contextmanager
+def batch():
+    '''
+        with psypnp.nv.batch():
+            ... lots of set_subvalue() calls
+        
+        Groups all the changes: single transaction for sqlite,
+        single write at the end for the file stores.
+    '''
+    st = storage()
+    st.beginBatch()
+    success = False
+    try:
+        yield st
+        success = True
+    finally:
+        st.endBatch(success)
+
+
 def set_key(key, data, autoSave=True):
-    st = load_storage()
-    if st is None:
-        return False
-    st[key] = data
+    st = storage()
+    st.setParent(key, data)
     if autoSave:
-        save_storage()
+        st.scheduleFlush()
     return True
 
 def get(key):
-    st = load_storage()
-    if st is None or key not in st:
-        return None
-
-    return st[key]
+    return storage().getParent(key)
 
 
 def get_subvalue(parentname, key, defaultValue=None):
-    st = load_storage()
-    if st is None:
-        return defaultValue
-    if parentname not in st:
-        st[parentname] = dict()
-        return defaultValue
-    if key not in st[parentname]:
-        st[parentname][key] = defaultValue
-        return defaultValue
-
-    return st[parentname][key]
+    return storage().getValue(parentname, key, defaultValue)
 
 def set_subvalue(parentname, key, data, autoSave=True):
-    st = load_storage()
-    if st is None:
-        return False
-    if parentname not in st:
-        st[parentname] = dict()
-    st[parentname][key] = data
+    '''
+        set_subvalue(PARENT, KEY, DATA, [autoSave])
+        Sets the value, and (with autoSave) schedules a write. 
+        Multiple sets in quick succession get written out together.
+        Without autoSave, the change goes out with the next write.
+    '''
+    st = storage()
+    st.setValue(parentname, key, data)
     if autoSave:
-        save_storage()
+        st.scheduleFlush()
     return True
 
 
 
 
 
+def _reset_storage():
+    global PsyPersistentStorage
+    if PsyPersistentStorage is not None:
+        # get anything pending into the old store, start fresh
+        PsyPersistentStorage.flush()
+        PsyPersistentStorage = None
+
+def _flush_at_exit():
+    # one hook for whichever store is current: stores replaced by
+    # _reset_storage() were flushed then, throwaway ones aren't ours
+    if PsyPersistentStorage is not None:
+        PsyPersistentStorage.flush()
+
+atexit.register(_flush_at_exit)
+
 def set_storage_filename(setto):
-    global PsyNVStoreFileName
+    '''
+        Use a single (pickle) file for everything, rather than shards.
+    '''
+    global PsyNVStoreFileName, PsyNVStoreBackend
     if setto is not None and len(setto):
+        _reset_storage()
         PsyNVStoreFileName = setto
+        PsyNVStoreBackend = 'pickle'
     else:
         showError("Gimme a name!")
 
-def load_storage():
-    global PsyPersistentStorage
-    #print("ATTEMPT LOAD OF %s" % str(PsyNVStoreFileName))
-    if PsyPersistentStorage is not None:
-        #print("Already loaded, returning")
-        return PsyPersistentStorage
-    
-    store_file = getStorageFileName()
-    #print("XXXXXXXXXXXXXX opening %s" % store_file)
-    if store_file and os.path.exists(store_file) and os.path.isfile(store_file):
-        try:
-            PsyPersistentStorage = pickle.load( open(store_file, "rb"))
-            #print("Pickle loaded: %s" % str(PsyPersistentStorage))
-        except Exception as ex:
-            print("FAILED TO LOAD: %s" % str(ex))
-            PsyPersistentStorage = dict()
+def set_storage_dirname(setto):
+    '''
+        Use sharded storage (one file per parent key) in directory setto.
+    '''
+    global PsyNVStoreDirName, PsyNVStoreBackend
+    if setto is not None and len(setto):
+        _reset_storage()
+        PsyNVStoreDirName = setto
+        PsyNVStoreBackend = 'sharded'
     else:
-        print("Seems %s DNE." % str(store_file))
-
-    if PsyPersistentStorage is None:
-        PsyPersistentStorage = dict()
+        showError("Gimme a name!")
 
-    return PsyPersistentStorage
+def load_storage():
+    '''
+        @return: the whole store, as a dict of parent key -> dict
+    '''
+    return storage().data()
 
 def save_storage(override=None):
-    global PsyPersistentStorage
+    '''
+        Write out any pending changes now (replacing everything 
+        with override dict, if specified).  Everything loaded is 
+        written, as values handed out may have been modified in place.
+    '''
+    st = storage()
     if override is not None:
-        PsyPersistentStorage = override
+        st.replaceAll(override)
+    st.markLoadedDirty()
 
-    store_file = getStorageFileName()
-    if PsyPersistentStorage is None:
-        showError("Nothing to save?")
-        return
-    #print("Pickle storage save")
-    try:
-        #print("DATA: %s" % str(PsyPersistentStorage))
-        store_file = getStorageFileName()
-        if store_file is None:
-            showError("Storage file not set--globals setup??")
-        
-        #print("SAVING TO  %s" % str(store_file))
-        fh = open(store_file, "wb")
-        if fh is None:
-            showError("Could not open: %s ?" % str(store_file))
-            
-        pickle.dump(PsyPersistentStorage, fh)
-        fh.close()
-        #print("Done save")
-    except Exception as ex:
-        showError("Problem serializing data: %s" % str(ex))
-        return
+    if not st.flush():
+        showError("Problem serializing data to %s" % str(getStorageFileName()))
 
 if __name__ == "__main__":
     import psypnp.repl
@@ -0,0 +1,15 @@
+'''
+Storage backends for psypnp.nv non-volatile storage.
+
+Scripts should not need anything in here directly, psypnp.nv 
+get_subvalue()/set_subvalue()/NVStorage are the way to go; these 
+do the actual loading/saving behind the scenes.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
@@ -0,0 +1,245 @@
+'''
+Created on Oct 17, 2026
+
+Common bits for NV storage backends: dirty tracking, coalesced
+write-behind and atomic file writes.
+
+Rather than re-writing everything on every assignment, backends
+mark what changed as dirty and scheduleFlush().  Flushes happen:
+  - WriteDelay seconds after the first unsaved change;
+  - on an explicit flush() (e.g. NVStorage.saveAll()); or
+  - at exit, for the current psypnp.nv storage (stores created
+    directly, e.g. for migration, are flushed by whoever made them).
+
+Files are written to a temp file and renamed into place, so a crash
+mid-write leaves the previous version intact.
+
+Changes made between beginBatch() and endBatch() are flushed once,
+at the end of the (outermost) batch.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+
+import os
+import pickle
+import threading
+
+import psypnp.profile
+
+# jython is happy with protocol 2, and it beats the default text format
+PickleProtocol = 2
+
+def backup_filename(fpath):
+    return '%s.bak' % fpath
+
+def atomic_write(fpath, data):
+    '''
+        atomic_write(PATH, DATA:str)
+        Writes DATA to PATH such that PATH holds either the old or
+        the new contents, never a partial file.
+    '''
+    tmpPath = '%s.tmp' % fpath
+    fh = open(tmpPath, 'wb')
+    try:
+        fh.write(data)
+        fh.flush()
+        try:
+            os.fsync(fh.fileno())
+        except Exception:
+            # not available everywhere (jython), not the end of the world
+            pass
+    finally:
+        fh.close()
+
+    try:
+        os.rename(tmpPath, fpath)
+    except OSError:
+        # windows won't rename over an existing file: keep a
+        # backup around until the new one is in place
+        bakPath = backup_filename(fpath)
+        if os.path.exists(bakPath):
+            os.remove(bakPath)
+        os.rename(fpath, bakPath)
+        os.rename(tmpPath, fpath)
+        os.remove(bakPath)
+
+def pickle_load_file(fpath):
+    '''
+        @return: unpickled contents of fpath (or of its backup, if
+                 fpath is missing/corrupt), None if neither work.
+    '''
+    for aPath in [fpath, backup_filename(fpath)]:
+        if not (os.path.exists(aPath) and os.path.isfile(aPath)):
+            continue
+        try:
+            fh = open(aPath, 'rb')
+            try:
+                with psypnp.profile.span('nv load'):
+                    psypnp.profile.count('nv: files loaded')
+                    return pickle.load(fh)
+            finally:
+                fh.close()
+        except Exception as ex:
+            print("FAILED TO LOAD %s: %s" % (aPath, str(ex)))
+
+    return None
+
+def pickle_dumps(data):
+    return pickle.dumps(data, PickleProtocol)
+
+
+class StoreBase:
+    '''
+        Base for NV storage backends.  Holds data as a dict of
+        parent key -> dict of values, backends implement:
+          _parentDict(parentKey, create): the dict for that parent
+          loadedKeys(): parent keys loaded (or set) so far
+          data(): everything, as one dict
+          replaceAll(dict)
+          _write(dirtyKeysList): actually save
+    '''
+    def __init__(self, writeDelay=1.0):
+        self.write_delay = writeDelay
+        self.batch_depth = 0
+        self.dirty = dict()
+        self.lock = threading.RLock()
+        self._timer = None
+        self.num_writes = 0
+
+    def isDirty(self):
+        return len(self.dirty) > 0
+
+    def markDirty(self, parentKey):
+        with self.lock:
+            self.dirty[parentKey] = True
+
+    def markLoadedDirty(self):
+        '''
+            Mark everything loaded so far as dirty: values handed out
+            (dicts, lists...) may have been changed in place, without
+            us knowing.
+        '''
+        with self.lock:
+            for parentKey in self.loadedKeys():
+                self.markDirty(parentKey)
+
+    def getParent(self, parentKey):
+        with self.lock:
+            return self._parentDict(parentKey, False)
+
+    def setParent(self, parentKey, data):
+        with self.lock:
+            self._setParentDict(parentKey, data)
+            self.markDirty(parentKey)
+
+    def getValue(self, parentKey, key, defaultValue=None):
+        with self.lock:
+            pDict = self._parentDict(parentKey, False)
+            if pDict is None or key not in pDict:
+                return defaultValue
+            return pDict[key]
+
+    def setValue(self, parentKey, key, val):
+        with self.lock:
+            pDict = self._parentDict(parentKey, True)
+            pDict[key] = val
+            self.markDirty(parentKey)
+
+    def scheduleFlush(self):
+        '''
+            Request an eventual flush.  Any number of changes made
+            before it happens are saved in one go.
+        '''
+        if self.batch_depth > 0:
+            # endBatch() will take care of it
+            return
+
+        if self.write_delay is None or self.write_delay <= 0:
+            self.flush()
+            return
+
+        with self.lock:
+            if self._timer is not None:
+                # already pending, will catch this change too
+                return
+            self._timer = threading.Timer(self.write_delay, self._timedFlush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timedFlush(self):
+        with self.lock:
+            self._timer = None
+        self.flush()
+
+    def beginBatch(self):
+        with self.lock:
+            self.batch_depth += 1
+
+    def endBatch(self, success=True):
+        '''
+            end of a batch: flush once everything's been set.
+            @note: file backends can't roll back, so changes made 
+            before a failure are still saved.
+        '''
+        with self.lock:
+            self.batch_depth -= 1
+            if self.batch_depth > 0:
+                return
+        self.flush()
+
+    def cancelPendingFlush(self):
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def flush(self):
+        '''
+            Write out anything dirty, now.
+        '''
+        self.cancelPendingFlush()
+        with self.lock:
+            if not self.isDirty():
+                return True
+
+            dirtyKeys = list(self.dirty.keys())
+            try:
+                with psypnp.profile.span('nv save'):
+                    psypnp.profile.count('nv: parent keys saved', len(dirtyKeys))
+                    self._write(dirtyKeys)
+            except Exception as ex:
+                print("NV storage: problem saving data: %s" % str(ex))
+                return False
+
+            self.num_writes += 1
+            self.dirty = dict()
+
+        return True
+
+    def close(self):
+        self.flush()
+
+    # to be implemented by backends
+    def _parentDict(self, parentKey, create):
+        return None
+
+    def _setParentDict(self, parentKey, data):
+        pass
+
+    def _write(self, dirtyKeys):
+        pass
+
+    def loadedKeys(self):
+        return []
+
+    def data(self):
+        return dict()
+
+    def replaceAll(self, newData):
+        pass
@@ -0,0 +1,162 @@
+'''
+Created on Oct 17, 2026
+
+Cold-start benchmark for the NV storage backends: how long does
+the equivalent of
+
+  psypnp.nv.NVStorage('x').y
+
+take on a fresh run, with a large store, single-file vs sharded.
+
+Before timing anything, each backend (sqlite too, if available) is
+checked to actually save values modified in place, e.g.
+
+  mystore.hotspots['new'] = loc   # or del mystore.hotspots['old']
+  mystore.saveAll()
+
+which NVStorage users (go/hotspot) count on.  For sqlite, also that
+saving doesn't clobber what another connection wrote to other keys,
+and that values set in a rolled back batch don't stick around.
+
+Pure python, run from the lib/ directory with
+  python -m psypnp.nvstore.benchmark [NUMPARENTS] [VALUESPERPARENT]
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from psypnp.nvstore.base import atomic_write, pickle_dumps
+from psypnp.nvstore.pickle_store import PickleStore
+from psypnp.nvstore.shard_store import ShardStore
+from psypnp.nvstore.sqlite_store import SQLiteStore, HaveSQLite
+import psypnp.nv
+
+def generate_store(numParents, valuesPerParent):
+    '''
+        @return: a dict of dicts, like the scripts would stash,
+        with a bit of history in each
+    '''
+    contents = dict()
+    for p in range(numParents):
+        pDict = dict()
+        for v in range(valuesPerParent):
+            pDict['val%i' % v] = dict(
+                name='feeder_%i_%i' % (p, v),
+                history=[(i * 0.1, i * 0.2, 'somename') for i in range(20)])
+        contents['script%i' % p] = pDict
+
+    contents['x'] = dict(y=42)
+    return contents
+
+def time_cold_start(storeFactory, numRuns=5):
+    '''
+        @return: best time, in ms, to create a store and read x.y
+    '''
+    best = None
+    for i in range(numRuns):
+        startTime = time.time()
+        st = storeFactory()
+        val = st.getValue('x', 'y')
+        elapsed = (time.time() - startTime) * 1000.0
+        if val != 42:
+            raise ValueError("Benchmark store returned %s?" % str(val))
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def check_inplace_save(storeFactory):
+    '''
+        Modify an NVStorage dict in place, saveAll(), and make sure
+        a fresh store reads back the change.
+        @raise ValueError: if it doesn't
+    '''
+    prevStorage = psypnp.nv.PsyPersistentStorage
+    try:
+        psypnp.nv.PsyPersistentStorage = storeFactory()
+        nvStore = psypnp.nv.NVStorage('checkinplace')
+        nvStore.hotspots = dict(a=1, b=2)
+        nvStore.saveAll()
+        del nvStore.hotspots['a']
+        nvStore.hotspots['c'] = 3
+        nvStore.saveAll()
+    finally:
+        psypnp.nv.PsyPersistentStorage = prevStorage
+
+    reloaded = storeFactory().getValue('checkinplace', 'hotspots')
+    if reloaded != dict(b=2, c=3):
+        raise ValueError("In-place changes lost on save, got back %s" % str(reloaded))
+
+def check_sqlite_sharing(filename):
+    '''
+        Two stores on the same sqlite file: one flushing its (cached)
+        parent must keep what the other wrote, and a rolled back batch
+        must leave nothing behind.
+        @raise ValueError: if not
+    '''
+    storeA = SQLiteStore(filename)
+    storeB = SQLiteStore(filename)
+    storeA.setValue('checkshared', 'one', 1)
+    storeB.setValue('checkshared', 'two', 2)
+    storeA.markLoadedDirty()
+    storeA.flush()
+    shared = SQLiteStore(filename).getParent('checkshared')
+    if shared != dict(one=1, two=2):
+        raise ValueError("Flush clobbered other store's writes, got back %s" % str(shared))
+
+    storeA.beginBatch()
+    storeA.setValue('checkshared', 'rolledback', 3)
+    storeA.endBatch(False)
+    if storeA.getValue('checkshared', 'rolledback') is not None:
+        raise ValueError("Rolled back value still returned")
+    storeA.markLoadedDirty()
+    storeA.flush()
+    if SQLiteStore(filename).getValue('checkshared', 'rolledback') is not None:
+        raise ValueError("Rolled back value written on flush")
+    storeA.close()
+    storeB.close()
+
+def run(numParents=200, valuesPerParent=50):
+    workDir = tempfile.mkdtemp(prefix='psynvbench')
+    try:
+        dbFile = os.path.join(workDir, 'psystore.db')
+        shardDir = os.path.join(workDir, 'psystore.d')
+
+        check_inplace_save(lambda: PickleStore(os.path.join(workDir, 'check.db'), 0))
+        check_inplace_save(lambda: ShardStore(os.path.join(workDir, 'check.d'), None, 0))
+        if HaveSQLite:
+            check_inplace_save(lambda: SQLiteStore(os.path.join(workDir, 'check.sqlite')))
+            check_sqlite_sharing(os.path.join(workDir, 'shared.sqlite'))
+
+        contents = generate_store(numParents, valuesPerParent)
+        atomic_write(dbFile, pickle_dumps(contents))
+
+        startTime = time.time()
+        migrated = ShardStore(shardDir, dbFile, 0).migrateFrom(dbFile)
+        migrateTime = (time.time() - startTime) * 1000.0
+
+        singleTime = time_cold_start(lambda: PickleStore(dbFile, 0))
+        shardTime = time_cold_start(lambda: ShardStore(shardDir, dbFile, 0))
+
+        print("NV store: %i parent keys x %i values, %i kB on disk" % (
+            numParents + 1, valuesPerParent, os.path.getsize(dbFile) // 1024))
+        print("  one-time migration (%i keys): %0.2f ms" % (migrated, migrateTime))
+        print("  cold start x.y, single file:  %0.2f ms" % singleTime)
+        print("  cold start x.y, sharded:      %0.2f ms" % shardTime)
+        return dict(migrate=migrateTime, single=singleTime, sharded=shardTime)
+    finally:
+        shutil.rmtree(workDir)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,80 @@
+'''
+Created on Oct 17, 2026
+
+Single-file pickle NV storage backend (the classic data/psystore.db).
+
+Everything lives in one dict of dicts, loaded on first access.
+Changes are coalesced and written behind (see nvstore.base), so
+setting 10 values costs one write rather than 10.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+
+from psypnp.nvstore.base import (StoreBase, atomic_write,
+                                 pickle_load_file, pickle_dumps)
+
+class PickleStore(StoreBase):
+    def __init__(self, filepath, writeDelay=1.0):
+        StoreBase.__init__(self, writeDelay)
+        self.filename = filepath
+        self.contents = None
+
+    def _load(self):
+        if self.contents is not None:
+            return self.contents
+
+        loaded = None
+        if self.filename is not None:
+            loaded = pickle_load_file(self.filename)
+            if loaded is None:
+                print("Seems %s DNE (or is unreadable)." % str(self.filename))
+
+        if loaded is None or not isinstance(loaded, dict):
+            loaded = dict()
+
+        self.contents = loaded
+        return self.contents
+
+    def _parentDict(self, parentKey, create):
+        st = self._load()
+        if parentKey not in st:
+            if not create:
+                return None
+            st[parentKey] = dict()
+        return st[parentKey]
+
+    def _setParentDict(self, parentKey, data):
+        self._load()[parentKey] = data
+
+    def loadedKeys(self):
+        if self.contents is None:
+            return []
+        return list(self.contents.keys())
+
+    def data(self):
+        with self.lock:
+            return self._load()
+
+    def replaceAll(self, newData):
+        with self.lock:
+            self.contents = newData
+            for k in newData:
+                self.markDirty(k)
+            if not len(newData):
+                # still want the (empty) file written
+                self.markDirty(None)
+
+    def _write(self, dirtyKeys):
+        if self.filename is None:
+            raise IOError("Storage file not set--globals setup??")
+        # whole thing goes in one file, so any dirt means a full write
+        atomic_write(self.filename, pickle_dumps(self._load()))
+
+    def __repr__(self):
+        return '<PickleStore %s>' % str(self.filename)
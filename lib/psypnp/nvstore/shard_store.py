@@ -0,0 +1,243 @@
+'''
+Created on Oct 17, 2026
+
+Sharded NV storage backend: one pickle file per parent key, in
+a directory (data/psystore.d by default), each loaded only when
+a script first touches that parent key.
+
+So a script that only cares about its own 'go_hotspot' values
+doesn't pay for unpickling everyone else's history.
+
+The first time it's used, if the directory doesn't exist but the
+old monolithic psystore.db does, the contents of the latter are
+split into shards (the old file is left as-is).
+
+Shard file names are the parent key, UTF-8 encoded, with anything but
+lowercase letters, digits and '-_.' escaped, so keys differing only in
+case get distinct files, even on case-insensitive file systems.  Shards
+saved under the earlier naming (which left uppercase as-is) are still
+read, and renamed on their next save.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import os
+
+from psypnp.nvstore.base import (StoreBase, atomic_write,
+                                 pickle_load_file, pickle_dumps)
+
+ShardExtension = '.pkl'
+ShardNameSafeChars = 'abcdefghijklmnopqrstuvwxyz0123456789-_.'
+
+def shard_basename(parentKey):
+    '''
+        @return: a file-system-safe (and case-insensitive-safe) name
+                 for parentKey's shard
+    '''
+    if not isinstance(parentKey, (bytes, type(u''))):
+        parentKey = str(parentKey)
+    if not isinstance(parentKey, bytes):
+        parentKey = parentKey.encode('utf-8')
+
+    safeName = []
+    for b in bytearray(parentKey):
+        c = chr(b)
+        if c in ShardNameSafeChars:
+            safeName.append(c)
+        else:
+            safeName.append('%%%04x' % b)
+
+    return '%s%s' % (''.join(safeName), ShardExtension)
+
+def legacy_shard_basename(parentKey):
+    '''
+        @return: the name parentKey's shard had before uppercase was
+                 escaped, or None if that's the same as shard_basename()
+                 (or the key couldn't be saved back then)
+    '''
+    safeName = []
+    try:
+        for c in str(parentKey):
+            if c.isalnum() or c in '-_.':
+                safeName.append(c)
+            else:
+                safeName.append('%%%04x' % ord(c))
+    except UnicodeError:
+        return None
+
+    legacyName = '%s%s' % (''.join(safeName), ShardExtension)
+    if legacyName == shard_basename(parentKey):
+        return None
+    return legacyName
+
+class ShardStore(StoreBase):
+    def __init__(self, dirpath, legacyFile=None, writeDelay=1.0):
+        StoreBase.__init__(self, writeDelay)
+        self.dirname = dirpath
+        self.legacy_filename = legacyFile
+        self.shards = dict()
+        self.deleted = dict()
+        self._ready = False
+
+    def _makeDir(self):
+        if not os.path.isdir(self.dirname):
+            os.makedirs(self.dirname)
+        self._ready = True
+
+    def _setupDir(self):
+        if self._ready:
+            return
+
+        # no shard dir yet means we've never run, migrate the old store
+        needsMigration = not os.path.isdir(self.dirname)
+        self._makeDir()
+        if needsMigration:
+            self.migrateFrom(self.legacy_filename)
+
+    def migrateFrom(self, legacyFile):
+        '''
+            migrateFrom(PATH)
+            Split a monolithic pickle store into shards.
+            @return: number of parent keys migrated
+        '''
+        if legacyFile is None or not os.path.exists(legacyFile):
+            return 0
+
+        oldContents = pickle_load_file(legacyFile)
+        if oldContents is None or not isinstance(oldContents, dict):
+            return 0
+
+        self._makeDir()
+
+        print("Migrating NV storage from %s to %s" % (legacyFile, self.dirname))
+        with self.lock:
+            for parentKey in oldContents:
+                if parentKey not in self.shards:
+                    self.shards[parentKey] = oldContents[parentKey]
+                self.markDirty(parentKey)
+
+        self.flush()
+        return len(oldContents)
+
+    def shardFilename(self, parentKey):
+        return os.path.join(self.dirname, shard_basename(parentKey))
+
+    def _loadLegacyShard(self, parentKey):
+        '''
+            @return: (path, contents) of parentKey's shard saved under
+                     its legacy name, or (None, None)
+        '''
+        legacyName = legacy_shard_basename(parentKey)
+        if legacyName is None:
+            return (None, None)
+        fpath = os.path.join(self.dirname, legacyName)
+        if not os.path.exists(fpath):
+            return (None, None)
+        loaded = pickle_load_file(fpath)
+        # on a case-insensitive fs, this may well be another key's shard
+        if loaded is None or loaded.get('key') != parentKey:
+            return (None, None)
+        return (fpath, loaded)
+
+    def _loadShard(self, parentKey):
+        if parentKey in self.shards:
+            return self.shards[parentKey]
+
+        self._setupDir()
+        if parentKey in self.deleted:
+            return None
+
+        fpath = self.shardFilename(parentKey)
+        if os.path.exists(fpath):
+            loaded = pickle_load_file(fpath)
+        else:
+            loaded = self._loadLegacyShard(parentKey)[1]
+        if loaded is None:
+            return None
+
+        self.shards[parentKey] = loaded['data']
+        return self.shards[parentKey]
+
+    def _parentDict(self, parentKey, create):
+        pDict = self._loadShard(parentKey)
+        if pDict is None and create:
+            pDict = dict()
+            self.shards[parentKey] = pDict
+            if parentKey in self.deleted:
+                del self.deleted[parentKey]
+        return pDict
+
+    def _setParentDict(self, parentKey, data):
+        self._setupDir()
+        self.shards[parentKey] = data
+        if parentKey in self.deleted:
+            del self.deleted[parentKey]
+
+    def numLoaded(self):
+        return len(self.shards)
+
+    def loadedKeys(self):
+        return list(self.shards.keys())
+
+    def data(self):
+        '''
+            @return: everything, as a dict of parent key -> dict.
+            @note: this loads every shard, so defeats the purpose a bit.
+        '''
+        with self.lock:
+            self._setupDir()
+            for fname in os.listdir(self.dirname):
+                if not fname.endswith(ShardExtension):
+                    continue
+                loaded = pickle_load_file(os.path.join(self.dirname, fname))
+                if loaded is None:
+                    continue
+                parentKey = loaded['key']
+                if parentKey not in self.shards and parentKey not in self.deleted:
+                    self.shards[parentKey] = loaded['data']
+
+            return dict(self.shards)
+
+    def replaceAll(self, newData):
+        with self.lock:
+            for parentKey in self.data():
+                if parentKey not in newData:
+                    self.deleted[parentKey] = True
+                    self.markDirty(parentKey)
+
+            self.shards = dict(newData)
+            for parentKey in newData:
+                self.markDirty(parentKey)
+
+    def _write(self, dirtyKeys):
+        self._setupDir()
+        for parentKey in dirtyKeys:
+            fpath = self.shardFilename(parentKey)
+            if parentKey in self.deleted:
+                if os.path.exists(fpath):
+                    os.remove(fpath)
+                self._removeLegacyShard(parentKey)
+                del self.deleted[parentKey]
+                if parentKey in self.shards:
+                    del self.shards[parentKey]
+                continue
+
+            if parentKey not in self.shards:
+                continue
+
+            atomic_write(fpath, pickle_dumps(dict(key=parentKey,
+                                                  data=self.shards[parentKey])))
+            self._removeLegacyShard(parentKey)
+
+    def _removeLegacyShard(self, parentKey):
+        legacyPath = self._loadLegacyShard(parentKey)[0]
+        if legacyPath is not None:
+            os.remove(legacyPath)
+
+    def __repr__(self):
+        return '<ShardStore %s (%i loaded)>' % (str(self.dirname), self.numLoaded())
@@ -0,0 +1,346 @@
+'''
+Created on Oct 17, 2026
+
+SQLite NV storage backend (optional: needs the sqlite3 module,
+which CPython has but jython does not).
+
+One row per (parent key, sub key), values are pickled blobs, and
+the db runs in WAL mode so a script thread and a REPL session can
+read and write concurrently without clobbering each other's data.
+Each set_subvalue() is a single row update, committed immediately,
+unless grouped in a batch:
+
+  with psypnp.nv.batch():
+      for i in range(100):
+          psypnp.nv.set_subvalue('myscript', 'v%i' % i, i)
+
+which commits everything in one transaction (or nothing, if an
+exception escapes the block).
+
+Parent dicts are decoded on first access, and the same dicts handed
+out until they expire, so values modified in place (as NVStorage users
+do) are written back on flush(), i.e. on saveAll()/save_storage() or at
+exit.  Only keys that actually changed are written, row by row, so
+whatever other connections wrote to other keys is left alone.  Cached
+parents without local changes expire at the start of every batch and
+set, and all of them after a flush or a rolled back batch, so they get
+re-read from the db rather than served stale.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import pickle
+import threading
+
+import psypnp.profile
+from psypnp.nvstore.base import StoreBase, pickle_dumps
+
+HaveSQLite = True
+try:
+    import sqlite3
+except ImportError:
+    HaveSQLite = False
+
+# seconds to wait on a lock held by another connection
+LockTimeout = 10.0
+
+class SQLiteStore(StoreBase):
+    def __init__(self, dbpath):
+        # rows are written as they change, nothing to write behind
+        StoreBase.__init__(self, 0)
+        self.filename = dbpath
+        self.local = threading.local()
+        self.created_table = False
+        # parent key -> decoded dict, as handed out
+        self.parents = dict()
+        # parent key -> dict of key -> pickled value, as last read/written
+        self.stored = dict()
+        self._conn()
+
+    def _conn(self):
+        '''
+            @return: this thread's connection (sqlite connections
+            can't be shared across threads)
+        '''
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        # isolation_level None: we BEGIN/COMMIT batches ourselves,
+        # everything else autocommits
+        conn = sqlite3.connect(self.filename, timeout=LockTimeout,
+                               isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        cur = conn.execute("SELECT name FROM sqlite_master "
+                           "WHERE type='table' AND name='nvstore'")
+        if cur.fetchone() is None:
+            conn.execute('CREATE TABLE IF NOT EXISTS nvstore ('
+                         'parent TEXT NOT NULL, '
+                         'key TEXT NOT NULL, '
+                         'value BLOB, '
+                         'PRIMARY KEY (parent, key))')
+            self.created_table = True
+
+        self.local.conn = conn
+        self.local.batch_depth = 0
+        return conn
+
+    def _encode(self, val):
+        return sqlite3.Binary(pickle_dumps(val))
+
+    def _encodeRaw(self, val):
+        return bytes(pickle_dumps(val))
+
+    def _decode(self, blob):
+        return pickle.loads(bytes(blob))
+
+    def isNew(self):
+        '''
+            @return: True if the db was created when we opened it.
+        '''
+        return self.created_table
+
+    def migrateFrom(self, otherStore):
+        '''
+            migrateFrom(STORE)
+            copy everything from some other nvstore backend in here.
+            @return: number of parent keys migrated
+        '''
+        oldContents = otherStore.data()
+        print("Migrating NV storage from %s to %s" % (str(otherStore), self.filename))
+        self.beginBatch()
+        success = False
+        try:
+            for parentKey in oldContents:
+                self.setParent(parentKey, oldContents[parentKey])
+            success = True
+        finally:
+            self.endBatch(success)
+
+        return len(oldContents)
+
+    def _readParent(self, parentKey):
+        '''
+            @return: (decoded dict, dict of pickled values), or
+                     (None, None) if there's nothing for parentKey
+        '''
+        psypnp.profile.count('nv: parent keys loaded')
+        cur = self._conn().execute('SELECT key, value FROM nvstore WHERE parent=?',
+                                   (parentKey,))
+        pDict = None
+        blobs = None
+        for row in cur:
+            if pDict is None:
+                pDict = dict()
+                blobs = dict()
+            blobs[row[0]] = bytes(row[1])
+            pDict[row[0]] = self._decode(row[1])
+        return (pDict, blobs)
+
+    def _changes(self, parentKey):
+        '''
+            @return: (dict of key -> pickled value for keys changed since
+                     read/written, list of keys removed), for a cached
+                     parent
+        '''
+        pDict = self.parents[parentKey]
+        blobs = self.stored.get(parentKey, dict())
+        changed = dict()
+        for key in pDict:
+            blob = self._encodeRaw(pDict[key])
+            if blobs.get(key) != blob:
+                changed[key] = blob
+        removed = [key for key in blobs if key not in pDict]
+        return (changed, removed)
+
+    def _writeChanges(self, parentKey):
+        '''
+            Write the keys of a cached parent that changed, and only
+            those: other connections' rows are left alone.
+        '''
+        changed, removed = self._changes(parentKey)
+        conn = self._conn()
+        for key in changed:
+            conn.execute('INSERT OR REPLACE INTO nvstore (parent, key, value) '
+                         'VALUES (?, ?, ?)',
+                         (parentKey, key, sqlite3.Binary(changed[key])))
+        for key in removed:
+            conn.execute('DELETE FROM nvstore WHERE parent=? AND key=?',
+                         (parentKey, key))
+        return len(changed) + len(removed)
+
+    def _expire(self, onlyUnchanged=False):
+        '''
+            Forget cached parents (only those without local, in place,
+            changes if onlyUnchanged), so they're re-read from the db.
+        '''
+        with self.lock:
+            for parentKey in list(self.parents.keys()):
+                if onlyUnchanged:
+                    changed, removed = self._changes(parentKey)
+                    if len(changed) or len(removed):
+                        continue
+                del self.parents[parentKey]
+                if parentKey in self.stored:
+                    del self.stored[parentKey]
+
+    def _parentDict(self, parentKey, create):
+        with self.lock:
+            if parentKey in self.parents:
+                return self.parents[parentKey]
+            pDict, blobs = self._readParent(parentKey)
+            if pDict is None:
+                if not create:
+                    return None
+                pDict = dict()
+                blobs = dict()
+            self.parents[parentKey] = pDict
+            self.stored[parentKey] = blobs
+            return pDict
+
+    def getParent(self, parentKey):
+        return self._parentDict(parentKey, False)
+
+    def setParent(self, parentKey, data):
+        '''
+            Replace everything under parentKey with data.
+        '''
+        self.beginBatch()
+        success = False
+        try:
+            conn = self._conn()
+            conn.execute('DELETE FROM nvstore WHERE parent=?', (parentKey,))
+            blobs = dict()
+            for key in data:
+                blobs[key] = self._encodeRaw(data[key])
+                conn.execute('INSERT INTO nvstore (parent, key, value) VALUES (?, ?, ?)',
+                             (parentKey, key, sqlite3.Binary(blobs[key])))
+            with self.lock:
+                self.parents[parentKey] = data
+                self.stored[parentKey] = blobs
+            success = True
+        finally:
+            self.endBatch(success)
+
+    def getValue(self, parentKey, key, defaultValue=None):
+        pDict = self._parentDict(parentKey, False)
+        if pDict is None or key not in pDict:
+            return defaultValue
+        return pDict[key]
+
+    def setValue(self, parentKey, key, val):
+        blob = self._encodeRaw(val)
+        self._conn().execute('INSERT OR REPLACE INTO nvstore (parent, key, value) '
+                             'VALUES (?, ?, ?)',
+                             (parentKey, key, sqlite3.Binary(blob)))
+        pDict = self._parentDict(parentKey, True)
+        with self.lock:
+            pDict[key] = val
+            self.stored[parentKey][key] = blob
+
+    def loadedKeys(self):
+        with self.lock:
+            return list(self.parents.keys())
+
+    def data(self):
+        contents = dict()
+        for row in self._conn().execute('SELECT parent, key, value FROM nvstore'):
+            if row[0] not in contents:
+                contents[row[0]] = dict()
+            contents[row[0]][row[1]] = self._decode(row[2])
+        # along with anything changed in place, and not yet saved
+        with self.lock:
+            for parentKey in self.parents:
+                changed, removed = self._changes(parentKey)
+                pDict = contents.setdefault(parentKey, dict())
+                for key in changed:
+                    pDict[key] = self.parents[parentKey][key]
+                for key in removed:
+                    if key in pDict:
+                        del pDict[key]
+        return contents
+
+    def replaceAll(self, newData):
+        self.beginBatch()
+        success = False
+        try:
+            self._conn().execute('DELETE FROM nvstore')
+            with self.lock:
+                self.parents = dict()
+                self.stored = dict()
+            for parentKey in newData:
+                self.setParent(parentKey, newData[parentKey])
+            success = True
+        finally:
+            self.endBatch(success)
+
+    def beginBatch(self):
+        conn = self._conn()
+        if self.local.batch_depth == 0:
+            conn.execute('BEGIN IMMEDIATE')
+            # others may have written since we read: start afresh
+            self._expire(onlyUnchanged=True)
+        self.local.batch_depth += 1
+
+    def endBatch(self, success=True):
+        conn = self._conn()
+        self.local.batch_depth -= 1
+        if self.local.batch_depth > 0:
+            return
+        if success:
+            conn.execute('COMMIT')
+        else:
+            conn.execute('ROLLBACK')
+            # cached values may hold what was just rolled back
+            self._expire()
+
+    def scheduleFlush(self):
+        # every set is already committed (or will be, at end of batch),
+        # just don't hold on to copies others may have changed since
+        if self.local.batch_depth == 0:
+            self._expire(onlyUnchanged=True)
+
+    def flush(self):
+        '''
+            Write the keys of dirty parent dicts that changed (e.g. in
+            place) since they were read, then expire the cache.
+        '''
+        with self.lock:
+            dirtyKeys = [k for k in self.dirty if k in self.parents]
+            self.dirty = dict()
+        if not len(dirtyKeys):
+            return True
+
+        self.beginBatch()
+        success = False
+        try:
+            with psypnp.profile.span('nv save'):
+                psypnp.profile.count('nv: parent keys saved', len(dirtyKeys))
+                for parentKey in dirtyKeys:
+                    if parentKey in self.parents:
+                        self._writeChanges(parentKey)
+            success = True
+        except Exception as ex:
+            print("NV storage: problem saving data: %s" % str(ex))
+        finally:
+            self.endBatch(success)
+
+        if success:
+            self._expire()
+            self.num_writes += 1
+        return success
+
+    def close(self):
+        self.flush()
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def __repr__(self):
+        return '<SQLiteStore %s>' % str(self.filename)
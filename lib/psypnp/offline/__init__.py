@@ -0,0 +1,23 @@
+'''
+Running psypnp outside of OpenPnP: pure python stand-ins for the
+openpnp machine/configuration objects, synthetic shops to feed them
+and a benchmark suite built on those.
+
+  import psypnp.offline.openpnp
+  psypnp.offline.openpnp.install() # before importing other psypnp modules
+
+  import psypnp.offline.shop
+  shop = psypnp.offline.shop.generate_shop(numFeeders=600, numParts=2000)
+  shop.setup() # psypnp.globals.setup() with the fakes
+
+and then use psypnp modules as usual.  See psypnp.offline.benchmark
+for an example (and the benchmarks).
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
@@ -0,0 +1,301 @@
+'''
+Created on Oct 17, 2026
+
+Benchmarks for the psypnp library, on synthetic shops (see
+psypnp.offline.shop), at multiples of a typical setup: scale 1 is
+60 feeders (6 sets of 10), 200 parts in the configuration and a 30
+line BOM.
+
+Times, best of a few runs, in ms:
+  csv_parse       package/feed description CSVs and BOM, uncached
+  feed_sets       psypnp.auto.feed.feed_sets()
+  feeder_snapshot psypnp.snapshot.FeederSnapshot, every field read
+  feedmapper      psypnp.feedmap.feedmapper.FeedMapper.map(), with a
+                  fresh snapshot
+  search_index    first psypnp.search lookup, building the Index
+  search_lookups  100 part/feed name searches, on a built Index
+  workspace_setup Workspace, Project and setProject()
+  workspace_map   WorkspaceMapper.map(), greedy, 4 boards (slow at
+                  x100: minutes for the default 3 runs)
+  nv_save         a value per feeder set_subvalue()d, then saved
+
+along with the number of (stand-in) java calls each made.
+
+Run from the lib/ directory with
+  python -m psypnp.offline.benchmark [--scales 1,10,100] [--runs N]
+         [--only NAME,...] [--baseline FILE] [--save]
+
+Results are compared to those in the JSON baseline file (by default
+data/benchmark_baseline.json), if it exists, and written there with
+--save, along with the machine and interpreter they were taken on.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+
+import psypnp.offline.openpnp
+psypnp.offline.openpnp.install()
+
+from psypnp.offline.openpnp import JavaObject
+import psypnp.offline.shop
+
+import psypnp.debug
+import psypnp.globals
+import psypnp.csv_file
+import psypnp.search
+import psypnp.nv
+import psypnp.snapshot
+import psypnp.auto.feed
+import psypnp.auto.workspace
+import psypnp.feedmap.feedmapper
+import psypnp.project.workspace
+import psypnp.project.project
+from psypnp.project.bom_parsers import BOMParserKicad
+
+BaseNumFeeders = 60
+BaseNumParts = 200
+BaseNumBOMLines = 30
+NumBoards = 4
+
+DefaultBaselineFile = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   '..', '..', '..', 'data', 'benchmark_baseline.json')
+
+
+class BenchmarkContext:
+    '''
+        BenchmarkContext -- a shop, at some scale, and its files.
+    '''
+    def __init__(self, scale, basedir):
+        self.scale = scale
+        self.shop = psypnp.offline.shop.generate_shop(BaseNumFeeders * scale,
+                                                      BaseNumParts * scale,
+                                                      basedir=basedir)
+        self.feed_desc, self.package_desc, self.bom = self.shop.writeAll(
+                                                        BaseNumBOMLines * scale)
+        self.shop.setup()
+
+    def workspace(self):
+        wspace = psypnp.project.workspace.Workspace(self.package_desc, self.feed_desc)
+        wspace.setProject(psypnp.project.project.Project(self.bom, BOMParserKicad))
+        return wspace
+
+
+def bench_csv_parse(ctx):
+    def run():
+        psypnp.csv_file.PackageDescCSV(ctx.package_desc)
+        psypnp.csv_file.FeedDescCSV(ctx.feed_desc)
+        psypnp.csv_file.BOMCSV(ctx.bom, BOMParserKicad)
+    return (None, run)
+
+def bench_feed_sets(ctx):
+    return (None, psypnp.auto.feed.feed_sets)
+
+def bench_feeder_snapshot(ctx):
+    return (None, lambda: psypnp.snapshot.FeederSnapshot(readAll=True))
+
+def bench_feedmapper(ctx):
+    return (psypnp.snapshot.invalidate,
+            lambda: psypnp.feedmap.feedmapper.FeedMapper().map())
+
+def bench_search_index(ctx):
+    def run():
+        psypnp.search.parts_by_name('V000')
+        psypnp.search.feed_by_name('Bank001')
+    return (psypnp.search.invalidate_index, run)
+
+def bench_search_lookups(ctx):
+    parts = ctx.shop.configuration.parts
+    partIds = [parts[(i * 7919) % len(parts)].id for i in range(50)]
+    def run():
+        for pid in partIds:
+            # substring search, then exact
+            psypnp.search.parts_by_name(pid[-4:])
+            psypnp.search.feeds_by_partname(pid)
+    return (psypnp.search.get_sorted_feeders_list, run)
+
+def bench_workspace_setup(ctx):
+    return (None, ctx.workspace)
+
+def bench_workspace_map(ctx):
+    state = dict()
+    def prepare():
+        state['mapper'] = psypnp.auto.workspace.WorkspaceMapper(ctx.workspace())
+    def run():
+        state['mapper'].map(NumBoards, 'greedy', False)
+    return (prepare, run)
+
+def bench_nv_save(ctx):
+    numSets = len(ctx.shop.machine.feeders) // 10
+    def run():
+        with psypnp.nv.batch():
+            for i in range(numSets):
+                for v in range(10):
+                    psypnp.nv.set_subvalue('bench%i' % i, 'val%i' % v,
+                                           dict(idx=i, history=[v] * 10))
+        psypnp.nv.save_storage()
+    return (None, run)
+
+Benchmarks = [
+    ('csv_parse', bench_csv_parse),
+    ('feed_sets', bench_feed_sets),
+    ('feeder_snapshot', bench_feeder_snapshot),
+    ('feedmapper', bench_feedmapper),
+    ('search_index', bench_search_index),
+    ('search_lookups', bench_search_lookups),
+    ('workspace_setup', bench_workspace_setup),
+    ('workspace_map', bench_workspace_map),
+    ('nv_save', bench_nv_save),
+]
+
+def time_best(prepare, run, numRuns):
+    '''
+        @return: (best time in ms, java calls made in a run)
+    '''
+    best = None
+    calls = 0
+    for i in range(numRuns):
+        if prepare is not None:
+            prepare()
+        JavaObject.resetCallCount()
+        startTime = time.time()
+        run()
+        elapsed = (time.time() - startTime) * 1000.0
+        calls = JavaObject.num_calls
+        if best is None or elapsed < best:
+            best = elapsed
+    return (best, calls)
+
+def run(scales=(1, 10, 100), numRuns=3, only=None):
+    '''
+        @return: dict of scale (as a string, for JSON) -> benchmark
+                 name -> dict(ms, calls)
+    '''
+    # quiet, as when debug_output_level is raised
+    psypnp.debug.out.enabled = False
+    workDir = tempfile.mkdtemp(prefix='psybench')
+    results = dict()
+    try:
+        for scale in scales:
+            ctx = BenchmarkContext(scale, workDir)
+            print("Scale x%i: %i feeders, %i parts, %i BOM lines" % (
+                scale, len(ctx.shop.machine.feeders),
+                len(ctx.shop.configuration.parts), BaseNumBOMLines * scale))
+            scaleResults = dict()
+            for name, benchFactory in Benchmarks:
+                if only is not None and name not in only:
+                    continue
+                prepare, runFn = benchFactory(ctx)
+                ms, calls = time_best(prepare, runFn, numRuns)
+                scaleResults[name] = dict(ms=round(ms, 3), calls=calls)
+                print("  %-16s %10.2f ms %10i calls" % (name, ms, calls))
+            results[str(scale)] = scaleResults
+    finally:
+        psypnp.debug.out.enabled = True
+        shutil.rmtree(workDir, ignore_errors=True)
+    return results
+
+def load_baseline(fpath):
+    if not os.path.exists(fpath):
+        return None
+    fh = open(fpath, 'r')
+    try:
+        return json.load(fh)
+    finally:
+        fh.close()
+
+def _processor_name():
+    procName = platform.processor()
+    if not procName and os.path.exists('/proc/cpuinfo'):
+        # linux leaves platform.processor() empty
+        fh = open('/proc/cpuinfo', 'r')
+        try:
+            for line in fh:
+                if line.startswith('model name'):
+                    procName = line.split(':', 1)[1].strip()
+                    break
+        finally:
+            fh.close()
+    return procName
+
+def environment_info():
+    '''
+        @return: dict describing the machine and interpreter, to keep
+                 with a baseline
+    '''
+    return dict(machine=platform.machine(),
+                processor=_processor_name(),
+                system=platform.platform(),
+                interpreter='%s %s' % (platform.python_implementation(),
+                                       platform.python_version()))
+
+def save_baseline(fpath, results):
+    contents = dict(results)
+    contents['environment'] = environment_info()
+    fh = open(fpath, 'w')
+    try:
+        json.dump(contents, fh, indent=2, sort_keys=True)
+    finally:
+        fh.close()
+
+def compare(results, baseline):
+    '''
+        Print each result relative to the baseline's.
+    '''
+    print("Compared to baseline (time ratio, calls delta):")
+    if 'environment' in baseline:
+        env = baseline['environment']
+        print("  (baseline taken on %s, %s)" % (env.get('system'), env.get('interpreter')))
+    for scale in sorted(results, key=int):
+        if scale not in baseline:
+            continue
+        for name in sorted(results[scale]):
+            if name not in baseline[scale]:
+                continue
+            cur = results[scale][name]
+            base = baseline[scale][name]
+            ratio = cur['ms'] / base['ms'] if base['ms'] > 0 else 0.0
+            print("  x%-4s %-16s %6.2f  %+i" % (scale, name, ratio,
+                                              cur['calls'] - base['calls']))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='psypnp benchmarks, on synthetic shops')
+    parser.add_argument('--scales', default='1,10,100',
+                        help='comma-separated multiples of the base shop size')
+    parser.add_argument('--runs', type=int, default=3, help='best of how many runs')
+    parser.add_argument('--only', default=None, help='comma-separated benchmark names')
+    parser.add_argument('--baseline', default=DefaultBaselineFile,
+                        help='JSON baseline to compare to (and --save to)')
+    parser.add_argument('--save', action='store_true',
+                        help='record these results as the baseline')
+    args = parser.parse_args(argv)
+
+    only = None
+    if args.only:
+        only = [n.strip() for n in args.only.split(',')]
+    results = run([int(s) for s in args.scales.split(',')], args.runs, only)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None:
+        compare(results, baseline)
+    if args.save:
+        save_baseline(args.baseline, results)
+        print("Baseline saved to %s" % args.baseline)
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
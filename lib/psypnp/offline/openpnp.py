@@ -0,0 +1,446 @@
+'''
+Created on Oct 17, 2026
+
+Pure python stand-ins for the bits of openpnp (and javax.swing) that
+psypnp uses: Location, Length, Part, Package, the strip and push-pull
+feeders, Machine and Configuration.
+
+install() registers them as the org.openpnp.* and javax.swing modules,
+so psypnp modules import as they would inside OpenPnP.  It does nothing
+if the real thing is around.
+
+Every get*/set*/is* call on the stand-ins is tallied in
+JavaObject.num_calls, as an indication of how many trips across the
+jython/java bridge the same code would make on the machine.
+
+Only what psypnp actually calls is here, and it's only as smart as it
+needs to be for that: no motion, no vision, units are all mm.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import sys
+import math
+import types
+
+
+class JavaObject(object):
+    '''
+        JavaObject -- base for the stand-ins, counts bridge calls.
+    '''
+    num_calls = 0
+
+    def __getattribute__(self, name):
+        if name[:3] in ('get', 'set') or name[:2] == 'is':
+            JavaObject.num_calls += 1
+        return object.__getattribute__(self, name)
+
+    def toString(self):
+        return repr(self)
+
+    @staticmethod
+    def resetCallCount():
+        JavaObject.num_calls = 0
+
+
+class LengthUnit:
+    Millimeters = 'Millimeters'
+    Inches = 'Inches'
+
+
+class Length(JavaObject):
+    def __init__(self, value, units=LengthUnit.Millimeters):
+        self.value = value
+        self.units = units
+
+    def getValue(self):
+        return self.value
+
+    def getUnits(self):
+        return self.units
+
+    def convertToUnits(self, units):
+        return self
+
+    def add(self, other):
+        return Length(self.value + other.getValue(), self.units)
+
+    def subtract(self, other):
+        return Length(self.value - other.getValue(), self.units)
+
+    def __repr__(self):
+        return '%.4f%s' % (self.value, 'mm')
+
+
+class Location(JavaObject):
+    def __init__(self, units=LengthUnit.Millimeters, x=0.0, y=0.0, z=0.0, rotation=0.0):
+        self.units = units
+        self.x = x
+        self.y = y
+        self.z = z
+        self.rotation = rotation
+
+    def getUnits(self):
+        return self.units
+
+    def getX(self):
+        return self.x
+
+    def getY(self):
+        return self.y
+
+    def getZ(self):
+        return self.z
+
+    def getRotation(self):
+        return self.rotation
+
+    def convertToUnits(self, units):
+        return self
+
+    def add(self, other):
+        return Location(self.units, self.x + other.x, self.y + other.y,
+                        self.z + other.z, self.rotation + other.rotation)
+
+    def subtract(self, other):
+        return Location(self.units, self.x - other.x, self.y - other.y,
+                        self.z - other.z, self.rotation - other.rotation)
+
+    def getLinearDistanceTo(self, other):
+        return math.hypot(self.x - other.x, self.y - other.y)
+
+    def __repr__(self):
+        return '(%f, %f, %f, %f mm)' % (self.x, self.y, self.z, self.rotation)
+
+
+class Package(JavaObject):
+    def __init__(self, pkgId):
+        self.id = pkgId
+
+    def getId(self):
+        return self.id
+
+    def __repr__(self):
+        return self.id
+
+
+class Part(JavaObject):
+    def __init__(self, partId, package=None, height=1.0):
+        self.id = partId
+        self.package = package
+        self.height = Length(height)
+
+    def getId(self):
+        return self.id
+
+    def getName(self):
+        return self.id
+
+    def getPackage(self):
+        return self.package
+
+    def setPackage(self, package):
+        self.package = package
+
+    def getHeight(self):
+        return self.height
+
+    def __repr__(self):
+        return self.id
+
+
+class TapeType:
+    WhitePaper = 'WhitePaper'
+    BlackPlastic = 'BlackPlastic'
+    ClearPlastic = 'ClearPlastic'
+
+
+class Feeder(JavaObject):
+    '''
+        Feeder -- the bits all openpnp feeders have.
+    '''
+    def __init__(self, name, location, part=None, enabled=True):
+        self.id = 'FDR%s' % name
+        self.name = name
+        self.location = location
+        self.part = part
+        self.enabled = enabled
+
+    def getId(self):
+        return self.id
+
+    def getName(self):
+        return self.name
+
+    def setName(self, name):
+        self.name = name
+
+    def getPart(self):
+        return self.part
+
+    def setPart(self, part):
+        self.part = part
+
+    def isEnabled(self):
+        return self.enabled
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+
+    def getLocation(self):
+        return self.location
+
+    def setLocation(self, location):
+        self.location = location
+
+    def getPickLocation(self):
+        return self.location
+
+    def getClass(self):
+        return type(self)
+
+    def __repr__(self):
+        return '%s %s' % (type(self).__name__, self.name)
+
+
+class ReferenceStripFeeder(Feeder):
+    TapeType = TapeType
+
+    def __init__(self, name, referenceHole, holePitch=(4.0, 0.0),
+                 part=None, enabled=True):
+        Feeder.__init__(self, name, referenceHole, part, enabled)
+        self.referenceHoleLocation = referenceHole
+        lastHole = Location(referenceHole.units,
+                            referenceHole.x + holePitch[0],
+                            referenceHole.y + holePitch[1],
+                            referenceHole.z)
+        self.lastHoleLocation = lastHole
+        # openpnp works these out from the holes, we just keep them
+        self.idealLineLocations = [referenceHole, lastHole]
+        self.feedCount = 0
+        self.maxFeedCount = 0
+        self.tapeType = TapeType.WhitePaper
+
+    def getReferenceHoleLocation(self):
+        return self.referenceHoleLocation
+
+    def setReferenceHoleLocation(self, location):
+        self.referenceHoleLocation = location
+
+    def getLastHoleLocation(self):
+        return self.lastHoleLocation
+
+    def getFeedCount(self):
+        return self.feedCount
+
+    def setFeedCount(self, count):
+        self.feedCount = count
+
+    def getMaxFeedCount(self):
+        return self.maxFeedCount
+
+    def setMaxFeedCount(self, count):
+        self.maxFeedCount = count
+
+    def getTapeType(self):
+        return self.tapeType
+
+    def setTapeType(self, tapeType):
+        self.tapeType = tapeType
+
+
+class ReferencePushPullFeeder(Feeder):
+    def __init__(self, name, location, part=None, enabled=True):
+        Feeder.__init__(self, name, location, part, enabled)
+        self.hole1Location = location
+        self.feedCount = 0
+
+    def getHole1Location(self):
+        return self.hole1Location
+
+    def getFeedCount(self):
+        return self.feedCount
+
+    def setFeedCount(self, count):
+        self.feedCount = count
+
+
+class Machine(JavaObject):
+    def __init__(self, feeders=None):
+        self.feeders = feeders if feeders is not None else []
+        self.defaultHead = None
+        self.speed = 1.0
+
+    def getFeeders(self):
+        return self.feeders
+
+    def getDefaultHead(self):
+        return self.defaultHead
+
+    def getMotionPlanner(self):
+        return None
+
+    def getCameras(self):
+        return []
+
+    def isHomed(self):
+        return True
+
+    def getSpeed(self):
+        return self.speed
+
+    def setSpeed(self, speed):
+        self.speed = speed
+
+
+class Configuration(JavaObject):
+    def __init__(self, machine, parts=None, packages=None):
+        self.machine = machine
+        self.parts = parts if parts is not None else []
+        self.packages = packages if packages is not None else []
+        self.parts_by_id = dict([(p.id, p) for p in self.parts])
+
+    def getMachine(self):
+        return self.machine
+
+    def getParts(self):
+        return self.parts
+
+    def getPart(self, partId):
+        return self.parts_by_id.get(partId)
+
+    def getPackages(self):
+        return self.packages
+
+    def getPackage(self, pkgId):
+        for pkg in self.packages:
+            if pkg.id == pkgId:
+                return pkg
+        return None
+
+    def addPart(self, part):
+        self.parts.append(part)
+        self.parts_by_id[part.id] = part
+
+
+class ScriptsDirectory:
+    def __init__(self, path):
+        self.path = path
+
+    def toString(self):
+        return self.path
+
+
+class Scripting:
+    def __init__(self, scriptsDir):
+        self.scripts_dir = ScriptsDirectory(scriptsDir)
+
+    def getScriptsDirectory(self):
+        return self.scripts_dir
+
+
+class CompletionType:
+    WaitForStillstand = 'WaitForStillstand'
+
+
+class PlacementType:
+    Placement = 'Placement'
+    Fiducial = 'Fiducial'
+
+
+class UiUtils:
+    @staticmethod
+    def submitUiMachineTask(task):
+        # no machine thread here, just run it
+        return task()
+
+
+class MovableUtils:
+    @staticmethod
+    def moveToLocationAtSafeZ(movable, location, speed=1.0):
+        pass
+
+
+class HeadlessOptionPane:
+    '''
+        HeadlessOptionPane -- javax.swing.JOptionPane, without a screen:
+        messages are printed, inputs and options return the defaults.
+    '''
+    ERROR_MESSAGE = 0
+    INFORMATION_MESSAGE = 1
+    QUESTION_MESSAGE = 3
+    DEFAULT_OPTION = -1
+
+    @staticmethod
+    def showMessageDialog(parent, msg, title=None, msgType=None):
+        print(str(msg))
+
+    @staticmethod
+    def showInputDialog(msg, defaultValue=None):
+        return defaultValue
+
+    @staticmethod
+    def showOptionDialog(parent, message, title, optType, msgType, icon,
+                         options, optDefault):
+        if options is None or optDefault not in options:
+            return 0
+        return list(options).index(optDefault)
+
+
+def _module(name, **contents):
+    mod = types.ModuleType(name)
+    for attr in contents:
+        setattr(mod, attr, contents[attr])
+    return mod
+
+def have_openpnp():
+    try:
+        import org.openpnp.model
+        return True
+    except ImportError:
+        return False
+
+def install():
+    '''
+        Register the stand-ins as org.openpnp.* and javax.swing modules,
+        unless the real ones are importable.
+        @return: True if stand-ins were installed
+    '''
+    if 'org.openpnp.model' in sys.modules or have_openpnp():
+        return False
+
+    optPane = HeadlessOptionPane
+    modules = [
+        _module('org'),
+        _module('org.openpnp'),
+        _module('org.openpnp.model', Location=Location, Length=Length,
+                LengthUnit=LengthUnit, Part=Part, Package=Package),
+        _module('org.openpnp.model.Placement', Type=PlacementType),
+        _module('org.openpnp.machine'),
+        _module('org.openpnp.machine.reference'),
+        _module('org.openpnp.machine.reference.feeder',
+                ReferenceStripFeeder=ReferenceStripFeeder,
+                ReferencePushPullFeeder=ReferencePushPullFeeder),
+        _module('org.openpnp.util', UiUtils=UiUtils, MovableUtils=MovableUtils),
+        _module('org.openpnp.util.UiUtils',
+                submitUiMachineTask=UiUtils.submitUiMachineTask),
+        _module('org.openpnp.spi'),
+        _module('org.openpnp.spi.MotionPlanner', CompletionType=CompletionType),
+        _module('javax'),
+        _module('javax.swing'),
+        _module('javax.swing.JOptionPane',
+                **dict([(a, getattr(optPane, a)) for a in dir(optPane)
+                        if not a.startswith('_')])),
+    ]
+    for mod in modules:
+        sys.modules[mod.__name__] = mod
+        parentName, _sep, childName = mod.__name__.rpartition('.')
+        if parentName:
+            setattr(sys.modules[parentName], childName, mod)
+
+    return True
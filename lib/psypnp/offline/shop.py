@@ -0,0 +1,203 @@
+'''
+Created on Oct 17, 2026
+
+Synthetic shops: a machine full of strip feeders, in named sets, and a
+configuration full of parts, plus the feed/package description CSVs
+and BOMs that go with them.
+
+  shop = generate_shop(numFeeders=60, numParts=200)
+  shop.setup()
+  bom = shop.writeBOM(30)
+
+Feeders are grouped in sets of feedSetSize (8mmBank003_01,
+8mmBank003_02... one set in five is 12mm), laid out on a grid.  Part
+ids are PACKAGE-VALUE, as PartMap expects from kicad BOMs, and about
+loadedFraction of the feeders start out holding some part.
+
+Everything (CSVs, BOMs, NV storage, CSV cache) lives under a temporary
+base directory, removed by cleanup().  Same seed, same shop.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import os
+import random
+import shutil
+import tempfile
+
+from psypnp.offline.openpnp import (Location, Package, Part, ReferenceStripFeeder,
+                                    Machine, Configuration, Scripting)
+
+# package id -> (tape width, pitch, tape type), as in data/package_desc.csv
+Packages = [
+    ('0402', 8, 2, 'white'),
+    ('0603', 8, 4, 'white'),
+    ('0805', 8, 4, 'white'),
+    ('1206', 8, 4, 'black'),
+    ('SOT-23', 8, 4, 'black'),
+    ('SOIC-8', 12, 8, 'clear'),
+]
+
+# feed description name -> (tape width, length)
+FeedDescriptions = [
+    ('8mmBank', 8, 85),
+    ('12mmBank', 12, 150),
+]
+
+
+class Shop:
+    '''
+        Shop -- a fake machine and configuration, and a base directory
+        for the files that go with them.
+    '''
+    def __init__(self, machine, configuration, basedir, seed=1):
+        self.machine = machine
+        self.configuration = configuration
+        self.basedir = basedir
+        self.scripting = Scripting(os.path.join(basedir, 'scripts'))
+        self.seed = seed
+
+    def setup(self):
+        '''
+            psypnp.globals.setup() with this shop, as the boiler plate
+            does in scripts.
+        '''
+        import psypnp.globals
+        psypnp.globals.setup(self.machine, self.configuration, self.scripting, None)
+
+    def path(self, relpath):
+        return os.path.join(self.basedir, relpath)
+
+    def _writeLines(self, relpath, lines):
+        fpath = self.path(relpath)
+        if not os.path.isdir(os.path.dirname(fpath)):
+            os.makedirs(os.path.dirname(fpath))
+        fh = open(fpath, 'w')
+        try:
+            fh.write('\n'.join(lines))
+            fh.write('\n')
+        finally:
+            fh.close()
+        return fpath
+
+    def writeFeedDescCSV(self, relpath='data/feed_desc.csv'):
+        '''
+            @return: full path to the feed description CSV written
+        '''
+        lines = ['# Feedname,width (mm),length (mm),enabled (TRUE/FALSE),comment']
+        for name, width, length in FeedDescriptions:
+            lines.append('%s,%i,%i,TRUE,' % (name, width, length))
+        return self._writeLines(relpath, lines)
+
+    def writePackageDescCSV(self, relpath='data/package_desc.csv'):
+        '''
+            @return: full path to the package description CSV written
+        '''
+        lines = ['# package, width, pitch, tape type']
+        for pkgId, width, pitch, tape in Packages:
+            lines.append('%s,%i,%i,%s' % (pkgId, width, pitch, tape))
+        return self._writeLines(relpath, lines)
+
+    def writeBOM(self, numLines, relpath='data/bom.csv', maxQty=10):
+        '''
+            writeBOM(NUMLINES, [RELPATH], [MAXQTY])
+            Write a kicad-style BOM using numLines distinct parts from
+            the configuration (all of them, if there are fewer).
+            @return: full path to the BOM
+        '''
+        rnd = random.Random(self.seed + numLines)
+        parts = self.configuration.parts
+        chosen = rnd.sample(parts, min(numLines, len(parts)))
+        lines = ['#Item,Qty,Reference(s),Value,LibPart,Footprint']
+        refNum = 1
+        for i in range(len(chosen)):
+            part = chosen[i]
+            pkgId = part.package.id
+            value = part.id[len(pkgId) + 1:]
+            qty = rnd.randint(1, maxQty)
+            refs = ' '.join(['U%i' % r for r in range(refNum, refNum + qty)])
+            refNum += qty
+            lines.append('%i,%i,"%s",%s,Lib:%s,Lib:%s' % (i + 1, qty, refs, value,
+                                                         value, pkgId))
+        return self._writeLines(relpath, lines)
+
+    def writeAll(self, numBOMLines):
+        '''
+            Write the feed/package description CSVs and a BOM.
+            @return: (feed desc, package desc, bom) full paths
+        '''
+        return (self.writeFeedDescCSV(), self.writePackageDescCSV(),
+                self.writeBOM(numBOMLines))
+
+    def cleanup(self):
+        shutil.rmtree(self.basedir, ignore_errors=True)
+
+    def __repr__(self):
+        return '<Shop %i feeders, %i parts in %s>' % (len(self.machine.feeders),
+                                                      len(self.configuration.parts),
+                                                      self.basedir)
+
+
+def generate_parts(numParts, rnd):
+    '''
+        @return: (list of Package, list of Part), parts spread over the
+                 packages
+    '''
+    packages = [Package(p[0]) for p in Packages]
+    parts = []
+    for i in range(numParts):
+        pkg = packages[rnd.randrange(len(packages))]
+        parts.append(Part('%s-V%05i' % (pkg.id, i), pkg, 0.5 + rnd.random()))
+    return (packages, parts)
+
+def generate_feeders(numFeeders, parts, rnd, feedSetSize=10, loadedFraction=0.5):
+    '''
+        @return: list of ReferenceStripFeeder, in sets of feedSetSize
+    '''
+    widthOf = dict([(p[0], p[1]) for p in Packages])
+    partsByWidth = dict()
+    for part in parts:
+        partsByWidth.setdefault(widthOf[part.package.id], []).append(part)
+
+    numSets = (numFeeders + feedSetSize - 1) // feedSetSize
+    setsPerRow = 10
+    feeders = []
+    for setIdx in range(numSets):
+        width = 12 if setIdx % 5 == 4 else 8
+        baseX = (setIdx % setsPerRow) * 150.0
+        baseY = (setIdx // setsPerRow) * 100.0
+        for slot in range(feedSetSize):
+            if len(feeders) >= numFeeders:
+                break
+            hole = Location(x=baseX + slot * (width + 2.0), y=baseY, z=-20.0)
+            feeder = ReferenceStripFeeder('%immBank%03i_%02i' % (width, setIdx, slot + 1),
+                                          hole, holePitch=(0.0, 4.0))
+            candidates = partsByWidth.get(width)
+            if candidates and rnd.random() < loadedFraction:
+                feeder.setPart(rnd.choice(candidates))
+                feeder.setMaxFeedCount(20)
+            feeders.append(feeder)
+    return feeders
+
+def generate_shop(numFeeders=60, numParts=200, feedSetSize=10, loadedFraction=0.5,
+                  seed=1, basedir=None):
+    '''
+        generate_shop([NUMFEEDERS], [NUMPARTS], [FEEDSETSIZE], [LOADEDFRACTION],
+                      [SEED], [BASEDIR])
+        @return: a Shop (base directory a new temp dir, if not specified)
+    '''
+    rnd = random.Random(seed)
+    packages, parts = generate_parts(numParts, rnd)
+    feeders = generate_feeders(numFeeders, parts, rnd, feedSetSize, loadedFraction)
+    machine = Machine(feeders)
+    configuration = Configuration(machine, parts, packages)
+    if basedir is None:
+        basedir = tempfile.mkdtemp(prefix='psyshop')
+    if not os.path.isdir(os.path.join(basedir, 'scripts')):
+        os.makedirs(os.path.join(basedir, 'scripts'))
+    return Shop(machine, configuration, basedir, seed)
@@ -0,0 +1,277 @@
+'''
+Created on Oct 17, 2026
+
+Timing spans, to see where a script spends its time.
+
+Stages are wrapped in spans, either as a context manager
+
+  with psypnp.profile.span('csv load'):
+      ...
+
+or as a decorator
+
+  @psypnp.profile.timed('FeedManager.apply')
+  def apply(self, dryRun=False):
+      ...
+
+Spans nest, so you get a tree of stages with the total time and
+number of calls for each.  Calls across to java (feeder setters and
+such) can be tallied with
+
+  psypnp.profile.count('java: feeder setter calls')
+
+which is done for the feeder reads made by psypnp.snapshot (so the
+feed mapper) and the psypnp.search Index, the part/package reads of
+the latter, feeder setters applied by the project FeedManager and NV
+storage loads and saves.  Reads made directly by scripts, or other
+modules, aren't counted: the java counts are a lower bound.
+
+and, at the end of the script,
+
+  psypnp.profile.finish()
+
+prints the tree and counts.  If user_config profile_dump_file is set,
+the whole run (from psypnp.profile.begin()) is also cProfile'd and the
+stats dumped there, for a look with pstats.
+
+All of this only happens when user_config profile_enabled is True:
+otherwise span() hands back a shared do-nothing object and count()
+returns straight away, so the instrumentation can stay in place.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+from __future__ import absolute_import
+
+import time
+import threading
+
+import psypnp.user_config as user_prefs
+
+Enabled = user_prefs.profile_enabled
+
+
+class SpanNode:
+    '''
+        SpanNode -- one stage in the timing tree, with the total time
+        spent and number of times it was entered, under its parent.
+    '''
+    def __init__(self, name):
+        self.name = name
+        self.total = 0.0
+        self.calls = 0
+        self.children = []
+        self._childrenByName = dict()
+
+    def child(self, name):
+        if name not in self._childrenByName:
+            node = SpanNode(name)
+            self._childrenByName[name] = node
+            self.children.append(node)
+        return self._childrenByName[name]
+
+    def selfTime(self):
+        '''
+            @return: time spent here, but not in any child span
+        '''
+        return self.total - sum([c.total for c in self.children])
+
+    def __repr__(self):
+        return '<SpanNode %s %.3fs (%i)>' % (self.name, self.total, self.calls)
+
+
+class Profiler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.root = SpanNode('total')
+        self.counts = dict()
+        self.count_order = []
+        self.start_time = time.time()
+        # stack of open spans, per thread (nv write-behind flushes
+        # happen in a timer thread)
+        self.local = threading.local()
+        self.cprofiler = None
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = [self.root]
+            self.local.stack = stack
+        return stack
+
+    def enter(self, name):
+        stack = self._stack()
+        with self.lock:
+            node = stack[-1].child(name)
+        stack.append(node)
+        return node
+
+    def leave(self, node, elapsed):
+        stack = self._stack()
+        if len(stack) > 1 and stack[-1] is node:
+            stack.pop()
+        with self.lock:
+            node.total += elapsed
+            node.calls += 1
+
+    def count(self, name, n=1):
+        with self.lock:
+            if name not in self.counts:
+                self.counts[name] = 0
+                self.count_order.append(name)
+            self.counts[name] += n
+
+    def report(self):
+        '''
+            @return: timing tree and counts, as text
+        '''
+        self.root.total = time.time() - self.start_time
+        self.root.calls = 1
+        lines = ['Timing (seconds, calls, self):']
+        self._reportNode(self.root, 0, lines)
+        if len(self.count_order):
+            lines.append('Counts:')
+            for name in self.count_order:
+                lines.append('  %-40s %8i' % (name, self.counts[name]))
+        return '\n'.join(lines)
+
+    def _reportNode(self, node, depth, lines):
+        label = '%s%s' % ('  ' * (depth + 1), node.name)
+        lines.append('%-42s %8.3f %6i %8.3f' % (label, node.total, node.calls,
+                                                 node.selfTime()))
+        for child in node.children:
+            self._reportNode(child, depth + 1, lines)
+
+
+class Span:
+    '''
+        Span -- a timed stage, see span().
+    '''
+    def __init__(self, name):
+        self.name = name
+        self.node = None
+        self.start = 0
+
+    def __enter__(self):
+        self.node = _profiler.enter(self.name)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, excType, excVal, tb):
+        _profiler.leave(self.node, time.time() - self.start)
+        return False
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excVal, tb):
+        return False
+
+
+_profiler = Profiler()
+_nullSpan = NullSpan()
+
+
+def span(name):
+    '''
+        with span(NAME):
+            ...
+        time whatever's in the block, as stage name (under any
+        enclosing span).
+    '''
+    if not Enabled:
+        return _nullSpan
+    return Span(name)
+
+def timed(name=None):
+    '''
+        @timed([NAME])
+        decorator, times each call of the function as a span (named
+        after the function, if name isn't specified).
+    '''
+    def decorator(func):
+        spanName = name if name is not None else func.__name__
+
+        def wrapper(*args, **kwargs):
+            if not Enabled:
+                return func(*args, **kwargs)
+            with Span(spanName):
+                return func(*args, **kwargs)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
+
+def count(name, n=1):
+    '''
+        count(NAME, [N])
+        tally n more of name (e.g. calls across to java).
+    '''
+    if not Enabled:
+        return
+    _profiler.count(name, n)
+
+def begin():
+    '''
+        Start the clock (and cProfile, if user_config profile_dump_file
+        is set) for this script run.
+    '''
+    if not Enabled:
+        return
+    _profiler.reset()
+    if user_prefs.profile_dump_file:
+        try:
+            import cProfile as profileModule
+        except ImportError:
+            import profile as profileModule
+        prof = profileModule.Profile()
+        if not hasattr(prof, 'enable'):
+            print("No cProfile here, only timing spans")
+            return
+        _profiler.cprofiler = prof
+        prof.enable()
+
+def report():
+    '''
+        @return: the timing tree and counts, as text (None if
+                 profiling isn't enabled)
+    '''
+    if not Enabled:
+        return None
+    return _profiler.report()
+
+def finish():
+    '''
+        Print the report and dump the cProfile stats, if any.
+    '''
+    if not Enabled:
+        return
+
+    prof = _profiler.cprofiler
+    if prof is not None:
+        prof.disable()
+        _profiler.cprofiler = None
+        dumpFile = user_prefs.profile_dump_file
+        try:
+            import psypnp.globals
+            dumpFile = psypnp.globals.fullpathFromRelative(dumpFile)
+        except ImportError:
+            pass
+        try:
+            prof.dump_stats(dumpFile)
+            print("Profile stats dumped to %s" % dumpFile)
+        except Exception as ex:
+            print("Could not dump profile stats to %s: %s" % (dumpFile, str(ex)))
+
+    print(_profiler.report())
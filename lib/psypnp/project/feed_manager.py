@@ -8,6 +8,8 @@ Part of the psypnp OpenPnP scripting modules project
 
 '''
 import psypnp.debug
+import psypnp.profile
+import psypnp.search
 
 import psypnp.auto.feed
 
@@ -49,20 +51,138 @@ class FeedSwapper:
             srcFeed.setTapeType(dstTape)
             
     
+def tape_type_for(finfo):
+    '''
+        @return: the ReferenceStripFeeder.TapeType for the package associated 
+                 with finfo, None if unspecified or unknown
+    '''
+    pkgDesc = finfo.associated_part.package_description
+    if pkgDesc is None or not pkgDesc.tapetype:
+        return None
+    
+    ttypeMap = dict(
+        white=ReferenceStripFeeder.TapeType.WhitePaper,
+        black=ReferenceStripFeeder.TapeType.BlackPlastic,
+        clear=ReferenceStripFeeder.TapeType.ClearPlastic
+    )
+    if pkgDesc.tapetype not in ttypeMap:
+        psypnp.debug.out.buffer("Unknown tapetype '%s' ?" % str(pkgDesc.tapetype))
+        return None
+    return ttypeMap[pkgDesc.tapetype]
+
+def _set_rotation(opnpFeed, rotation):
+    oldLoc = opnpFeed.getLocation()
+    opnpFeed.setLocation(Location(oldLoc.getUnits(), 
+                                  oldLoc.getX(),
+                                  oldLoc.getY(),
+                                  oldLoc.getZ(),
+                                  rotation))
+
+# field name -> setter(opnpFeed, value), FeedChange fields are applied in 
+# the order they were added
+FeedFieldSetters = dict(
+    enabled=lambda f, v: f.setEnabled(v),
+    part=lambda f, v: f.setPart(v),
+    maxfeedcount=lambda f, v: f.setMaxFeedCount(v),
+    feedcount=lambda f, v: f.setFeedCount(v),
+    rotation=_set_rotation,
+    tapetype=lambda f, v: f.setTapeType(v)
+)
+
+class FeedChange:
+    '''
+        FeedChange -- the fields to change on a feeder, as 
+        (field, current value, new value)
+    '''
+    def __init__(self, finfo):
+        self.feed_info = finfo
+        self.feed = finfo.feed
+        self.fields = []
+        
+    def add(self, field, curVal, newVal):
+        self.fields.append((field, curVal, newVal))
+        
+    def compare(self, field, curVal, newVal):
+        if curVal != newVal:
+            self.add(field, curVal, newVal)
+    
+    def isEmpty(self):
+        return not len(self.fields)
+    
+    def apply(self):
+        for field, curVal, newVal in self.fields:
+            FeedFieldSetters[field](self.feed, newVal)
+        psypnp.profile.count('java: feeder setter calls', len(self.fields))
+    
+    def _valueString(self, val):
+        if val is not None and hasattr(val, 'getId'):
+            return str(val.getId())
+        return str(val)
+    
+    def describe(self):
+        return ', '.join(['%s %s -> %s' % (f[0], self._valueString(f[1]), 
+                                           self._valueString(f[2])) 
+                          for f in self.fields])
+    
+    def __repr__(self):
+        return '<FeedChange %s: %s>' % (self.feed_info.name, self.describe())
+
+class ChangePlan:
+    '''
+        ChangePlan -- FeedChanges for the feeders that need some, and 
+        a count of those that don't (or are to be left untouched).
+    '''
+    def __init__(self):
+        self.changes = []
+        self.num_skipped = 0
+        
+    def add(self, change):
+        if change.isEmpty():
+            self.num_skipped += 1
+            return
+        self.changes.append(change)
+    
+    def skip(self, finfo):
+        self.num_skipped += 1
+        
+    def numTouched(self):
+        return len(self.changes)
+    
+    def numSkipped(self):
+        return self.num_skipped
+    
+    def numSetterCalls(self):
+        return sum([len(c.fields) for c in self.changes])
+    
+    def summary(self):
+        return '%i feeders to change (%i setter calls), %i skipped' % (
+                        self.numTouched(), self.numSetterCalls(), self.numSkipped())
+    
+    def dump(self):
+        for change in self.changes:
+            psypnp.debug.out.buffer("\t%s\t%s" % (change.feed_info.name, change.describe()))
+        psypnp.debug.out.flush(self.summary())
+    
+    def __repr__(self):
+        return '<ChangePlan %s>' % self.summary()
+
 class FeedManager:
     
     def __init__(self):
-        self.sets = psypnp.auto.feed.feed_sets()
-        self.by_distance_list = psypnp.auto.feed.feeds_by_distance()
+        with psypnp.profile.span('feed sets'):
+            self.sets = psypnp.auto.feed.feed_sets()
+            self.by_distance_list = psypnp.auto.feed.feeds_by_distance()
         self.num_feeds_processed = 0
         self.num_feeds_enabled = 0
         self.num_feeds_disabled = 0
+        self.num_feeds_kept = 0
         
         
     def resetFeedStats(self):
         self.num_feeds_processed = 0
         self.num_feeds_enabled = 0
         self.num_feeds_disabled = 0
+        self.num_feeds_kept = 0
         
         
     def numFeedsProcessed(self):
@@ -71,86 +191,96 @@ class FeedManager:
         return self.num_feeds_enabled
     def numFeedsDisabled(self):
         return self.num_feeds_disabled
+    def numFeedsKept(self):
+        return self.num_feeds_kept
     
-    def apply(self):
+    def plan(self):
+        '''
+            plan
+            Work out what apply() needs to change, feeder by feeder, 
+            without touching anything.
+            @return: a ChangePlan, with a FeedChange for each feeder that 
+            has at least one field differing from what we want.
+        '''
         self.resetFeedStats()
-        psypnp.debug.out.flush("Applying feed set changes... ")
+        changePlan = ChangePlan()
         for feedset in self.sets.entries():
-            psypnp.debug.out.flush("Handling feed set %s" % str(feedset))
             for finfo in feedset.entries():
                 self.num_feeds_processed += 1
-                psypnp.debug.out.buffer("Feed %s: " % str(finfo))
-                
                 if finfo.leave_unmodified:
-                    psypnp.debug.out.flush('Feed will be left untouched')
+                    changePlan.skip(finfo)
                     continue
                 
                 opnpFeed = finfo.feed
+                change = FeedChange(finfo)
                 if finfo.available():
-                    psypnp.debug.out.flush("disabling")
                     self.num_feeds_disabled += 1
-                    opnpFeed.setEnabled(False)
+                    change.compare('enabled', opnpFeed.isEnabled(), False)
+                    changePlan.add(change)
                     continue
                 
-                
                 self.num_feeds_enabled += 1
-                #enable feed
-                psypnp.debug.out.buffer("enabling")
-                opnpFeed.setEnabled(True)
-
-
-                # set part
-                opnpPart = finfo.associated_part.part
-                
+                change.compare('enabled', opnpFeed.isEnabled(), True)
+                if finfo.kept:
+                    # part was already in here (incremental mapping): 
+                    # leave count, rotation and tape as they are
+                    self.num_feeds_kept += 1
+                    changePlan.add(change)
+                    continue
                 
+                opnpPart = finfo.associated_part.part
+                curPart = opnpFeed.getPart()
+                if curPart is None or curPart.getId() != opnpPart.getId():
+                    change.add('part', curPart, opnpPart)
                 
-                psypnp.debug.out.buffer("setting part to %s" % str(opnpPart))
-                opnpFeed.setPart(opnpPart)
                 if hasattr(opnpFeed, 'setMaxFeedCount'):
-                    opnpFeed.setMaxFeedCount(finfo.associated_part_maxcapacity)
-                    psypnp.debug.out.buffer("Reset feed count to 0")
-                    opnpFeed.setFeedCount(0)
+                    curMax = None
+                    if hasattr(opnpFeed, 'getMaxFeedCount'):
+                        curMax = opnpFeed.getMaxFeedCount()
+                    change.compare('maxfeedcount', curMax, finfo.associated_part_maxcapacity)
+                    change.compare('feedcount', opnpFeed.getFeedCount(), 0)
                 
-                # reset rotation
-                
-                psypnp.debug.out.buffer("zeroing rotation")
                 if hasattr(opnpFeed, 'setLocation'):
-                    oldLoc = opnpFeed.getLocation()
-                    newLocation = Location(oldLoc.getUnits(), 
-                                           oldLoc.getX(),
-                                           oldLoc.getY(),
-                                           oldLoc.getZ(),
-                                           0.0)
-                    opnpFeed.setLocation(newLocation)
-                
-                
+                    change.compare('rotation', opnpFeed.getLocation().getRotation(), 0.0)
                 
-                # set tape type for feed, if we can
-                psypnp.debug.out.buffer("TapeType... ", False)
-                if finfo.associated_part.package_description is not None \
-                    and finfo.associated_part.package_description.tapetype:
-                    
-                    if hasattr(opnpFeed, 'setTapeType'):
-                        ttypeMap = dict(
-                            white=ReferenceStripFeeder.TapeType.WhitePaper,
-                            black=ReferenceStripFeeder.TapeType.BlackPlastic,
-                            clear=ReferenceStripFeeder.TapeType.ClearPlastic
-                            
-                        )
-                        ttype = finfo.associated_part.package_description.tapetype
-                        if ttype in ttypeMap:
-                            
-                            psypnp.debug.out.buffer("setting tapetype to %s" % ttype)
-                            opnpFeed.setTapeType(ttypeMap[ttype])
-                        else:
-                            psypnp.debug.out.buffer("Could not set tapetype to '%s' ?" % str(ttype))
-                else:
-                    psypnp.debug.out.buffer("No tapetype specified?  Skipping")
-                    
-                psypnp.debug.out.flush("Done with feed.")
+                ttype = tape_type_for(finfo)
+                if ttype is not None and hasattr(opnpFeed, 'setTapeType'):
+                    change.compare('tapetype', opnpFeed.getTapeType(), ttype)
                 
-            psypnp.debug.out.flush("Done applying to all feed sets.")
+                changePlan.add(change)
+        
+        return changePlan
+    
+    @psypnp.profile.timed('FeedManager.apply')
+    def apply(self, dryRun=False):
+        '''
+            apply([DRYRUN])
+            Compute the change plan and, unless dryRun, make the changes: 
+            only the setters for fields that actually differ get called, 
+            all in one go once the plan is done.
+            @return: the ChangePlan
+        '''
+        psypnp.debug.out.flush("Planning feed set changes... ")
+        changePlan = self.plan()
+        
+        if dryRun:
+            psypnp.debug.out.flush("Dry run, would do:")
+            changePlan.dump()
+            return changePlan
+        
+        psypnp.debug.out.flush("Applying feed set changes: %s" % changePlan.summary())
+        for change in changePlan.changes:
+            psypnp.debug.out.buffer("Feed %s: %s" % (change.feed_info.name, change.describe()))
+            change.apply()
             
+        psypnp.debug.out.flush("Done applying to all feed sets.")
+        
+        if changePlan.numTouched():
+            # part associations changed, search index is out of date
+            psypnp.search.invalidate_index()
+        
+        return changePlan
+    
     def dump(self):
         psypnp.debug.out.buffer("\n\n")
         for feedset in self.sets.entries():
@@ -167,8 +297,10 @@ class FeedManager:
                                             finfo.associatedPartQuantity(),
                                              str(finfo.distance_from_centroid)))
                     else:
-                        psypnp.debug.out.flush("\t%s\t[%s] %s (%i/board)\t@%s\n" % 
-                                            (finfo.name,  finfo.associatedPackageName(),
+                        psypnp.debug.out.flush("\t%s\t%s[%s] %s (%i/board)\t@%s\n" % 
+                                            (finfo.name,  
+                                             '[KEPT] ' if finfo.kept else '',
+                                             finfo.associatedPackageName(),
                                             finfo.associatedPartValue(),
                                             finfo.associatedPartQuantity(),
                                              str(finfo.distance_from_centroid)))
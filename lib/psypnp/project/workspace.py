@@ -9,22 +9,31 @@ Part of the psypnp OpenPnP scripting modules project
 
 import psypnp.csv_file
 import psypnp.debug
+import psypnp.profile
+import psypnp.auto.feed
+import psypnp.auto.travel
 from psypnp.project.feed_manager import FeedManager
 
 class Workspace:
     
+    @psypnp.profile.timed('Workspace.__init__')
     def __init__(self, 
                  package_desc_filename, 
                  feed_desc_filename):
         self.feeds = FeedManager()
         
-        self.package_descriptions = psypnp.csv_file.PackageDescCSV(package_desc_filename)
-        self.feed_descriptions = psypnp.csv_file.FeedDescCSV(feed_desc_filename)
+        with psypnp.profile.span('csv descriptions'):
+            self.package_descriptions = psypnp.csv_file.cached_package_desc(package_desc_filename)
+            self.feed_descriptions = psypnp.csv_file.cached_feed_desc(feed_desc_filename)
         
         self.csv_success = self.package_descriptions.isOK() and self.feed_descriptions.isOK()
         
         self.project = None
         self.ignoreProjectOKStatus = False
+        # feed name -> all descriptions it matched (chosen one first)
+        self.ambiguous_feeds = dict()
+        # psypnp.auto.travel.TravelModel, see setTravelModel()
+        self.travel_model = None
         
     
     def isReady(self):
@@ -42,14 +51,43 @@ class Workspace:
         
         return True
     
-    def _findFeedNameInMap(self, fname, feedDescNameMap):
+    def _findFeedDescription(self, fname):
         
-        for feedDescName in feedDescNameMap:
-            psypnp.debug.out.flush("CHECK FDESCNAME %s" % feedDescName)
-            if fname.find(feedDescName) >= 0:
-                return feedDescNameMap[feedDescName]
+        feedDesc, others = self.feed_descriptions.findForFeederName(fname)
+        if len(others):
+            self.ambiguous_feeds[fname] = [feedDesc] + others
+            psypnp.debug.out.buffer("Feed %s matches several descriptions (%s), using %s" % 
+                                    (fname, ', '.join([o.name for o in self.ambiguous_feeds[fname]]),
+                                     feedDesc.name))
+        return feedDesc
+    
+    def setTravelModel(self, model):
+        '''
+            setTravelModel(psypnp.auto.travel.TravelModel obj)
+            Use placement locations, rather than the feeder centroid, 
+            for feed distances.
+        '''
+        self.travel_model = model 
+        self._applyTravelModel()
+        
+    def _applyTravelModel(self):
+        if self.travel_model is None or self.travel_model.isEmpty():
+            return 
+        
+        placementCentroid = self.travel_model.centroid()
+        psypnp.debug.out.buffer("Feed distances now relative to placement centroid %s" % 
+                                str(placementCentroid))
+        for feedSet in self.feeds.sets.entries():
+            for feedInfo in feedSet.entries():
+                xy = psypnp.auto.travel.location_xy(
+                                psypnp.auto.feed.get_feed_location(feedInfo.feed))
+                if xy is None:
+                    continue
+                feedInfo.setLocation(xy)
+                feedInfo.setDistanceFromCentroid(
+                            psypnp.auto.travel.distance(xy, placementCentroid))
         
-        return None
+    @psypnp.profile.timed('Workspace.setProject')
     def setProject(self, aProject):
         '''
             setProject(workspace.project.Project obj)
@@ -60,11 +98,9 @@ class Workspace:
         
         psypnp.debug.out.buffer("Project workspace setting project %s" % str(aProject))
         
-        feedDescNameMap = dict()
-        for feedDesc in self.feed_descriptions.entries():
-            feedDescNameMap[feedDesc.name] = feedDesc
-            
-        psypnp.debug.out.flush(str(feedDescNameMap))
+        psypnp.debug.out.buffer("Have %i feed descriptions" % 
+                                self.feed_descriptions.numEntries())
+        self.ambiguous_feeds = dict()
         
         feedDistMap = dict()
         for feed_dist_tuple in self.feeds.by_distance_list:
@@ -78,33 +114,36 @@ class Workspace:
             for feedInfo in feedSet.entries():
                 
                 if feedInfo.name in feedDistMap:
-                    feedInfo.distance_from_centroid = feedDistMap[feedInfo.name]['dist']
+                    feedInfo.setDistanceFromCentroid(feedDistMap[feedInfo.name]['dist'])
                 
-                feedDesc = self._findFeedNameInMap(feedInfo.name, feedDescNameMap)
+                feedDesc = self._findFeedDescription(feedInfo.name)
                 if feedDesc is None:
                     psypnp.debug.out.flush('Could not find description for feed %s' % feedInfo.name)
                     
                     toRemove.append([feedSet, feedInfo])
                 else:
-                    feedInfo.feed_description = feedDesc
+                    feedInfo.setFeedDescription(feedDesc)
                     
             if len(toRemove):
                 for remTup in toRemove:
                     remTup[0].remove(remTup[1])
-                        
-                    
         
-        packDescMap = dict()
-        for packDesc in self.package_descriptions.entries():
-            packDescMap[packDesc.name] = packDesc
+        self._applyTravelModel()
+                        
+        self.describeParts(self.project)
         
-        for apart in self.project.part_map.parts:
+    def describeParts(self, aProject):
+        '''
+            describeParts(workspace.project.Project obj)
+            set the package description of each of aProject's parts
+            (done by setProject(), call directly for other projects 
+            sharing this workspace)
+        '''
+        for apart in aProject.part_map.parts:
             pkg = apart.part.getPackage()
             if pkg is not None:
-                pid = pkg.getId()
-                for pdescname in packDescMap:
-                    if pid.find(pdescname) >= 0:
-                        apart.package_description = packDescMap[pdescname]
-                        continue
+                packDesc = self.package_descriptions.findForPackageId(pkg.getId())
+                if packDesc is not None:
+                    apart.package_description = packDesc
 
 
@@ -9,9 +9,237 @@ Part of the psypnp OpenPnP scripting modules project
 @license: GPL version 3, see LICENSE file for details.
 '''
 from psypnp.ui import showError
+from psypnp.trigram import TrigramIndex
 import psypnp.globals 
+import psypnp.profile
 import psypnp.ui
 
+
+# bump this (through invalidate_index()) whenever feeder/part 
+# associations are changed, so the Index knows to rebuild
+IndexGeneration = 0
+
+class Index:
+    '''
+        Index -- hash maps over the machine feeders and config parts, 
+        so lookups don't need to re-walk everything (through the java 
+        bridge) on every call.
+        
+        Holds:
+          - part id -> [feeders] (in sorted feeder order)
+          - package id -> [parts]
+          - feeder name -> feeder
+          - the sorted feeders list
+          - trigram indices over part ids, package ids and feeder names,
+            for substring searches (see psypnp.trigram)
+        
+        Built lazily, and rebuilt whenever the number of feeders/parts 
+        changes, the IndexGeneration marker is bumped or a new script 
+        run calls psypnp.globals.setup().
+        Normally accessed through get_index() rather than created directly.
+    '''
+    def __init__(self):
+        self.invalidate()
+        self.num_feeders = -1
+        self.num_parts = -1
+        self.num_packages = -1
+        self.sorted_feeders = []
+        self.feeders_by_name = dict()
+        self.feeders_by_part_id = dict()
+        self.parts = []
+        self.parts_by_package_id = dict()
+        self.packages = []
+        self.feeder_names = None
+        self.part_names = None
+        self.package_names = None
+        
+    def invalidate(self):
+        self.feeders_generation = None
+        self.parts_generation = None
+        self.packages_generation = None
+        
+    def feedersStale(self):
+        if self.feeders_generation != _index_generation():
+            return True 
+        return len(psypnp.globals.machine().getFeeders()) != self.num_feeders
+    
+    def partsStale(self):
+        if self.parts_generation != _index_generation():
+            return True 
+        return len(psypnp.globals.config().getParts()) != self.num_parts
+    
+    def packagesStale(self):
+        if self.packages_generation != _index_generation():
+            return True 
+        return len(psypnp.globals.config().getPackages()) != self.num_packages
+    
+    def refreshFeeders(self, force=False):
+        if not (force or self.feedersStale()):
+            return 
+        
+        feeders = psypnp.globals.machine().getFeeders()
+        self.num_feeders = len(feeders)
+        self.sorted_feeders = sorted(feeders, key=_feed_key)
+        self.feeders_by_name = dict()
+        self.feeders_by_part_id = dict()
+        self.feeder_names = None
+        # name (sort + map), part and part id, per feeder
+        psypnp.profile.count('java: feeder reads', 1 + 3 * self.num_feeders)
+        for aFeed in self.sorted_feeders:
+            self.feeders_by_name[_feed_key(aFeed)] = aFeed
+            feedPart = aFeed.getPart()
+            if feedPart is None:
+                continue
+            pid = feedPart.getId()
+            if pid in self.feeders_by_part_id:
+                self.feeders_by_part_id[pid].append(aFeed)
+            else:
+                self.feeders_by_part_id[pid] = [aFeed]
+        
+        self.feeders_generation = _index_generation()
+        
+    def refreshParts(self, force=False):
+        if not (force or self.partsStale()):
+            return 
+        
+        self.parts = list(psypnp.globals.config().getParts())
+        self.num_parts = len(self.parts)
+        # package and package id, per part
+        psypnp.profile.count('java: part reads', 1 + 2 * self.num_parts)
+        self.parts_by_package_id = dict()
+        self.part_names = None
+        for apart in self.parts:
+            pkg = apart.getPackage()
+            if pkg is None:
+                continue 
+            pkgId = pkg.getId()
+            if pkgId in self.parts_by_package_id:
+                self.parts_by_package_id[pkgId].append(apart)
+            else:
+                self.parts_by_package_id[pkgId] = [apart]
+                
+        self.parts_generation = _index_generation()
+        
+    def refreshPackages(self, force=False):
+        if not (force or self.packagesStale()):
+            return 
+        
+        self.packages = list(psypnp.globals.config().getPackages())
+        psypnp.profile.count('java: part reads')
+        self.num_packages = len(self.packages)
+        self.package_names = None
+        self.packages_generation = _index_generation()
+        
+    def sortedFeeders(self):
+        '''
+            @return: the (shared, don't modify) list of feeders sorted by name.
+        '''
+        self.refreshFeeders()
+        return self.sorted_feeders
+    
+    def feederByName(self, fname):
+        '''
+            @return: feeder with exactly this name, or None
+        '''
+        self.refreshFeeders()
+        if fname in self.feeders_by_name:
+            return self.feeders_by_name[fname]
+        return None
+    
+    def feedsForPartId(self, partId, onlyEnabled=True):
+        '''
+            @return: list of feeders (possibly empty) holding part partId.
+        '''
+        self.refreshFeeders()
+        if partId not in self.feeders_by_part_id:
+            return []
+        
+        feeds = self.feeders_by_part_id[partId]
+        if not onlyEnabled:
+            return list(feeds)
+        
+        # enabled state is checked live, it may change without us knowing
+        psypnp.profile.count('java: feeder reads', len(feeds))
+        return [f for f in feeds if f.isEnabled()]
+    
+    def partsForPackageId(self, packageId):
+        '''
+            @return: list of parts (possibly empty) using package packageId.
+        '''
+        self.refreshParts()
+        if packageId not in self.parts_by_package_id:
+            return []
+        
+        return list(self.parts_by_package_id[packageId])
+    
+    def feederNames(self):
+        '''
+            @return: TrigramIndex of feeder names -> feeders
+        '''
+        self.refreshFeeders()
+        if self.feeder_names is None:
+            self.feeder_names = TrigramIndex()
+            for aFeed in self.sorted_feeders:
+                self.feeder_names.add(_feed_key(aFeed), aFeed)
+        return self.feeder_names
+    
+    def partNames(self):
+        '''
+            @return: TrigramIndex of part ids -> parts
+        '''
+        self.refreshParts()
+        if self.part_names is None:
+            self.part_names = TrigramIndex()
+            for apart in self.parts:
+                self.part_names.add(apart.getId(), apart)
+        return self.part_names
+    
+    def packageNames(self):
+        '''
+            @return: TrigramIndex of package ids -> packages
+        '''
+        self.refreshPackages()
+        if self.package_names is None:
+            self.package_names = TrigramIndex()
+            for apkg in self.packages:
+                pid = apkg.getId()
+                if pid and len(pid):
+                    self.package_names.add(pid, apkg)
+        return self.package_names
+    
+    def __string__(self):
+        return '%i feeders, %i parts, %i packages' % (self.num_feeders, 
+                                                      self.num_parts,
+                                                      self.num_packages)
+    
+    def __repr__(self):
+        return '<search.Index %s>' % self.__string__()
+        
+
+def _index_generation():
+    return (IndexGeneration, psypnp.globals.setupGeneration())
+
+_SearchIndex = None
+def get_index():
+    '''
+        get_index
+        @return: the Index shared by search functions for this run.
+    '''
+    global _SearchIndex
+    if _SearchIndex is None:
+        _SearchIndex = Index()
+    return _SearchIndex
+
+def invalidate_index():
+    '''
+        Call after changing feeder/part associations, so the 
+        next lookup rebuilds the Index.
+    '''
+    global IndexGeneration
+    IndexGeneration += 1
+    
+
+
 def parts_by_name(pname):
     '''
         parts_by_name(PARTNAME:str)
@@ -23,10 +251,7 @@ def parts_by_name(pname):
     if partByName is not None:
         matchingParts.append(partByName)
     else:
-        lowerName = pname.lower()
-        for apart in config.getParts():
-            if apart.id.lower().find(lowerName) >= 0:
-                matchingParts.append(apart)
+        matchingParts = get_index().partNames().search(pname)
     return matchingParts
 
 
@@ -35,15 +260,7 @@ def parts_by_package(package):
         parts_by_package(PACKAGEOBJ)
         @return: a list of parts using package PACKAGEOBJ.
     '''
-    srcPackId = package.getId()
-    matchingParts = []
-    config = psypnp.globals.config()
-    for apart in config.getParts():
-        pkg = apart.getPackage()
-        if pkg is not None and pkg.getId() == srcPackId:
-            matchingParts.append(apart)
-    
-    return matchingParts
+    return get_index().partsForPackageId(package.getId())
 
 
 def packages_by_name(pname):
@@ -51,16 +268,7 @@ def packages_by_name(pname):
         packages_by_name(PKGNAME:str)
         @return: a list of package objects whos name (id) contains PKGNAME
     '''
-    config = psypnp.globals.config()
-    matchingPackages = []
-    pnameLower = pname.lower()
-    for apkg in config.getPackages():
-        pid = apkg.getId()
-        if pid and len(pid):
-            if pid.lower().find(pnameLower) >= 0:
-                matchingPackages.append(apkg)
-    
-    return matchingPackages
+    return get_index().packageNames().search(pname)
 
 def parts_by_package_name(pkgname):
     '''
@@ -72,16 +280,10 @@ def parts_by_package_name(pkgname):
     if not len(matchingPkgs):
         return matchingParts
     
-    # could just use a bunch of calls to parts_by_package
-    # but I just can't take the horrible inefficiency
-    pkgsOfInterest = dict()
+    # the index makes each of these a simple lookup
+    searchIndex = get_index()
     for pkg in matchingPkgs:
-        pkgsOfInterest[pkg.getId()] = pkg
-    
-    for apart in psypnp.globals.config().getParts():
-        partPkg = apart.getPackage()
-        if partPkg is not None and partPkg.getId() in pkgsOfInterest:
-            matchingParts.append(apart)
+        matchingParts.extend(searchIndex.partsForPackageId(pkg.getId()))
             
     return matchingParts
 
@@ -89,7 +291,7 @@ def parts_by_package_name(pkgname):
 def get_next_feeder_index(startidx, onlyEnabled=True):
     nxtFeed = None
     #machine = psypnp.globals.machine()
-    feederList = get_sorted_feeders_list()
+    feederList = get_index().sortedFeeders()
     if feederList is None or not len(feederList):
         return 0
     
@@ -147,18 +349,25 @@ def feeds_by_part(singlePartObj, onlyEnabled=True,
         @return: A LIST of matching feeds or None if not found.
     '''
     if feederList is None:
-        feederList = get_sorted_feeders_list()
-        if feederList is None or not len(feederList):
+        searchIndex = get_index()
+        if not len(searchIndex.sortedFeeders()):
             showError("No feeders found")
             return None 
+        
+        retList = searchIndex.feedsForPartId(singlePartObj.getId(), onlyEnabled)
+        if not len(retList):
+            return None 
+        if not returnAllMatching:
+            return retList[:1]
+        return retList
     
     
     retList = []
-    
+    partId = singlePartObj.getId()
     for aFeed in feederList: 
         if (onlyEnabled and aFeed.isEnabled()) or not onlyEnabled:
             feedPart =  aFeed.getPart()
-            if feedPart.getId() == singlePartObj.getId():
+            if feedPart is not None and feedPart.getId() == partId:
                 if returnAllMatching:
                     retList.append(aFeed) 
                 else:
@@ -181,25 +390,74 @@ def feeds_by_partslist(partsList, onlyEnabled=True, returnAllMatching=False, fee
         @return: a list of feeds, or None if none found.
     '''
     
-    if feederList is None:
-        feederList = get_sorted_feeders_list()
-        
-    #print("DONIG222 FEEDBYPART FOR %s" % str(machine))
-    if feederList is None or not len(feederList):
+    feedsByPartId = feeds_by_part_map(onlyEnabled, feederList)
+    if feedsByPartId is None:
         showError("No feeders found")
         return None
     
     retList = []
     for aPart in partsList:
-        matchingFeeds = feeds_by_part(aPart, onlyEnabled, returnAllMatching, feederList)
-        if matchingFeeds is not None:
-            retList.extend(matchingFeeds)
+        partId = aPart.getId()
+        if partId not in feedsByPartId:
+            continue 
+        if returnAllMatching:
+            retList.extend(feedsByPartId[partId])
+        else:
+            retList.append(feedsByPartId[partId][0])
     
     if not len(retList):
         return None 
     
     return retList
 
+def feeds_by_part_map(onlyEnabled=True, feederList=None):
+    '''
+        feeds_by_part_map [onlyEnabled] [feederList]
+        Walks the feeders once to build a part-id -> [feeders] map, 
+        so resolving lots of parts doesn't mean re-scanning for each.
+        
+        @param onlyEnabled: only consider enabled feeders
+        @param feederList: map only these feeders (default: all, through 
+                           the search Index)
+        @return: dict of part id -> list of feeds (in feederList order), 
+                 or None if there are no feeders at all.
+    '''
+    retMap = dict()
+    if feederList is None:
+        searchIndex = get_index()
+        # refreshes the index, once: read its map directly from here on
+        if not len(searchIndex.sortedFeeders()):
+            return None
+        
+        feedsByPartId = searchIndex.feeders_by_part_id
+        for partId in feedsByPartId:
+            if onlyEnabled:
+                # enabled state is checked live, as in feedsForPartId()
+                psypnp.profile.count('java: feeder reads', len(feedsByPartId[partId]))
+                feeds = [f for f in feedsByPartId[partId] if f.isEnabled()]
+            else:
+                feeds = list(feedsByPartId[partId])
+            if len(feeds):
+                retMap[partId] = feeds
+        return retMap
+    
+    if not len(feederList):
+        return None
+    
+    for aFeed in feederList:
+        if onlyEnabled and not aFeed.isEnabled():
+            continue
+        feedPart = aFeed.getPart()
+        if feedPart is None:
+            continue 
+        partId = feedPart.getId()
+        if partId in retMap:
+            retMap[partId].append(aFeed)
+        else:
+            retMap[partId] = [aFeed]
+    
+    return retMap
+
 def _feed_key(afeed):
     
     if afeed is None:
@@ -211,12 +469,8 @@ def _feed_key(afeed):
     return afeed.getId()
 
 def get_sorted_feeders_list():
-    machine = psypnp.globals.machine()
-    feeders = machine.getFeeders()
-    
-    sorted_feeders = sorted(feeders, key=_feed_key)
-    #print("Returning sorted feeds list:\n%s" % str(sorted_feeders))
-    return sorted_feeders
+    # copy, so callers are free to mess with their list
+    return list(get_index().sortedFeeders())
 
 
 
@@ -224,32 +478,21 @@ def get_sorted_feeders_list():
 def feed_by_name(fname, onlyEnabled=True):
     # get our feeders
     #machine = psypnp.globals.machine()
-    feederList = get_sorted_feeders_list()
+    feederList = get_index().sortedFeeders()
     if feederList is None or not len(feederList):
         showError("No feeders found")
         return None
 
-    stillSearching = True
-    cur_idx = 0
-    #matchingFeed = None
-    lowerName = fname.lower()
-    while stillSearching:
-        cur_idx = get_next_feeder_index(cur_idx, onlyEnabled)
-        if cur_idx is None or cur_idx >= len(feederList):
-            return None 
-        
-        aFeed = feederList[cur_idx]
-        if aFeed.getName().lower().find(lowerName) >= 0:
-            # gotcha
-            if aFeed.isEnabled() or not onlyEnabled:
-                #return FeedDetails(aFeed, cur_idx)
-                return aFeed
-
-        cur_idx += 1
-        if cur_idx >= len(feederList):
-            # we're at the end of the line
-            stillSearching = False
-            return None
+    # only need to look at those whose names match, best match first
+    for aFeed in get_index().feederNames().search(fname):
+        if onlyEnabled and not aFeed.isEnabled():
+            continue 
+        if aFeed.getPart() is None:
+            continue
+        # gotcha
+        return aFeed
+    
+    return None
 
 
 class SearchFeedResults:
@@ -269,7 +512,6 @@ def prompt_for_feeders_by_name(promptstr, defaultName=None):
         SearchFeedResults provides both the searched-for
         term (.searched) and the results list (which may be empty
     '''
-    machine = psypnp.globals.machine()
     if defaultName is None or not len(defaultName):
         defaultName = '8mmLeft' # some default value
     
@@ -277,14 +519,10 @@ def prompt_for_feeders_by_name(promptstr, defaultName=None):
     if pname is None or not len(pname):
         return None
     
-    matchingFeeders = []
-    
-    for afeeder in machine.getFeeders():
-        if afeeder.getName().find(pname) >= 0:
-            matchingFeeders.append(afeeder)
+    matchingFeeders = get_index().feederNames().search(pname, caseSensitive=True)
     
     if not len(matchingFeeders):
-        return  SearchFeedResults(matchingFeeders, pname)
+        return  SearchFeedResults(pname, matchingFeeders)
     
     sortedMatchingFeeders = sorted(matchingFeeders, 
                                    key=_feed_key)
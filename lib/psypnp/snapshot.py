@@ -0,0 +1,276 @@
+'''
+Created on Oct 17, 2026
+
+Feeder snapshots, for scripts that only look at the feeders.
+
+Going through machine.getFeeders() and asking each feeder for its
+part, enabled state and locations is a couple of dozen trips across
+the jython/java bridge per feeder, and every read-only consumer (feed
+mapper, exports, backups) used to make them all over again.  Instead
+
+  snap = psypnp.snapshot.get_snapshot()
+  for rec in snap.withParts():
+      print(rec.name, rec.part_id, rec.reference_hole)
+
+reads each field at most once (and only if someone asks for it), into
+compact FeederRecords, shared until the snapshot goes stale: a new
+script run, psypnp.search.invalidate_index() (which is what code
+changing feeder/part associations calls), invalidate() or a change in
+the number of feeders.
+
+A FeederSnapshot can also be built over any list of feeders, e.g. the
+psypnp.offline stand-ins, in which case it never goes stale.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+import psypnp.globals
+import psypnp.profile
+import psypnp.search
+
+# bump this (through invalidate()) after changing feeders behind the
+# snapshot's back
+SnapshotGeneration = 0
+
+
+def feeder_kind(aFeed):
+    '''
+        @return: 'strip', 'pushpull', 'tray' or None (unsupported)
+    '''
+    if hasattr(aFeed, 'toString'):
+        asStr = aFeed.toString()
+        if asStr.find('Strip') >= 0:
+            return 'strip'
+        if asStr.find('PushPull') >= 0:
+            return 'pushpull'
+
+    if hasattr(aFeed, 'idealLineLocations'):
+        return 'strip'
+    if hasattr(aFeed, 'trayCountX'):
+        return 'tray'
+    return None
+
+
+def _read_location(aFeed):
+    if hasattr(aFeed, 'getLocation'):
+        return aFeed.getLocation()
+    return None
+
+def _read_ideal_line(aFeed):
+    idealLines = aFeed.idealLineLocations
+    if idealLines is None or len(idealLines) < 2:
+        return None
+    return (idealLines[0], idealLines[1])
+
+class _Unread:
+    # marks a FeederRecord field that hasn't been read yet
+    pass
+
+def _field(name, reader):
+    slot = '_%s' % name
+    def getter(self):
+        val = getattr(self, slot)
+        if val is _Unread:
+            psypnp.profile.count('java: feeder reads')
+            val = reader(self)
+            setattr(self, slot, val)
+        return val
+    return property(getter)
+
+
+class FeederRecord(object):
+    '''
+        FeederRecord -- what a snapshot knows about one feeder.
+
+        Each field is read from the feeder the first time it's asked
+        for, and kept from then on, so consumers only pay for what they
+        use and only the first one pays at all.
+
+        Locations are those of the feeder type: location for all,
+        reference_hole, last_hole, ideal_line (first two ideal line
+        locations) and ideal_delta (x, y from the first to the second)
+        for strip feeders, None otherwise.  The feeder itself is kept
+        for anything else.
+    '''
+    Fields = ('id', 'name', 'kind', 'enabled', 'part', 'part_id', 'location',
+              'reference_hole', 'last_hole', 'ideal_line', 'ideal_delta')
+    __slots__ = ['index', 'feeder'] + ['_%s' % f for f in Fields]
+
+    def __init__(self, index, aFeed):
+        self.index = index
+        self.feeder = aFeed
+        for f in FeederRecord.Fields:
+            setattr(self, '_%s' % f, _Unread)
+
+    def _stripOnly(self, reader):
+        if self.kind != 'strip':
+            return None
+        return reader(self.feeder)
+
+    def _idealDelta(self):
+        idealLine = self.ideal_line
+        if idealLine is None:
+            return None
+        return (idealLine[1].getX() - idealLine[0].getX(),
+                idealLine[1].getY() - idealLine[0].getY())
+
+    id = _field('id', lambda self: self.feeder.getId())
+    name = _field('name', lambda self: self.feeder.getName())
+    kind = _field('kind', lambda self: feeder_kind(self.feeder))
+    enabled = _field('enabled', lambda self: self.feeder.isEnabled())
+    part = _field('part', lambda self: self.feeder.getPart())
+    part_id = _field('part_id', lambda self: self.part.getId() if self.part is not None else None)
+    location = _field('location', lambda self: _read_location(self.feeder))
+    reference_hole = _field('reference_hole',
+                            lambda self: self._stripOnly(lambda f: f.getReferenceHoleLocation()))
+    last_hole = _field('last_hole', lambda self: self._stripOnly(lambda f: f.getLastHoleLocation()))
+    ideal_line = _field('ideal_line', lambda self: self._stripOnly(_read_ideal_line))
+    ideal_delta = _field('ideal_delta', _idealDelta)
+
+    def readAll(self):
+        '''
+            Read any fields not read yet.
+        '''
+        for f in FeederRecord.Fields:
+            getattr(self, f)
+
+    def sortKey(self):
+        '''
+            @return: same as psypnp.search uses to sort feeders
+        '''
+        if self.name is not None:
+            return self.name
+        return self.id
+
+    def __repr__(self):
+        return '<FeederRecord %s (%s) %s>' % (self.name, self.kind, self.part_id)
+
+
+class FeederSnapshot:
+    '''
+        FeederSnapshot -- FeederRecords for a list of feeders (by
+        default, all the machine's, in machine order).
+        Normally accessed through get_snapshot() rather than created
+        directly.
+    '''
+    def __init__(self, feeders=None, readAll=False):
+        self.records = []
+        self.generation = None
+        self.detached = feeders is not None
+        self.sorted_records = None
+        self.capture(feeders)
+        if readAll:
+            self.readAll()
+
+    def capture(self, feeders=None):
+        '''
+            (Re-)start from the feeders list.  Only need to call this
+            directly to force it: see refresh().
+        '''
+        with psypnp.profile.span('feeder snapshot'):
+            if feeders is None:
+                feeders = psypnp.globals.machine().getFeeders()
+                self.generation = _snapshot_generation()
+            if feeders is None:
+                feeders = []
+
+            records = []
+            for aFeed in feeders:
+                records.append(FeederRecord(len(records), aFeed))
+            self.records = records
+            self.sorted_records = None
+
+    def readAll(self):
+        '''
+            Read every field of every record now, e.g. to hold on to
+            the snapshot past changes to the feeders.
+        '''
+        with psypnp.profile.span('feeder snapshot'):
+            for rec in self.records:
+                rec.readAll()
+
+    def isStale(self):
+        if self.detached:
+            return False
+        if self.generation != _snapshot_generation():
+            return True
+        return len(psypnp.globals.machine().getFeeders()) != len(self.records)
+
+    def refresh(self, force=False):
+        '''
+            Re-read the machine's feeders, if stale (or forced).
+            @return: True if a new capture was made
+        '''
+        if self.detached or not (force or self.isStale()):
+            return False
+        self.capture()
+        return True
+
+    def withParts(self, onlyEnabled=True):
+        '''
+            @return: list of records (in snapshot order) that have a part
+        '''
+        return [r for r in self.records
+                if (r.enabled or not onlyEnabled) and r.part is not None]
+
+    def byPartId(self, onlyEnabled=True):
+        '''
+            @return: dict of part id -> [records] (in snapshot order)
+        '''
+        retMap = dict()
+        for rec in self.withParts(onlyEnabled):
+            if rec.part_id in retMap:
+                retMap[rec.part_id].append(rec)
+            else:
+                retMap[rec.part_id] = [rec]
+        return retMap
+
+    def sortedRecords(self):
+        '''
+            @return: the (shared, don't modify) list of records sorted
+                     by feeder name, as psypnp.search sorts feeders.
+        '''
+        if self.sorted_records is None:
+            self.sorted_records = sorted(self.records, key=FeederRecord.sortKey)
+        return self.sorted_records
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __repr__(self):
+        return '<FeederSnapshot %i feeders>' % len(self.records)
+
+
+def _snapshot_generation():
+    return (SnapshotGeneration, psypnp.search.IndexGeneration,
+            psypnp.globals.setupGeneration())
+
+_Snapshot = None
+def get_snapshot():
+    '''
+        get_snapshot
+        @return: the FeederSnapshot of the machine's feeders, re-read
+                 if it has gone stale.
+    '''
+    global _Snapshot
+    if _Snapshot is None:
+        _Snapshot = FeederSnapshot()
+    else:
+        _Snapshot.refresh()
+    return _Snapshot
+
+def invalidate():
+    '''
+        Call after changing feeders (parts, enabled state, locations)
+        so the next get_snapshot() re-reads them.
+    '''
+    global SnapshotGeneration
+    SnapshotGeneration += 1
@@ -0,0 +1,173 @@
+'''
+Created on Oct 17, 2026
+
+Trigram index, for fast substring/prefix searches over names
+(part ids, package ids, feeder names...).
+
+  idx = psypnp.trigram.TrigramIndex()
+  for apart in config.getParts():
+      idx.add(apart.getId(), apart)
+
+  idx.search('0402')                  # any id containing 0402, any case
+  idx.search('C_04', prefix=True)     # ids starting with c_04
+  idx.search('8mmLeft', caseSensitive=True)
+
+Results are ranked: exact matches first, then those starting with
+the query, then by how early the query shows up, shorter names first.
+
+Pure python, nothing openpnp-specific in here, so can be used for
+any (name, object) collection.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+Part of the psypnp OpenPnP scripting modules project
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+'''
+
+import bisect
+
+GramLength = 3
+
+def trigrams(strval):
+    '''
+        @return: set of all the GramLength-long substrings of strval
+    '''
+    grams = set()
+    for i in range(len(strval) - GramLength + 1):
+        grams.add(strval[i:i+GramLength])
+    return grams
+
+class TrigramIndex:
+    '''
+        TrigramIndex -- maps trigrams of the lowercased keys to the
+        entries containing them.  Substring searches only verify the
+        entries that have all of the query's trigrams, rather than
+        scanning everything.
+    '''
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.keys = []
+        self.lower_keys = []
+        self.objects = []
+        self.grams = dict()
+        self._sorted_lower = None
+
+    def add(self, key, obj=None):
+        '''
+            add(KEY:str, [OBJ])
+            index OBJ (or KEY itself, if OBJ is None) under name KEY.
+        '''
+        if key is None:
+            return
+        if obj is None:
+            obj = key
+
+        entryIdx = len(self.keys)
+        lowerKey = key.lower()
+        self.keys.append(key)
+        self.lower_keys.append(lowerKey)
+        self.objects.append(obj)
+        for g in trigrams(lowerKey):
+            if g in self.grams:
+                self.grams[g].append(entryIdx)
+            else:
+                self.grams[g] = [entryIdx]
+
+        # prefix lookup table will be rebuilt on demand
+        self._sorted_lower = None
+
+    def numEntries(self):
+        return len(self.keys)
+
+    def _candidates(self, lowerQuery):
+        if len(lowerQuery) < GramLength:
+            # too short to use the grams, just check everyone
+            return range(len(self.keys))
+
+        postings = []
+        for g in trigrams(lowerQuery):
+            if g not in self.grams:
+                # nobody has this trigram, so nobody matches
+                return []
+            postings.append(self.grams[g])
+
+        # intersect, starting with the rarest trigram
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates.intersection_update(p)
+            if not candidates:
+                break
+        return candidates
+
+    def _prefixCandidates(self, lowerQuery):
+        if self._sorted_lower is None:
+            self._sorted_lower = sorted(zip(self.lower_keys,
+                                            range(len(self.lower_keys))))
+
+        candidates = []
+        i = bisect.bisect_left(self._sorted_lower, (lowerQuery, -1))
+        while i < len(self._sorted_lower) and \
+            self._sorted_lower[i][0].startswith(lowerQuery):
+            candidates.append(self._sorted_lower[i][1])
+            i += 1
+        return candidates
+
+    def search(self, query, prefix=False, caseSensitive=False, maxResults=None):
+        '''
+            search(QUERY:str, [prefix], [caseSensitive], [maxResults])
+            @param prefix: only match keys that start with QUERY
+            @param caseSensitive: match case exactly (default: ignore case)
+            @param maxResults: truncate result list to this length
+            @return: list of indexed objects matching, best match first.
+        '''
+        if query is None:
+            return []
+
+        lowerQuery = query.lower()
+        if prefix:
+            candidates = self._prefixCandidates(lowerQuery)
+        else:
+            candidates = self._candidates(lowerQuery)
+
+        if not caseSensitive:
+            query = lowerQuery
+
+        ranked = []
+        for entryIdx in candidates:
+            if caseSensitive:
+                key = self.keys[entryIdx]
+            else:
+                key = self.lower_keys[entryIdx]
+
+            if prefix:
+                pos = 0 if key.startswith(query) else -1
+            else:
+                pos = key.find(query)
+
+            if pos < 0:
+                continue
+
+            exactness = 2
+            if len(key) == len(query):
+                exactness = 0
+            elif pos == 0:
+                exactness = 1
+
+            ranked.append((exactness, pos, len(key), key, entryIdx))
+
+        ranked.sort()
+        if maxResults is not None:
+            ranked = ranked[:maxResults]
+
+        return [self.objects[r[4]] for r in ranked]
+
+    def __string__(self):
+        return '%i entries, %i trigrams' % (len(self.keys), len(self.grams))
+
+    def __repr__(self):
+        return '<TrigramIndex %s>' % self.__string__()
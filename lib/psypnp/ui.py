@@ -16,9 +16,26 @@ except:
     # this is just for running outside of openpnp
     from psypnp.debug import stubOptPane as optPane 
 
+import psypnp
 import psypnp.globals
-from org.openpnp.model import Location
+import psypnp.profile
 
+def dialog(func):
+    '''
+        decorator for functions that bring up a dialog: times them
+        (see psypnp.profile) and lets psypnp know one is up, for the
+        click-to-first-dialog latency.
+    '''
+    timedFunc = psypnp.profile.timed('ui dialog')(func)
+    def wrapper(*args, **kwargs):
+        psypnp.note_dialog()
+        return timedFunc(*args, **kwargs)
+
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+@dialog
 def showError(msg, title=None):
     print("ERROR: %s" % str(msg))
     if title is not None:
@@ -26,6 +43,7 @@ def showError(msg, title=None):
     else:
         optPane.showMessageDialog(None, msg, "Error", optPane.ERROR_MESSAGE)
 
+@dialog
 def showMessage(msg, title=None):
     if title is not None:
         optPane.showMessageDialog(None, msg, title)
@@ -33,6 +51,7 @@ def showMessage(msg, title=None):
         optPane.showMessageDialog(None, msg)
 
 
+@dialog
 def getUserInput(msg, defaultValue='', title=None):
     # can't figure out how to set both title and default value, durp.
     # screw it.
@@ -66,6 +85,7 @@ def getUserInputFloat(msg, defaultValue=0, title=None):
 
 
 
+@dialog
 def getOption(title, message, options, optDefault=None):
     if optDefault is None:
         optDefault = options[0]
@@ -93,11 +113,18 @@ def getConfirmation(title, message, options=None, optDefault=None):
     
     return False
 
-def getSelectedBoards():
+def getSelectedBoardLocations():
     boardLocs = psypnp.globals.gui().jobTab.getSelections()
     if not boardLocs or (not len(boardLocs)) or not boardLocs[0]:
         return None
     
+    return list(boardLocs)
+
+def getSelectedBoards():
+    boardLocs = getSelectedBoardLocations()
+    if boardLocs is None:
+        return None
+    
     boardsList = []
     for bloc in boardLocs:
         boardsList.append(bloc.board)
@@ -134,6 +161,7 @@ def requestXYCoordinatesUsingLocationDefault(curLocation, promptPrefix=''):
         # cancel
         return None
 
+    from org.openpnp.model import Location
     location = Location(curLocation.getUnits(), xval, yval, curLocation.getZ(), 
                         curLocation.getRotation());
                         
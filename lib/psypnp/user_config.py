@@ -15,6 +15,34 @@ autofeedsetup_allow_part_spreading = True # allow a part to be spread amongst mu
 autofeedsetup_map_parts_to_preset_feeders = True # if a part is used in proj, and already mapped to feeder, leave it be 
 autofeedsetup_leave_already_assoc_feeds_untouched = False # leave all non "fiducial" or "home" feeders untouched
 autofeedsetup_restrict_to_enabled_feeders = False # only place in feeders that are enabled
+autofeedsetup_mapping_strategy = 'greedy' # 'greedy' (part by part) or 'optimal' (global solver, see psypnp.auto.assignment)
+autofeedsetup_optimal_time_budget = 2.0 # seconds the 'optimal' solver may spend searching
+autofeedsetup_incremental = False # keep parts already in suitable feeders where they are, only map new/grown parts and only write changed feeders
+
+# job -> estimate cycle time (see psypnp.estimate): your machine's motion
+# axis max speed (mm/s) and acceleration (mm/s^2)
+estimate_axis_x = (500.0, 2000.0)
+estimate_axis_y = (500.0, 2000.0)
+estimate_axis_z = (150.0, 1500.0)
+estimate_z_travel = 15.0 # mm nozzle goes down (and back up) for each pick and place
+estimate_pick_dwell = 0.1 # seconds for vacuum/settle, on each pick
+estimate_place_dwell = 0.1 # seconds for vacuum release, on each place
+estimate_nozzletip_change_time = 10.0 # seconds for each nozzle tip change
+estimate_bottomvision_time = 0.8 # seconds for each bottom vision pass (settle, capture, process)
+
+# debug output (see psypnp.debug): 'error', 'warning', 'info', 'debug' or 'verbose'
+# anything below this level is dropped before it's even formatted
+debug_output_level = 'debug'
+
+# profiling (see psypnp.profile): time the stages of scripts, printing
+# a timing tree at the end.  Set a dump file (relative to the psypnp 
+# base dir, e.g. 'autofeed.pstats') to also get cProfile stats.
+profile_enabled = False
+profile_dump_file = None
+
+# startup (see psypnp.bootstrap): print the time from script click to
+# its first dialog
+report_startup_latency = False
 
 # go -> hotspots: set this to true to allow for repeated moved and forced dismiss w/Cancel button
 gohotspots_loopuntilcancel = False
@@ -22,11 +22,12 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
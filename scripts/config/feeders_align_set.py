@@ -45,11 +45,12 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
@@ -57,55 +58,34 @@ from org.openpnp.model import Location, Length, LengthUnit
 
 import psypnp
 import psypnp.nv
+import psypnp.geom
 
 
 def main():
     feeders_align()
     
-def updatePosStats(existingAggregate, newValue):
-    (sampCount, mean, M2) = existingAggregate
-    sampCount += 1
-    delta = newValue - mean
-    mean += delta / sampCount
-    delta2 = newValue - mean
-    M2 += delta * delta2
-    return (sampCount, mean, M2)
-
-# Retrieve the mean, variance and sample variance from an aggregate
-def finalizePosStats(existingAggregate):
-    (sampCount, mean, M2) = existingAggregate
-    if sampCount < 2:
-        return float("nan")
-    else:
-        (mean, variance, sampleVariance) = (mean, M2 / sampCount, M2 / (sampCount - 1))
-        return (mean, variance, sampleVariance)
-    
-
 def feeders_align():
     matchingFeeders = get_feeders_by_name()
     if matchingFeeders is None or not len(matchingFeeders):
         return 
     
     feedLocations = []
-    
-    runningStatsX = (0,0,0)
-    runningStatsY = (0,0,0)
     for afeeder in matchingFeeders:
         if afeeder.isEnabled():
             refHole = afeeder.getReferenceHoleLocation()
             if refHole is None or not refHole:
                 print("A feed has no reference hole... hum")
             else:
-                runningStatsX = updatePosStats(runningStatsX, refHole.getX())
-                runningStatsY = updatePosStats(runningStatsY, refHole.getY())
+                feedLocations.append(refHole)
     
-    if runningStatsX[0] < 2:
+    # mean, variance and sample variance, for X and Y
+    posStats = psypnp.geom.axis_stats(psypnp.geom.from_locations(feedLocations))
+    if posStats is None:
         # enabled count is too low
         psypnp.ui.showError("Not enough enabled feeds to reliably find pos")
         return 
     
-    statsX = finalizePosStats(runningStatsX)
-    statsY = finalizePosStats(runningStatsY)
+    statsX, statsY = posStats
     
     print("Final stats: \nX: %s\n\nY: %s" % (statsX, statsY))
     targetX = None 
@@ -23,11 +23,12 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
@@ -40,6 +41,7 @@ from org.openpnp.util import MovableUtils
 import psypnp
 import psypnp.nv # non-volatile storage
 import psypnp.search
+import psypnp.profile
 
 
 # config
@@ -51,7 +53,12 @@ SafeZDownSpeedFactor = 0.4  # slow-down for final z approach
 StorageParentName = 'chkfeedht'
 
 def main():
-    keepLoopingUntilDone()
+    # timing tree printed at end, if user_config profile_enabled
+    psypnp.profile.begin()
+    try:
+        keepLoopingUntilDone()
+    finally:
+        psypnp.profile.finish()
     
 def keepLoopingUntilDone():
     shouldContinue = True
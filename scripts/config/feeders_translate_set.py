@@ -30,11 +30,12 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
@@ -42,6 +43,7 @@ from org.openpnp.model import Location, Length, LengthUnit
 
 import psypnp
 import psypnp.nv
+import psypnp.geom
 
 
 def main():
@@ -66,12 +68,9 @@ def feeders_translate():
     
     orientationDist = lastHole.subtract(refHole)
     
-    deltaX = 0.0
-    deltaY = 0.0
-    if abs(orientationDist.getX()) > abs(orientationDist.getY()):
-        deltaX = orientationDist.getX()
-    else:
-        deltaY = orientationDist.getY() 
+    # strips run along X or Y, keep only that component
+    deltaX, deltaY = psypnp.geom.snap_to_axis(orientationDist.getX(), 
+                                              orientationDist.getY())
         
     
     displacementLocation = Location(refHole.getUnits(), 
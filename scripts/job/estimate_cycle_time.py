@@ -0,0 +1,65 @@
+'''
+Estimates job cycle time, for the selected boards, with the current
+feeder setup.
+
+Totals XY travel, Z moves, nozzle tip changes and bottom vision passes
+and, using the axis speed/acceleration set in user_config (estimate_*),
+gives an estimated number of seconds per board.
+
+The previous estimate is kept around, so you can run this, try another
+auto_feed_setup outcome (or move some feeds around), run this again and
+compare the two by the numbers rather than by eye.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+
+############## BOILER PLATE #################
+# boiler plate to get access to psypnp modules, outside scripts/ dir
+import os.path
+import sys
+python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
+                                      '..', 'lib')
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
+
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
+
+############## /BOILER PLATE #################
+
+import psypnp
+import psypnp.nv # non-volatile storage
+import psypnp.ui
+import psypnp.estimate
+import psypnp.debug
+
+def main():
+    est = psypnp.estimate.estimate_selected_boards()
+    psypnp.debug.out.flush()
+    if est is None:
+        psypnp.ui.showError("Select at least one board")
+        return
+
+    if not est.num_placements:
+        psypnp.ui.showMessage("Nothing to place (no enabled placements with parts in enabled feeds)")
+        return
+
+    nvStore = psypnp.nv.NVStorage('estcycle')
+    report = est.summary()
+
+    prevSecs = nvStore.secsperboard
+    if prevSecs is not None:
+        report += '\n\nPrevious estimate: %.1f s per board (%+.1f s)' % (
+                        prevSecs, est.secondsPerBoard() - prevSecs)
+
+    nvStore.secsperboard = est.secondsPerBoard()
+
+    psypnp.ui.showMessage(report, "Cycle Time Estimate")
+
+main()
@@ -17,17 +17,20 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
 #from __future__ import absolute_import
 import re
 import psypnp
+import psypnp.search
+import psypnp.snapshot
 import psypnp.ui
 
 from  org.openpnp.model.Placement import Type as PlacementType
@@ -60,7 +63,8 @@ def select_action_and_perform():
     return True
 
 def feeders_to_placements(boardsList):
-    enabledFeederParts = get_enabled_feederparts_by_id()
+    # part id -> [enabled feeder records], one pass over the feeders
+    enabledFeederParts = psypnp.snapshot.get_snapshot().byPartId(onlyEnabled=True)
     
     numEnabled = 0
     for aBoard in boardsList:
@@ -133,20 +137,5 @@ def get_enabled_parts_by_id(boardsList):
     
     return enabledParts  
 
-def get_enabled_feederparts_by_id():
-    enabledParts = dict()
-    allFeeds = psypnp.search.get_sorted_feeders_list()
-    for aFeed in allFeeds:
-        if not aFeed.isEnabled():
-            continue 
-        
-        fPart = aFeed.getPart()
-        if fPart is None:
-            continue 
-        
-        enabledParts[fPart.getId()] = fPart 
-        
-    return enabledParts
-
 main()
 
@@ -28,17 +28,19 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
 #from __future__ import absolute_import
 import re
 import psypnp
+import psypnp.search
 import psypnp.ui
 
 from  org.openpnp.model.Placement import Type as PlacementType
@@ -121,6 +123,11 @@ def disable_placements(forboard):
 
 def disable_placements_without_feed(forboard):
     numChanged = 0
+    # part id -> [enabled feeders], one pass over the feeders
+    feedsByPartId = psypnp.search.feeds_by_part_map(onlyEnabled=True)
+    if feedsByPartId is None:
+        feedsByPartId = dict()
+        
     for aplacement in forboard.getPlacements():
         if not aplacement.isEnabled():
             continue
@@ -132,10 +139,8 @@ def disable_placements_without_feed(forboard):
         doDisable = False
         if prt is None:
             doDisable = True
-        else:
-            feeds = psypnp.search.feeds_by_part(prt, onlyEnabled=True)
-            if feeds is None:
-                doDisable = True
+        elif prt.getId() not in feedsByPartId:
+            doDisable = True
         
         if doDisable:
             numChanged += 1
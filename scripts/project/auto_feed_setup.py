@@ -34,11 +34,12 @@ import sys
 import traceback
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
@@ -47,6 +48,8 @@ import psypnp
 import psypnp.config.storagekeys as keys
 import psypnp.project.workspace
 import psypnp.auto.workspace
+import psypnp.auto.travel
+import psypnp.profile
 
 # you probably need to add your own here, unless you use
 # BOMParserKicad, which expects a CSV with:
@@ -142,6 +145,15 @@ def auto_setup():
     
     # Set the workspace to be working on this project
     wspace.setProject(proj)
+    
+    # if the job has placements, measure feed distances from where 
+    # parts actually go rather than from the middle of the feeders
+    try:
+        travelModel = psypnp.auto.travel.from_job()
+        if not travelModel.isEmpty():
+            wspace.setTravelModel(travelModel)
+    except:
+        print(traceback.format_exc())
 
     if not wspace.isReady():
         psypnp.ui.showError("Workspace not ready--unknown issue. ugh.")
@@ -188,16 +200,34 @@ def auto_setup():
     num_left_over = mapper.numUnassociated()
     if (num_left_over):
         confPrompt = "Mapped to %i feeds (%i left unplaced, see Log).  Apply?" % (num_associated, num_left_over)
-
     
-    if not psypnp.ui.getConfirmation("Apply Configuration", confPrompt):
+    if mapper.last_diff is not None:
+        # incremental: say how much is staying put
+        confPrompt = "%i parts stay in their %i feeds, %i new, %i need more room. %s" % (
+                            mapper.last_diff['kept'] + mapper.last_diff['resized'],
+                            mapper.last_diff['feeds_kept'],
+                            mapper.last_diff['added'],
+                            mapper.last_diff['resized'],
+                            confPrompt)
+
+    
+    applyChoice = psypnp.ui.getOption("Apply Configuration", confPrompt,
+                                      ['Apply', 'Dry run (to Log)', 'Cancel'], 'Apply')
+    if applyChoice == 1:
+        changePlan = mapper.apply(dryRun=True)
+        psypnp.ui.showMessage("Dry run: %s (see Log for details)" % changePlan.summary())
+        return
+    
+    if applyChoice != 0:
         return 
         
-    mapper.apply()
+    changePlan = mapper.apply()
     
-    psypnp.ui.showMessage("Changes applied.  %i feeds enabled out of %i feeds processed"
+    psypnp.ui.showMessage("Changes applied.  %i feeds enabled (%i left as they were) out of %i feeds processed\n%i feeders touched, %i skipped"
                           % 
-                          (wspace.feeds.numFeedsEnabled(), wspace.feeds.numFeedsProcessed()))
+                          (wspace.feeds.numFeedsEnabled(), wspace.feeds.numFeedsKept(),
+                           wspace.feeds.numFeedsProcessed(), 
+                           changePlan.numTouched(), changePlan.numSkipped()))
     
 
         
@@ -205,6 +235,11 @@ def auto_setup():
     
    
 
-auto_setup()
+# timing tree printed at end, if user_config profile_enabled
+psypnp.profile.begin()
+try:
+    auto_setup()
+finally:
+    psypnp.profile.finish()
    
    
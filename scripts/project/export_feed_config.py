@@ -24,11 +24,12 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
@@ -119,10 +120,6 @@ def main():
     
     
 def generate_csv(feed_info, projname, fname):
-    x_range = [10000, -10000] # arbitrary large 'invalid' values
-    y_range = [10000, -10000]
-    
-    
     headersByType = {
             'strip': getHeadersStrip,
             'pushpull': getHeadersPushPull,
@@ -133,22 +130,9 @@ def generate_csv(feed_info, projname, fname):
     for aFeed in feed_info:
         psypnp.debug.out.buffer(str(aFeed))
         psypnp.debug.out.buffer(', ')
-        x = aFeed.location.getX()
-        y = aFeed.location.getY()
-        if x < x_range[0]:
-            x_range[0] = x
-        if x > x_range[1]:
-            x_range[1] = x
-        if y < y_range[0]:
-            y_range[0] = y
-        if y > y_range[1]:
-            y_range[1] = y
-    
     psypnp.debug.out.flush()
-    # int-ify
-    for i in range(0,2):
-        x_range[i] = int(x_range[i])
-        y_range[i] = int(y_range[i])
+    
+    x_range, y_range = FeedMapper.feeds_span(feed_info)
     
             
     psypnp.debug.out.flush("RANGE: %i,%i - %i,%i" % (
@@ -171,7 +155,7 @@ def generate_csv(feed_info, projname, fname):
         
         
         # sorted_feedinfo = sorted(feed_info, key=lambda x: (x.part.getId(), x.feed.getName()))
-        sorted_feedinfo = sorted(feed_info, key=lambda x: x.feed.getName())
+        sorted_feedinfo = sorted(feed_info, key=lambda x: x.name)
         
         
         for aFeedInfo in sorted_feedinfo:
@@ -446,10 +430,10 @@ def gather_columns(aFeedInfo, globCountMap, partsRefMap):
         feedType,
         globCountMap[partName], # set index e.g. 2 of 4
         -1, # total slots for part, set later
-        aFeed.getName(),
+        aFeedInfo.name,
         numPartsPerBoard,
         ref,
-        part.getId(),
+        partName,
         pkg.getId(),
         aFeed.getPartPitch(),
         aFeed.getFeedCount(),
@@ -458,8 +442,6 @@ def gather_columns(aFeedInfo, globCountMap, partsRefMap):
     ]
     
     
-    feederLocation = getCoordinatesFor(aFeed.getLocation())
-    
     if feedType in extraProcessorsByType:
         addFunc = extraProcessorsByType[feedType]
         addFunc(aFeed, cols)
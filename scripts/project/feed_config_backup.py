@@ -16,11 +16,12 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
@@ -31,7 +32,7 @@ from org.openpnp.model import Location, Length, LengthUnit
 import csv as csv_module
 
 import psypnp
-import psypnp.search 
+import psypnp.snapshot
 import psypnp.nv # non-volatile storage
 
 StorageParentName = 'fdrdumps'
@@ -146,26 +147,26 @@ def main():
     numFeeds = generate_backup(feed_info, projname, fname)
     psypnp.showMessage("Saved %i feeds to %s" % (numFeeds, fname))
 
-def process_feed_tray(aFeed):
+def process_feed_tray(rec):
     pass
     
-def process_feed_strip(aFeed):
-    name = aFeed.getName()
+def process_feed_strip(rec):
+    name = rec.name
     if name is None or not len(name):
-        name = aFeed.getId()
-        
-    return StripFeedEntry(aFeed.getId(), name, 
-                             aFeed.getLocation(), 
-    	                     aFeed.getReferenceHoleLocation(), 
-                             aFeed.getLastHoleLocation(),
-                             aFeed.getPart(), 
-    	not aFeed.isEnabled())
-
-def process_feed(aFeed):
-    if hasattr(aFeed, 'trayCountX'):
-        return process_feed_tray(aFeed)
-    if hasattr(aFeed, 'idealLineLocations'):
-        return process_feed_strip(aFeed)
+        name = rec.id
+        
+    return StripFeedEntry(rec.id, name, 
+                             rec.location, 
+    	                     rec.reference_hole, 
+                             rec.last_hole,
+                             rec.part, 
+    	not rec.enabled)
+
+def process_feed(rec):
+    if rec.kind == 'tray':
+        return process_feed_tray(rec)
+    if rec.kind == 'strip':
+        return process_feed_strip(rec)
     else:
         print("Unsupported feed type\n")
         
@@ -173,22 +174,16 @@ def process_feed(aFeed):
         
 def freeze_feeders():
     FeedInfoList = []
-    feederList = psypnp.search.get_sorted_feeders_list()
+    # one pass over the feeders, through the java bridge, for everything
+    records = psypnp.snapshot.get_snapshot().sortedRecords()
     
     feeds_processed = 0
-    if feederList is None or not len(feederList):
+    if not len(records):
         return feeds_processed
 
-    next_feeder_index = 0
-    while next_feeder_index < len(feederList):
-        nxtFeed = None
-        while next_feeder_index < len(feederList) and nxtFeed is None:
-            if feederList[next_feeder_index].isEnabled() and feederList[next_feeder_index].getPart() is not None:
-                nxtFeed = feederList[next_feeder_index]
-            next_feeder_index += 1
-            
-        if nxtFeed is not None:
-            feedDetails = process_feed(nxtFeed)
+    for rec in records:
+        if rec.enabled and rec.part is not None:
+            feedDetails = process_feed(rec)
             if feedDetails is not None:
                 FeedInfoList.append(feedDetails)
                 feeds_processed += 1
@@ -202,20 +197,9 @@ def freeze_feeders():
     for aFeedInfo in FeedInfoList:
         validParts[aFeedInfo.part.getId()] = True
         
-    
-
-    next_feeder_index = 0
-    while next_feeder_index < len(feederList):
-        nxtFeed = None
-        while next_feeder_index < len(feederList) and nxtFeed is None:
-            if not feederList[next_feeder_index].isEnabled():
-                part = feederList[next_feeder_index].getPart()
-                if part is not None and part.getId() in validParts:
-                    nxtFeed = feederList[next_feeder_index]
-            next_feeder_index += 1
-            
-        if nxtFeed is not None:
-            feedDetails = process_feed(nxtFeed)
+    for rec in records:
+        if not rec.enabled and rec.part_id in validParts:
+            feedDetails = process_feed(rec)
             if feedDetails is not None:
                 feedDetails.disabled = True
                 FeedInfoList.append(feedDetails)
@@ -25,11 +25,12 @@ import os.path
 import sys
 python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
                                       '..', 'lib')
-sys.path.append(python_scripts_folder)
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
 
-# setup globals for modules
-import psypnp.globals
-psypnp.globals.setup(machine, config, scripting, gui)
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
 
 ############## /BOILER PLATE #################
 
@@ -42,14 +43,11 @@ import psypnp.feedmap.feedmapper as FeedMapper
 
 
 
-SVGWriteImported = True
-SVGWriteImportError = ''
-try:
-    import svgwrite
-    import math
-except Exception as e:
-    SVGWriteImportError = str(e)
-    SVGWriteImported = False
+import math
+
+# svgwrite is imported once there's actually something to draw, see
+# import_svgwrite(), rather than before the first dialog
+svgwrite = None
     
 
 StorageParentName = 'fdrmap'
@@ -70,12 +68,21 @@ ArrowColour = 'darkcyan'
 
     
 
+def import_svgwrite():
+    '''
+        @return: None if svgwrite is imported, the error otherwise
+    '''
+    global svgwrite
+    if svgwrite is not None:
+        return None
+    try:
+        import svgwrite
+    except Exception as e:
+        return str(e)
+    return None
+
 def main():
     
-    if not SVGWriteImported:
-        psypnp.showMessage("Could not import svgwrite lib, aborting\n%s" % SVGWriteImportError)
-        return
-    
     lastProjName = psypnp.nv.get_subvalue(StorageParentName, 'projname')
     lastFileName = psypnp.nv.get_subvalue(StorageParentName, 'filename')
     if lastProjName is None:
@@ -99,6 +106,12 @@ def main():
         
     psypnp.nv.set_subvalue(StorageParentName, 'projname', projname, False)
     psypnp.nv.set_subvalue(StorageParentName, 'filename', fname)
+    
+    importError = import_svgwrite()
+    if importError is not None:
+        psypnp.showMessage("Could not import svgwrite lib, aborting\n%s" % importError)
+        return
+    
     numFeeds = generate_image(feed_info, projname, fname)
     psypnp.showMessage("Saved %i feeds to %s" % (numFeeds, fname))
 
@@ -234,26 +247,8 @@ def generate_feed(dwg, aFeed, x_realoffset, y_realoffset, imgdimX, imgdimY):
     
     
 def generate_image(feed_info, projname, fname):
-    x_range = [10000, -10000] # arbitrary large 'invalid' values
-    y_range = [10000, -10000]
-    
     # first, figure out span of image
-    for aFeed in feed_info:
-        x = aFeed.location.getX()
-        y = aFeed.location.getY()
-        if x < x_range[0]:
-            x_range[0] = x
-        if x > x_range[1]:
-            x_range[1] = x
-        if y < y_range[0]:
-            y_range[0] = y
-        if y > y_range[1]:
-            y_range[1] = y
-    
-    # int-ify
-    for i in range(0,2):
-        x_range[i] = int(x_range[i])
-        y_range[i] = int(y_range[i])
+    x_range, y_range = FeedMapper.feeds_span(feed_info)
     
             
     print("RANGE: %i,%i - %i,%i" % (
@@ -0,0 +1,167 @@
+'''
+
+Plan feeders for several BOMs run back-to-back, so changeovers
+between them are as painless as possible.
+
+Parts used by more than one of the BOMs get fixed feeds, with room
+for the biggest batch, and each BOM's other parts go in whatever's
+left.  You get the number of strips to swap at each changeover and
+can then apply the layout for any one of the projects.
+
+Setup is as for auto_feed_setup (feed/package description CSVs set,
+parts created in openpnp).  BOMs are entered as a comma-separated
+list of BOM:NUMBOARDS, e.g.
+    data/boardA_bom.csv:4, data/boardB_bom.csv:10
+in the order they'll be run.
+
+@see: https://inductive-kickback.com/2020/10/psypnp-for-openpnp/
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2020 Pat Deegan, https://psychogenic.com
+@license: GPL version 3, see LICENSE file for details.
+
+'''
+
+############## BOILER PLATE #################
+# boiler plate to get access to psypnp modules, outside scripts/ dir
+import os.path
+import sys
+import traceback
+python_scripts_folder = os.path.join(scripting.getScriptsDirectory().toString(),
+                                      '..', 'lib')
+if python_scripts_folder not in sys.path:
+    sys.path.append(python_scripts_folder)
+
+# setup globals for modules (everything else loads on first use)
+import psypnp
+psypnp.bootstrap(machine, config, scripting, gui)
+
+############## /BOILER PLATE #################
+
+import os
+import psypnp
+import psypnp.nv
+import psypnp.ui
+import psypnp.config.storagekeys as keys
+import psypnp.project.workspace
+import psypnp.project.project
+import psypnp.auto.multiproject
+import psypnp.profile
+
+# as in auto_feed_setup, use your own if this isn't your BOM format
+from psypnp.project.bom_parsers import BOMParserKicad
+
+SelectedBOMParserType = BOMParserKicad
+
+ParentKey = keys.ProjectManager
+FeedDescCSVKey = keys.FeedDescCSV
+PackageDescCSVKey = keys.PackageDescCSV
+
+LastBatchListKey = 'lastmultibom'
+DefaultNumBoards = 4
+
+
+def parse_batch_list(spec):
+    '''
+        @return: list of (bom path, num boards) from BOM:NUM, BOM:NUM...
+                 or None if something's off
+    '''
+    batches = []
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not len(entry):
+            continue
+        numBoards = DefaultNumBoards
+        sepIdx = entry.rfind(':')
+        if sepIdx > 0 and entry[sepIdx+1:].strip().isdigit():
+            numBoards = int(entry[sepIdx+1:].strip())
+            entry = entry[:sepIdx].strip()
+
+        if not os.path.exists(psypnp.globals.fullpathFromRelative(entry)):
+            psypnp.ui.showError("Can't find bom %s " % entry)
+            return None
+        if numBoards < 1 or numBoards > 50:
+            psypnp.ui.showError("Please set a number of boards between 1-50 (%s)." % entry)
+            return None
+        batches.append((entry, numBoards))
+
+    return batches
+
+def multi_setup():
+    feed_desc_csv = psypnp.nv.get_subvalue(ParentKey, FeedDescCSVKey)
+    package_desc_csv = psypnp.nv.get_subvalue(ParentKey, PackageDescCSVKey)
+
+    if feed_desc_csv is None or package_desc_csv is None:
+        psypnp.ui.showError("Please run set_feed/set_package scripts first")
+        return
+
+    lastSpec = psypnp.nv.get_subvalue(ParentKey, LastBatchListKey)
+    if lastSpec is None:
+        lastSpec = ''
+
+    spec = psypnp.ui.getUserInput("BOMs to plan for (BOM:NUMBOARDS, ...)", lastSpec)
+    if spec is None:
+        return
+
+    batchList = parse_batch_list(spec)
+    if batchList is None:
+        return
+    if len(batchList) < 2:
+        psypnp.ui.showError("Need at least 2 BOMs (use auto_feed_setup for one)")
+        return
+
+    psypnp.nv.set_subvalue(ParentKey, LastBatchListKey, spec)
+
+    try:
+        wspace = psypnp.project.workspace.Workspace(
+            psypnp.globals.fullpathFromRelative(package_desc_csv),
+            psypnp.globals.fullpathFromRelative(feed_desc_csv))
+
+        if not (wspace.feed_descriptions.isOK() and wspace.package_descriptions.isOK()):
+            psypnp.ui.showError("Feed/package descriptions CSV reports NOT ok")
+            return
+
+        projectBatches = []
+        for bom_csv, numBoards in batchList:
+            proj = psypnp.project.project.Project(bom_csv, SelectedBOMParserType)
+            if not proj.isOK():
+                wspace.ignoreProjectOKStatus = True
+                print("Project %s only mapped %i out of %i parts" % (bom_csv,
+                                                                     proj.numMapped(),
+                                                                     proj.numInBOM()))
+            projectBatches.append((proj, numBoards))
+
+        # first project sets up the feeds, the planner deals with the rest
+        wspace.setProject(projectBatches[0][0])
+
+        planner = psypnp.auto.multiproject.MultiProjectPlanner(wspace, projectBatches)
+        if not planner.isReady():
+            psypnp.ui.showError("Workspace not ready--unknown issue. ugh.")
+            return
+
+        planner.plan()
+    except Exception as exc:
+        print(traceback.format_exc())
+        psypnp.ui.showError("Ugh: problem planning... %s" % str(exc))
+        return
+
+    options = [os.path.basename(l.project.name) for l in planner.layouts]
+    options.append('Cancel')
+    sel = psypnp.ui.getOption("Multi-project plan",
+                              "%s\n\nSet up feeders for:" % planner.report(),
+                              options, options[0])
+
+    if sel is None or sel < 0 or sel >= len(planner.layouts):
+        return
+
+    changePlan = planner.apply(sel)
+    psypnp.ui.showMessage("Feeders set up for %s: %i feeders touched, %i skipped" %
+                          (options[sel], changePlan.numTouched(), changePlan.numSkipped()))
+
+
+# timing tree printed at end, if user_config profile_enabled
+psypnp.profile.begin()
+try:
+    multi_setup()
+finally:
+    psypnp.profile.finish()